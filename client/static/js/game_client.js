@@ -14,6 +14,8 @@ const GameClient = {
         playerId: "",          // ID игрока
         username: "",          // Имя игрока
         roomId: "",            // ID комнаты для мультиплеера
+        stateSeq: 0,           // Версия состояния комнаты (для дельта-обновлений GAME_DELTA)
+        resumeToken: "",       // Токен сессии (SESSION) для возврата в комнату после обрыва связи
         opponents: [],         // Данные о других игроках в комнате
         practiceMode: false,   // Режим практики (одиночная игра)
         levelsMode: false,     // Режим уровней
@@ -125,130 +127,16 @@ const GameClient = {
 
     // WebSocket соединение
     socket: null,
+    socketBaseUrl: null,    // Адрес шарда текущего соединения (для переподключения)
+    reconnectAttempts: 0,
+    maxReconnectAttempts: 5,
     timer: null,
 
-    levels: [
-    {
-        id: 1,
-        mainWord: "программа",
-        wordsToFind: ["ром", "грамм", "пора", "рама", "амор", "марма", "гамма"],
-        targets: [3, 5, 7],
-        timeLimit: 180,
-        hint: "Ищите короткие слова из 3-4 букв, затем переходите к более длинным.",
-    },
-    {
-        id: 2,
-        mainWord: "компьютер",
-        wordsToFind: ["кот", "метр", "порт", "трек", "комп", "ютро", "перо", "корт"],
-        targets: [4, 6, 8],
-        timeLimit: 240,
-        hint: "Буква 'ю' встречается редко — используйте её в конце слов.",
-    },
-    {
-        id: 3,
-        mainWord: "технология",
-        wordsToFind: ["тело", "лого", "гол", "хет", "неон", "хол", "гиена", "техно", "лето"],
-        targets: [4, 6, 9],
-        timeLimit: 300,
-        hint: "Слова с 'х' и 'г' могут быть неочевидными.",
-    },
-    {
-        id: 4,
-        mainWord: "автомобиль",
-        wordsToFind: ["мот", "лита", "бит", "авто", "моль", "том", "лимо", "бомба", "таль"],
-        targets: [4, 6, 9],
-        timeLimit: 240,
-        hint: "Обратите внимание на 'ь' — его можно использовать в конце слов.",
-    },
-    {
-        id: 5,
-        mainWord: "республика",
-        wordsToFind: ["пес", "куб", "липа", "суп", "белка", "пир", "репа", "булка", "спур"],
-        targets: [4, 6, 9],
-        timeLimit: 270,
-        hint: "Попробуйте слова с 'у' и 'и'.",
-    },
-    {
-        id: 6,
-        mainWord: "эксперимент",
-        wordsToFind: ["пир", "мен", "тип", "крем", "метр", "перт", "экран", "кит", "треп"],
-        targets: [4, 6, 9],
-        timeLimit: 300,
-        hint: "Буква 'э' встречается редко — используйте её в начале слов.",
-    },
-    {
-        id: 7,
-        mainWord: "директор",
-        wordsToFind: ["код", "рок", "тир", "кит", "ред", "док", "кино", "ток", "диктор"],
-        targets: [4, 6, 9],
-        timeLimit: 240,
-        hint: "Попробуйте слова с 'д' и 'к'.",
-    },
-    {
-        id: 8,
-        mainWord: "калькулятор",
-        wordsToFind: ["куль", "рак", "рот", "люк", "торт", "акр", "крот", "лак", "каюр"],
-        targets: [4, 6, 9],
-        timeLimit: 270,
-        hint: "Буква 'ь' может быть сложной — используйте её в середине слов.",
-    },
-    {
-        id: 9,
-        mainWord: "телевизор",
-        wordsToFind: ["лев", "зло", "тело", "вино", "литр", "резит", "вето", "зило", "тезис"],
-        targets: [4, 6, 9],
-        timeLimit: 300,
-        hint: "Слова с 'з' и 'в' могут быть неочевидными.",
-    },
-    {
-        id: 10,
-        mainWord: "фотография",
-        wordsToFind: ["торф", "граф", "рот", "фрау", "гора", "агора", "фора", "тиф", "арго"],
-        targets: [4, 6, 9],
-        timeLimit: 270,
-        hint: "Буква 'ф' встречается редко — используйте её в начале или конце.",
-    },
-    {
-        id: 11,
-        mainWord: "лаборатория",
-        wordsToFind: ["лоб", "робот", "борт", "лира", "табор", "оратор", "брат", "литр", "бал"],
-        targets: [4, 6, 9],
-        timeLimit: 300,
-        hint: "Попробуйте длинные слова с 'р' и 'т'.",
-    },
-    {
-        id: 12,
-        mainWord: "космонавт",
-        wordsToFind: ["сом", "нос", "ток", "ван", "кост", "сова", "мост", "наст", "команда"],
-        targets: [4, 6, 9],
-        timeLimit: 240,
-        hint: "Буква 'в' может быть ключевой в некоторых словах.",
-    },
-    {
-        id: 13,
-        mainWord: "электричество",
-        wordsToFind: ["кит", "лев", "тире", "река", "литр", "ветер", "китель", "телец", "кельт"],
-        targets: [4, 6, 9],
-        timeLimit: 330,
-        hint: "Длинное слово — ищите комбинации из 3-5 букв.",
-    },
-    {
-        id: 14,
-        mainWord: "стадион",
-        wordsToFind: ["сад", "нос", "тон", "доит", "аист", "дина", "стои", "данс", "оазис"],
-        targets: [4, 6, 9],
-        timeLimit: 240,
-        hint: "Попробуйте слова с 'д' и 'н'.",
-    },
-    {
-        id: 15,
-        mainWord: "библиотека",
-        wordsToFind: ["бит", "либ", "кот", "бал", "лита", "акт", "билет", "тека", "блок"],
-        targets: [4, 6, 9],
-        timeLimit: 300,
-        hint: "Буква 'б' встречается дважды — используйте её в разных словах.",
-    }
-],
+    // Уровни и слова практики приходят с сервера (GET /levels) вместе с множествами решений
+    levels: [],
+    levelPack: null,
+    levelPackPromise: null,
+    solutionSets: {},       // Основное слово -> Set хэшей FNV-1a допустимых слов
 
     getLevelById(id) {
         return this.levels.find(level => level.id === id);
@@ -264,6 +152,9 @@ const GameClient = {
         this.processLevelWord = this.processLevelWord.bind(this);
         this.processPracticeWord = this.processPracticeWord.bind(this);
 
+        // Набор уровней загружается заранее: он кэшируется браузером и не меняется до новой версии
+        this.loadLevelPack();
+
         // Получение ID игрока
         this.getPlayerId().then(playerId => {
             console.log('Получен ID игрока:', playerId);
@@ -418,6 +309,16 @@ const GameClient = {
     // Показ экрана выбора уровней
     showLevelsScreen: function() {
         console.log('Запуск showLevelsScreen...');
+        if (!this.levelPack) {
+            this.loadLevelPack().then(pack => {
+                if (pack) {
+                    this.showLevelsScreen();
+                } else {
+                    this.showError('Не удалось загрузить уровни');
+                }
+            });
+            return;
+        }
         console.log('Состояние прогресса:', this.state.progress);
         const levelsGrid = document.getElementById('levels-grid');
         if (!levelsGrid) {
@@ -570,7 +471,7 @@ const GameClient = {
         if (!this.state.practiceMode && !this.state.levelsMode) {
             // В мультиплеерном режиме отправляем сообщение серверу
             if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-                this.socket.send(JSON.stringify({
+                this.socket.send(this.encodeMessage({
                     type: 'PLAYER_EXIT',
                     roomId: this.state.roomId,
                     playerId: this.state.playerId
@@ -714,15 +615,24 @@ const GameClient = {
     },
 
     // Подключение к WebSocket
-    connectWebSocket: function(username) {
+    // baseUrl - адрес шарда (после ROOM_REDIRECT), onOpen - действие после подключения
+    connectWebSocket: function(username, baseUrl, onOpen) {
         console.log('Подключение к WebSocket...');
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws/${this.state.playerId}?username=${encodeURIComponent(username)}`;
+        const base = baseUrl || `${protocol}//${window.location.host}`;
+        let wsUrl = `${base}/ws/${this.state.playerId}?username=${encodeURIComponent(username)}`;
+        if (this.state.resumeToken) {
+            // Переподключение: сервер вернет в комнату и дошлет пропущенное после stateSeq
+            wsUrl += `&resume=${encodeURIComponent(this.state.resumeToken)}&seq=${this.state.stateSeq}`;
+        }
+        this.socketBaseUrl = baseUrl || null;
 
         console.log('URL для WebSocket:', wsUrl);
 
         try {
-            this.socket = new WebSocket(wsUrl);
+            // Бинарный режим MessagePack: сервер подтверждает его подпротоколом ksis.msgpack
+            this.socket = this.useMsgpack() ? new WebSocket(wsUrl, ['ksis.msgpack']) : new WebSocket(wsUrl);
+            this.socket.binaryType = 'arraybuffer';
         } catch (e) {
             console.error('Ошибкаа при создании WebSocket:', e);
             this.showError('Не удалось подключиться к серверу: ' + e.message);
@@ -732,12 +642,15 @@ const GameClient = {
         // Обработчики событий WebSocket
         this.socket.onopen = () => {
             console.log('WebSocket соединение установлено');
+            if (onOpen) {
+                onOpen();
+            }
         };
 
         this.socket.onmessage = (event) => {
-            console.log('Получено сообщение от сервера:', event.data);
             try {
-                const data = JSON.parse(event.data);
+                const data = this.decodeMessage(event.data);
+                console.log('Получено сообщение от сервера:', data);
                 this.handleServerMessage(data);
             } catch (e) {
                 console.error('Ошибка разбора сообщения:', e);
@@ -746,7 +659,9 @@ const GameClient = {
 
         this.socket.onclose = (event) => {
             console.log('WebSocket соединение закрыто:', event);
-            if (!event.wasClean) {
+            if (event.code !== 1000 && this.state.resumeToken && this.reconnectAttempts < this.maxReconnectAttempts) {
+                this.scheduleReconnect();
+            } else if (!event.wasClean) {
                 this.showError('Соединение с сервером потеряно. Перезагрузите страницу.');
             }
         };
@@ -757,6 +672,143 @@ const GameClient = {
         };
     },
 
+    // Переподключение с растущей задержкой (0.5, 1, 2, 4, 8 с): сервер держит место в комнате ограниченное время
+    scheduleReconnect: function() {
+        const delay = 500 * Math.pow(2, this.reconnectAttempts);
+        this.reconnectAttempts++;
+        this.showMessage('Связь потеряна, переподключение...', 'warning', Math.min(delay, 3000));
+        setTimeout(() => this.connectWebSocket(this.state.username, this.socketBaseUrl), delay);
+    },
+
+    handleSession: function(data) {
+        const wasInRoom = Boolean(this.state.roomId) && this.reconnectAttempts > 0;
+        this.state.resumeToken = data.resumeToken;
+        this.reconnectAttempts = 0;
+        if (data.resumed) {
+            if (data.roomId) {
+                this.state.roomId = data.roomId;
+            }
+            this.showMessage('Соединение восстановлено', 'success');
+        } else if (wasInRoom) {
+            // Срок ожидания на сервере истек: место в комнате потеряно
+            this.state.roomId = "";
+            this.state.opponents = [];
+            this.stopTimer();
+            document.getElementById('room-id-display').classList.add('hidden');
+            this.showScreen('lobby-screen');
+            this.showError('Не удалось вернуться в комнату');
+        }
+    },
+
+    // MessagePack включается параметром страницы ?codec=msgpack (нужен msgpack.js)
+    useMsgpack: function() {
+        return typeof MsgPack !== 'undefined'
+            && new URLSearchParams(window.location.search).get('codec') === 'msgpack';
+    },
+
+    // Кодирование сообщения для сервера: MessagePack, если сервер принял подпротокол, иначе JSON
+    encodeMessage: function(message) {
+        if (this.socket && this.socket.protocol === 'ksis.msgpack') {
+            return MsgPack.encode(message);
+        }
+        return JSON.stringify(message);
+    },
+
+    // Разбор кадра сервера: текстовый - JSON, бинарный - MessagePack
+    decodeMessage: function(frame) {
+        if (typeof frame === 'string') {
+            return JSON.parse(frame);
+        }
+        return MsgPack.decode(frame);
+    },
+
+    // Загрузка набора уровней: манифест с версией, затем неизменяемый набор по адресу с версией
+    loadLevelPack: function() {
+        if (!this.levelPackPromise) {
+            this.levelPackPromise = fetch('/levels')
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.json();
+                })
+                .then(manifest => fetch(manifest.url))
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.json();
+                })
+                .then(pack => {
+                    const sets = {};
+                    pack.levels.forEach(level => {
+                        sets[level.mainWord] = this.decodeHashSet(level.solutions);
+                    });
+                    pack.practice.forEach(item => {
+                        sets[item.mainWord] = this.decodeHashSet(item.solutions);
+                    });
+                    this.solutionSets = sets;
+                    this.levels = pack.levels;
+                    this.levelPack = pack;
+                    console.log('Набор уровней загружен:', pack.levels.length, 'уровней');
+                    return pack;
+                })
+                .catch(error => {
+                    console.error('Ошибка загрузки набора уровней:', error);
+                    // Следующий вызов попробует снова
+                    this.levelPackPromise = null;
+                    return null;
+                });
+        }
+        return this.levelPackPromise;
+    },
+
+    // FNV-1a (32 бита) по байтам UTF-8, как server/levels.py
+    fnv1a32: function(word) {
+        let hash = 0x811c9dc5;
+        for (const byte of new TextEncoder().encode(word)) {
+            hash ^= byte;
+            hash = Math.imul(hash, 0x01000193) >>> 0;
+        }
+        return hash >>> 0;
+    },
+
+    // base64 отсортированных big-endian uint32 -> Set
+    decodeHashSet: function(encoded) {
+        const bytes = Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+        const view = new DataView(bytes.buffer);
+        const hashes = new Set();
+        for (let offset = 0; offset + 4 <= bytes.length; offset += 4) {
+            hashes.add(view.getUint32(offset, false));
+        }
+        return hashes;
+    },
+
+    // Проверка слова по множеству решений из набора уровней (без запроса к серверу).
+    // Слова вне множества проверяются через API, только если сервер проверяет их по Wiktionary.
+    checkWordLocally: async function(word, mainWord) {
+        const solutions = this.solutionSets[mainWord.toLowerCase()];
+        if (!solutions) {
+            return this.checkWordWithAPI(word, mainWord);
+        }
+
+        if (!word || word.length < 2) {
+            return { valid: false, message: 'Слово должно содержать минимум 2 буквы' };
+        }
+        word = word.trim().toLowerCase();
+        mainWord = mainWord.toLowerCase();
+        if (!this.canMakeWord(word, mainWord)) {
+            return { valid: false, message: 'Нельзя составить из букв основного слова' };
+        }
+        if (this.state.userWords.some(w => w.toLowerCase() === word)) {
+            return { valid: false, message: 'Вы уже использовали это слово' };
+        }
+
+        if (solutions.has(this.fnv1a32(word))) {
+            return { valid: true, score: word.length };
+        }
+        if (this.levelPack && this.levelPack.remoteFallback) {
+            return this.checkWordWithAPI(word, mainWord);
+        }
+        return { valid: false, message: 'Слово не найдено в словаре' };
+    },
+
     // Универсальная функция проверки слов через API
     checkWordWithAPI: async function(word, mainWord) {
         console.log('Проверка слова через API:', word);
@@ -784,6 +836,12 @@ const GameClient = {
             // Проверяем слово через API
             const response = await fetch(`/check_word?word=${encodeURIComponent(word)}`);
 
+            if (response.status === 429 || response.status === 503) {
+                // Лимит частоты или перегрузка проверки: слово не проверено, можно повторить позже
+                const data = await response.json().catch(() => ({}));
+                return { valid: false, message: data.error || 'Слишком много запросов, подождите' };
+            }
+
             if (!response.ok) {
                 console.error('Ошибка HTTP:', response.status);
                 return { valid: false, message: 'Ошибка при проверке слова' };
@@ -821,8 +879,8 @@ const GameClient = {
         this.state.levelsMode = false;
         this.state.currentLevelData = null;
 
-        // Генерируем случайное слово для практики
-        const practiceWords = [
+        // Генерируем случайное слово для практики (из набора уровней, если он уже загружен)
+        const practiceWords = this.levelPack ? this.levelPack.practice.map(item => item.mainWord) : [
             "программирование", "разработка", "алгоритм", "компьютер",
             "интернет", "технология", "виртуальный", "разработчик",
             "программист", "приложение", "операционная", "система"
@@ -1031,18 +1089,18 @@ const GameClient = {
 
             case 'WORD_RESULT':
                 // Обработка результата проверки нашего слова
-                if (data.valid) {
-                    this.state.userWords.push(data.word);
-                    this.state.score += data.score;
-                    this.showMessage(`Слово "${data.word}" принято! +${data.score} очков`, 'success');
-                } else {
-                    this.showMessage(data.message || `Слово "${data.word}" не принято`, 'error');
-                }
+                this.handleWordResult(data);
+                break;
+
+            case 'WORD_RESULTS':
+                // Результаты пакетной отправки слов (SUBMIT_WORDS)
+                (data.results || []).forEach(result => this.handleWordResult(result));
                 break;
 
             case 'GAME_STATE':
                 // ИСПРАВЛЕНИЕ: правильно обрабатываем состояние игры
                 console.log('Получено состояние игры:', data.state);
+                this.state.stateSeq = data.seq || 0;
 
                 // Обновляем основную информацию
                 this.state.mainWord = data.state.mainWord;
@@ -1063,7 +1121,12 @@ const GameClient = {
                 this.renderGameState();
                 break;
 
+            case 'GAME_DELTA':
+                this.applyStateDelta(data);
+                break;
+
             case 'GAME_START':
+                this.state.stateSeq = data.seq || this.state.stateSeq;
                 this.startGame(data.mainWord, data.availableCells, data.timeLimit);
                 break;
 
@@ -1075,15 +1138,85 @@ const GameClient = {
                 this.handlePlayerExit(data);
                 break;
 
+            case 'ROOM_REDIRECT':
+                this.redirectToShard(data);
+                break;
+
             case 'ERROR':
                 this.showError(data.message);
                 break;
 
+            case 'SESSION':
+                this.handleSession(data);
+                break;
+
+            case 'PING':
+                // Heartbeat: сервер закрывает соединения, от которых давно ничего не приходило
+                this.sendMessage({ type: 'PONG' });
+                break;
+
+            case 'ROOM_CLOSED':
+                // Комната в ожидании закрыта сервером из-за неактивности
+                this.state.roomId = "";
+                this.state.opponents = [];
+                document.getElementById('room-id-display').classList.add('hidden');
+                this.showScreen('lobby-screen');
+                this.showError(data.message);
+                break;
+
             default:
                 console.log('Неизвестный тип сообщения:', data.type);
         }
     },
 
+    // Применение дельты состояния; при пропуске версии запрашиваем ресинхронизацию
+    applyStateDelta: function(data) {
+        if (data.seq <= this.state.stateSeq) {
+            return; // устаревшая или повторная дельта
+        }
+        if (data.seq !== this.state.stateSeq + 1) {
+            console.log(`Пропущены обновления (${this.state.stateSeq} -> ${data.seq}), запрашиваем состояние`);
+            this.sendMessage({ type: 'RESYNC', seq: this.state.stateSeq });
+            return;
+        }
+        this.state.stateSeq = data.seq;
+
+        (data.ops || []).forEach(op => {
+            const isMe = op.playerId === this.state.playerId;
+            const opponent = isMe ? null : this.state.opponents.find(o => o.playerId === op.playerId);
+
+            switch (op.op) {
+                case 'word_added':
+                    if (isMe && !this.state.userWords.includes(op.word)) {
+                        this.state.userWords.push(op.word);
+                    }
+                    break;
+                case 'score_changed':
+                    if (isMe) {
+                        this.state.score = op.score;
+                    } else if (opponent) {
+                        opponent.score = op.score;
+                        opponent.wordsCount = op.wordsCount;
+                    }
+                    break;
+                default:
+                    console.log('Неизвестная операция дельты:', op.op);
+            }
+        });
+
+        this.renderGameState();
+    },
+
+    handleWordResult: function(data) {
+        if (data.valid) {
+            this.state.userWords.push(data.word);
+            this.state.score += data.score;
+            this.showMessage(`Слово "${data.word}" принято! +${data.score} очков`, 'success');
+        } else {
+            this.showMessage(data.message || `Слово "${data.word}" не принято`, 'error');
+        }
+    },
+
     handlePlayerExit: function(data) {
         const { playerId, username } = data;
         console.log(`Игрок ${username} (ID: ${playerId}) покинул игру`);
@@ -1135,11 +1268,39 @@ const GameClient = {
         }
     },
 
+    // Комната живет на другом процессе сервера: переподключаемся к нему и повторяем действие
+    redirectToShard: function(data) {
+        console.log('Перенаправление на шард', data.shard, 'для комнаты', data.roomId);
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const baseUrl = data.url || `${protocol}//${window.location.hostname}:${data.port}`;
+
+        const oldSocket = this.socket;
+        this.connectWebSocket(this.state.username, baseUrl, () => {
+            this.sendMessage({
+                type: data.action,
+                roomId: data.roomId
+            });
+        });
+        if (oldSocket) {
+            oldSocket.onclose = null;
+            oldSocket.close();
+        }
+    },
+
+    // Отправка сообщения серверу
+    sendMessage: function(message) {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(this.encodeMessage(message));
+        } else {
+            this.showError('Нет соединения с сервером');
+        }
+    },
+
     // Создание новой комнаты
     createRoom: function() {
         console.log('Создание новой комнаты...');
         if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-            this.socket.send(JSON.stringify({
+            this.socket.send(this.encodeMessage({
                 type: 'CREATE_ROOM'
             }));
         } else {
@@ -1151,7 +1312,7 @@ const GameClient = {
     joinRoom: function(roomId) {
         console.log('Присоединение к комнате:', roomId);
         if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-            this.socket.send(JSON.stringify({
+            this.socket.send(this.encodeMessage({
                 type: 'JOIN_ROOM',
                 roomId: roomId
             }));
@@ -1167,7 +1328,7 @@ const GameClient = {
         this.showMessage("Проверяем слово...", 'info', 1000);
 
         try {
-            const result = await this.checkWordWithAPI(word, this.state.mainWord);
+            const result = await this.checkWordLocally(word, this.state.mainWord);
 
             if (result.valid) {
                 // Добавляем слово в список
@@ -1195,7 +1356,7 @@ const GameClient = {
 
         try {
             if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-                this.socket.send(JSON.stringify({
+                this.socket.send(this.encodeMessage({
                     type: 'SUBMIT_WORD',
                     word: word
                 }));
@@ -1291,7 +1452,7 @@ const GameClient = {
 
     leaveRoom: function() {
         if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-            this.socket.send(JSON.stringify({
+            this.socket.send(this.encodeMessage({
                 type: 'LEAVE_ROOM',
                 roomId: this.state.roomId,
                 playerId: this.state.playerId
@@ -1305,7 +1466,7 @@ const GameClient = {
 
     startMultiplayerGame: function() {
         if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-            this.socket.send(JSON.stringify({
+            this.socket.send(this.encodeMessage({
                 type: 'START_GAME',
                 roomId: this.state.roomId
             }));
@@ -1377,7 +1538,7 @@ const GameClient = {
         this.showMessage("Проверяем слово...", 'info', 1000);
 
         try {
-            const result = await this.checkWordWithAPI(word, this.state.mainWord);
+            const result = await this.checkWordLocally(word, this.state.mainWord);
 
             if (result.valid) {
                 // Добавляем слово в список
@@ -1522,7 +1683,7 @@ const GameClient = {
                 if (this.state.practiceMode) {
                     this.endGame(); // Локальное завершение игры
                 } else if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-                    this.socket.send(JSON.stringify({
+                    this.socket.send(this.encodeMessage({
                         type: 'GAME_FINISHED',
                         roomId: this.state.roomId
                     }));
@@ -0,0 +1,182 @@
+/**
+ * Минимальный кодек MessagePack для бинарного режима WebSocket (подпротокол ksis.msgpack).
+ * Поддерживает типы, которые встречаются в сообщениях игры: null, boolean, числа,
+ * строки, массивы, объекты (и bin при чтении).
+ */
+const MsgPack = {
+    _textEncoder: new TextEncoder(),
+    _textDecoder: new TextDecoder(),
+
+    // Объект -> Uint8Array
+    encode: function(value) {
+        const bytes = [];
+        this._write(value, bytes);
+        return new Uint8Array(bytes);
+    },
+
+    _write: function(value, out) {
+        if (value === null || value === undefined) {
+            out.push(0xc0);
+        } else if (value === false) {
+            out.push(0xc2);
+        } else if (value === true) {
+            out.push(0xc3);
+        } else if (typeof value === 'number') {
+            this._writeNumber(value, out);
+        } else if (typeof value === 'string') {
+            const data = this._textEncoder.encode(value);
+            const n = data.length;
+            if (n < 32) {
+                out.push(0xa0 | n);
+            } else if (n < 0x100) {
+                out.push(0xd9, n);
+            } else if (n < 0x10000) {
+                out.push(0xda, n >> 8, n & 0xff);
+            } else {
+                out.push(0xdb, n >>> 24, (n >> 16) & 0xff, (n >> 8) & 0xff, n & 0xff);
+            }
+            for (let i = 0; i < n; i++) {
+                out.push(data[i]);
+            }
+        } else if (Array.isArray(value)) {
+            this._writeHeader(value.length, 0x90, 0xdc, out);
+            value.forEach(item => this._write(item, out));
+        } else if (typeof value === 'object') {
+            const keys = Object.keys(value).filter(key => value[key] !== undefined);
+            this._writeHeader(keys.length, 0x80, 0xde, out);
+            keys.forEach(key => {
+                this._write(key, out);
+                this._write(value[key], out);
+            });
+        } else {
+            throw new Error('MsgPack: неподдерживаемый тип ' + typeof value);
+        }
+    },
+
+    // fixarray/fixmap (до 15 элементов), иначе array16/map16 или array32/map32
+    _writeHeader: function(n, fixBase, code16, out) {
+        if (n < 16) {
+            out.push(fixBase | n);
+        } else if (n < 0x10000) {
+            out.push(code16, n >> 8, n & 0xff);
+        } else {
+            out.push(code16 + 1, n >>> 24, (n >> 16) & 0xff, (n >> 8) & 0xff, n & 0xff);
+        }
+    },
+
+    _writeNumber: function(value, out) {
+        if (Number.isInteger(value) && value >= -0x80000000 && value <= 0xffffffff) {
+            if (value >= 0 && value < 128) {
+                out.push(value);
+            } else if (value < 0 && value >= -32) {
+                out.push(value & 0xff);
+            } else if (value >= 0) {
+                out.push(0xce, value >>> 24, (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff);
+            } else {
+                out.push(0xd2, (value >> 24) & 0xff, (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff);
+            }
+            return;
+        }
+        // Остальные числа - float64
+        const view = new DataView(new ArrayBuffer(8));
+        view.setFloat64(0, value);
+        out.push(0xcb);
+        for (let i = 0; i < 8; i++) {
+            out.push(view.getUint8(i));
+        }
+    },
+
+    // ArrayBuffer или Uint8Array -> объект
+    decode: function(buffer) {
+        const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+        const reader = {
+            bytes: bytes,
+            view: new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength),
+            pos: 0
+        };
+        const value = this._read(reader);
+        if (reader.pos !== bytes.length) {
+            throw new Error('MsgPack: лишние байты в кадре');
+        }
+        return value;
+    },
+
+    _read: function(r) {
+        const type = r.bytes[r.pos++];
+        if (type === undefined) {
+            throw new Error('MsgPack: неожиданный конец кадра');
+        }
+        if (type < 0x80) return type;                          // positive fixint
+        if (type >= 0xe0) return type - 0x100;                 // negative fixint
+        if ((type & 0xf0) === 0x80) return this._readMap(r, type & 0x0f);
+        if ((type & 0xf0) === 0x90) return this._readArray(r, type & 0x0f);
+        if ((type & 0xe0) === 0xa0) return this._readString(r, type & 0x1f);
+
+        const view = r.view;
+        let value;
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return this._readBytes(r, this._readUint(r, 1));
+            case 0xc5: return this._readBytes(r, this._readUint(r, 2));
+            case 0xc6: return this._readBytes(r, this._readUint(r, 4));
+            case 0xca: value = view.getFloat32(r.pos); r.pos += 4; return value;
+            case 0xcb: value = view.getFloat64(r.pos); r.pos += 8; return value;
+            case 0xcc: return this._readUint(r, 1);
+            case 0xcd: return this._readUint(r, 2);
+            case 0xce: return this._readUint(r, 4);
+            case 0xcf: value = Number(view.getBigUint64(r.pos)); r.pos += 8; return value;
+            case 0xd0: value = view.getInt8(r.pos); r.pos += 1; return value;
+            case 0xd1: value = view.getInt16(r.pos); r.pos += 2; return value;
+            case 0xd2: value = view.getInt32(r.pos); r.pos += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(r.pos)); r.pos += 8; return value;
+            case 0xd9: return this._readString(r, this._readUint(r, 1));
+            case 0xda: return this._readString(r, this._readUint(r, 2));
+            case 0xdb: return this._readString(r, this._readUint(r, 4));
+            case 0xdc: return this._readArray(r, this._readUint(r, 2));
+            case 0xdd: return this._readArray(r, this._readUint(r, 4));
+            case 0xde: return this._readMap(r, this._readUint(r, 2));
+            case 0xdf: return this._readMap(r, this._readUint(r, 4));
+        }
+        throw new Error('MsgPack: неподдерживаемый тип 0x' + type.toString(16));
+    },
+
+    _readUint: function(r, size) {
+        let value;
+        if (size === 1) value = r.view.getUint8(r.pos);
+        else if (size === 2) value = r.view.getUint16(r.pos);
+        else value = r.view.getUint32(r.pos);
+        r.pos += size;
+        return value;
+    },
+
+    _readBytes: function(r, n) {
+        const value = r.bytes.slice(r.pos, r.pos + n);
+        r.pos += n;
+        return value;
+    },
+
+    _readString: function(r, n) {
+        const value = this._textDecoder.decode(r.bytes.subarray(r.pos, r.pos + n));
+        r.pos += n;
+        return value;
+    },
+
+    _readArray: function(r, n) {
+        const result = new Array(n);
+        for (let i = 0; i < n; i++) {
+            result[i] = this._read(r);
+        }
+        return result;
+    },
+
+    _readMap: function(r, n) {
+        const result = {};
+        for (let i = 0; i < n; i++) {
+            const key = this._read(r);
+            result[key] = this._read(r);
+        }
+        return result;
+    }
+};
@@ -1,4 +1,49 @@
+import argparse
+import os
+import subprocess
+import sys
+
 import uvicorn
 
+
+def run_shards(host: str, base_port: int, workers: int):
+    """
+    Многопроцессный режим: N процессов uvicorn, каждый владеет своей частью комнат
+    (по room_id) и слушает порт base_port + i. Шарды общаются через Unix-сокеты.
+    """
+    processes = []
+    for index in range(workers):
+        env = dict(os.environ,
+                   SHARD_INDEX=str(index),
+                   SHARD_COUNT=str(workers),
+                   SHARD_BASE_PORT=str(base_port))
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'server.main:app',
+             '--host', host, '--port', str(base_port + index)],
+            env=env
+        ))
+        print(f"Шард {index}: http://{host}:{base_port + index}")
+
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
 if __name__ == "__main__":
-    uvicorn.run("server.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Запуск игрового сервера')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help='количество процессов-шардов')
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_shards(args.host, args.port, args.workers)
+    else:
+        uvicorn.run("server.main:app", host=args.host, port=args.port, reload=True)
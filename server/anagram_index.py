@@ -0,0 +1,148 @@
+import threading
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional
+
+# 33 буквы русского алфавита: у каждой свой слот в векторе количества букв
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+_LETTER_INDEX = {char: i for i, char in enumerate(ALPHABET)}
+
+
+def letter_counts(word: str) -> Optional[bytes]:
+    """
+    Вектор количества каждой буквы (33 слота). None, если в слове есть символы вне алфавита
+    или какая-то буква встречается больше 255 раз.
+    """
+    counts = bytearray(len(ALPHABET))
+    for char in word:
+        index = _LETTER_INDEX.get(char)
+        if index is None or counts[index] == 255:
+            return None
+        counts[index] += 1
+    return bytes(counts)
+
+
+def letter_mask(counts: bytes) -> int:
+    """Битовая маска букв, которые есть в слове."""
+    mask = 0
+    for i, count in enumerate(counts):
+        if count:
+            mask |= 1 << i
+    return mask
+
+
+def counts_fit(counts: bytes, main_counts: bytes) -> bool:
+    for count, available in zip(counts, main_counts):
+        if count > available:
+            return False
+    return True
+
+
+def can_make_word(word: str, main_word: str) -> bool:
+    """Можно ли составить слово из букв основного слова с учетом количества букв."""
+    counts = letter_counts(word)
+    main_counts = letter_counts(main_word)
+    if counts is not None and main_counts is not None:
+        return counts_fit(counts, main_counts)
+
+    # Символы вне алфавита - обычный подсчет через Counter
+    main_counter = Counter(main_word)
+    return all(main_counter[char] >= count for char, count in Counter(word).items())
+
+
+class AnagramIndex:
+    """
+    Индекс слов словаря по количеству букв.
+
+    Слова сгруппированы по битовой маске входящих в них букв (для словаря .kdict группы
+    собраны заранее и читаются из файла, см. packed_dictionary.py); для основного слова
+    перебираются только группы, чьи буквы все есть в основном слове, и внутри них
+    сравниваются векторы количества букв. Результат (все слова, которые можно составить)
+    кэшируется по основному слову в виде неизменяемого словаря слово -> порядковый номер:
+    `in` работает как у множества, а номер позволяет хранить найденные игроком слова битовой маской.
+
+    solutions() можно вызывать из пула потоков (перебор занимает десятки миллисекунд на
+    больших словарях): кэш защищен блокировкой, сам перебор только читает группы.
+    """
+
+    def __init__(self, words: Iterable[str] = (), cache_size: int = 256):
+        # маска букв -> список (слово, вектор количества букв)
+        self._groups: Dict[int, List[tuple]] = {}
+        self._size = 0
+        self.cache_size = cache_size
+        self._solutions: "OrderedDict[str, Mapping[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Собранный словарь (.kdict) содержит готовый индекс: группы читаются из mmap,
+        # в памяти процесса остаются только слова, добавленные поверх файла
+        self._table = getattr(words, 'anagram_table', None)
+        if self._table is not None:
+            self._size = len(self._table)
+            words = list(words.added_words())
+
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> bool:
+        counts = letter_counts(word)
+        if counts is None:
+            return False
+        self._groups.setdefault(letter_mask(counts), []).append((word, counts))
+        self._size += 1
+        with self._lock:
+            self._solutions.clear()
+        return True
+
+    def __len__(self):
+        return self._size
+
+    def solutions(self, main_word: str) -> Mapping[str, int]:
+        """Все слова индекса, которые можно составить из букв основного слова (слово -> номер)."""
+        main_word = main_word.lower().strip()
+        cached = self.cached_solutions(main_word)
+        if cached is not None:
+            return cached
+
+        result = MappingProxyType({word: i for i, word in enumerate(self._find(main_word))})
+        with self._lock:
+            self._solutions[main_word] = result
+            if len(self._solutions) > self.cache_size:
+                self._solutions.popitem(last=False)
+        return result
+
+    def cached_solutions(self, main_word: str) -> Optional[Mapping[str, int]]:
+        """Решения из кэша без перебора; None, если для слова их еще не считали."""
+        main_word = main_word.lower().strip()
+        with self._lock:
+            cached = self._solutions.get(main_word)
+            if cached is not None:
+                self._solutions.move_to_end(main_word)
+            return cached
+
+    def count_solutions(self, main_word: str) -> int:
+        """Количество решений без сохранения в кэш (для массового подсчета по словарю)."""
+        main_word = main_word.lower().strip()
+        with self._lock:
+            cached = self._solutions.get(main_word)
+        if cached is not None:
+            return len(cached)
+        return len(self._find(main_word))
+
+    def _find(self, main_word: str) -> List[str]:
+        main_counts = letter_counts(main_word)
+        if main_counts is None:
+            return []
+
+        main_mask = letter_mask(main_counts)
+        found = []
+        if self._table is not None:
+            for position, counts in self._table.candidates(main_mask):
+                if counts_fit(counts, main_counts):
+                    found.append(self._table.word(position))
+        for mask, entries in self._groups.items():
+            if mask & ~main_mask:
+                continue
+            for word, counts in entries:
+                if counts_fit(counts, main_counts):
+                    found.append(word)
+        return found
@@ -0,0 +1,163 @@
+"""
+Сборка и выдача статики клиента с отпечатками содержимого.
+
+Сборка (python -m server.assets [client/static] [client/dist]):
+  - CSS и JS минифицируются (комментарии, отступы, пустые строки);
+  - ссылки /static/<путь> внутри CSS и JS заменяются на адреса собранных файлов;
+  - каждый файл записывается под именем с хэшем содержимого (style.<хэш>.css), текстовые
+    файлы - также заранее сжатыми (.gz и .br, если установлен brotli);
+  - manifest.json сопоставляет исходный путь (css/style.css) собранному.
+
+Во время работы AssetStore загружает собранные файлы в память и отдает их по адресу
+/assets/<файл> с Cache-Control immutable: имя меняется вместе с содержимым, поэтому
+браузер не перепроверяет файл. Если сборки нет, url() возвращает исходные адреса /static.
+"""
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from typing import Dict, Optional
+
+from .http_cache import CachedBody, compress_variants, content_hash
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+ASSETS_PREFIX = '/assets/'
+STATIC_PREFIX = '/static/'
+
+# Файлы, которые имеет смысл сжимать (изображения PNG/JPEG уже сжаты)
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.html', '.txt'}
+# Файлы, в которых заменяются ссылки на другую статику
+REWRITABLE = {'.css', '.js'}
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def minify_css(text: str) -> str:
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    # Пробел перед ':' не убирается: в селекторе 'a :hover' он значим
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text: str) -> str:
+    """
+    Консервативная минификация без разбора JS: убираются отступы, пустые строки и
+    строки-комментарии '//'. Переводы строк сохраняются (автоматическая вставка ';').
+    Внутри многострочных шаблонных строк (`...`) комментарии не трогаются.
+    """
+    lines = []
+    in_template = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not in_template and (not stripped or stripped.startswith('//')):
+            continue
+        lines.append(stripped)
+        if (len(re.findall(r'(?<!\\)`', line)) % 2) == 1:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+def fingerprinted_name(path: str, digest: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest}{ext}'
+
+
+def build_assets(source_dir: str, output_dir: str) -> Dict[str, str]:
+    """Сборка статики из source_dir в output_dir; возвращает манифест (исходный путь -> собранный)."""
+    sources = []
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            sources.append(os.path.relpath(full_path, source_dir).replace(os.sep, '/'))
+    # Сначала файлы без ссылок: их адреса нужны для замены в CSS и JS
+    sources.sort(key=lambda path: (os.path.splitext(path)[1] in REWRITABLE, path))
+
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    manifest: Dict[str, str] = {}
+    total_source = total_built = 0
+    for path in sources:
+        with open(os.path.join(source_dir, path), 'rb') as f:
+            content = f.read()
+        total_source += len(content)
+        ext = os.path.splitext(path)[1].lower()
+
+        if ext in REWRITABLE:
+            text = content.decode('utf-8')
+            text = minify_css(text) if ext == '.css' else minify_js(text)
+            # Длинные пути первыми, чтобы /static/img/a.png не заменился внутри /static/img/a.png.bak
+            for original in sorted(manifest, key=len, reverse=True):
+                text = text.replace(STATIC_PREFIX + original, ASSETS_PREFIX + manifest[original])
+            content = text.encode('utf-8')
+
+        built = fingerprinted_name(path, content_hash(content, 12))
+        manifest[path] = built
+        target = os.path.join(output_dir, built)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        if ext in COMPRESSIBLE:
+            for encoding, data in compress_variants(content).items():
+                if len(data) < len(content):
+                    with open(target + ENCODING_SUFFIXES[encoding], 'wb') as f:
+                        f.write(data)
+        total_built += len(content)
+        print(f'{path} -> {built}')
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f'Файлов: {len(manifest)}, {total_source} -> {total_built} байт (без сжатия)')
+    return manifest
+
+
+class AssetStore:
+    def __init__(self, directory: Optional[str]):
+        # исходный путь -> собранный
+        self.manifest: Dict[str, str] = {}
+        # собранный путь -> тело в памяти с заранее сжатыми вариантами
+        self.files: Dict[str, CachedBody] = {}
+        if directory:
+            self._load(directory)
+
+    def _load(self, directory: str):
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            logger.info('assets_not_built', directory=directory)
+            return
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        for built in manifest.values():
+            path = os.path.join(directory, built)
+            with open(path, 'rb') as f:
+                content = f.read()
+            encoded = {}
+            for encoding, suffix in ENCODING_SUFFIXES.items():
+                if os.path.exists(path + suffix):
+                    with open(path + suffix, 'rb') as f:
+                        encoded[encoding] = f.read()
+            media_type = mimetypes.guess_type(built)[0] or 'application/octet-stream'
+            if media_type.startswith('text/') or media_type == 'application/javascript':
+                media_type += '; charset=utf-8'
+            self.files[built] = CachedBody(content, media_type, encoded=encoded)
+        self.manifest = manifest
+        logger.info('assets_loaded', files=len(self.files))
+
+    def url(self, path: str) -> str:
+        """Адрес файла статики: собранный с отпечатком или исходный /static, если сборки нет."""
+        built = self.manifest.get(path)
+        return ASSETS_PREFIX + built if built else STATIC_PREFIX + path
+
+    def get(self, built: str) -> Optional[CachedBody]:
+        return self.files.get(built)
+
+
+if __name__ == "__main__":
+    build_assets(sys.argv[1] if len(sys.argv) > 1 else 'client/static',
+                 sys.argv[2] if len(sys.argv) > 2 else 'client/dist')
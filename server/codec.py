@@ -0,0 +1,86 @@
+"""
+Кодеки сообщений WebSocket.
+
+  - JsonCodec: текстовые кадры JSON; orjson, если установлен, иначе стандартный json.
+  - MsgpackCodec: бинарные кадры MessagePack (нужен пакет msgpack).
+
+Клиент выбирает MessagePack подпротоколом WebSocket 'ksis.msgpack' или параметром
+?codec=msgpack. Входящие кадры разбираются по типу кадра: текст - JSON, бинарный - MessagePack,
+поэтому клиент в режиме MessagePack может присылать и JSON.
+"""
+import json
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack необязателен: без него доступен только JSON
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = 'ksis.msgpack'
+
+Frame = Union[str, bytes]
+
+
+class JsonCodec:
+    name = 'json'
+    binary = False
+    subprotocol = None
+
+    @staticmethod
+    def encode(data) -> str:
+        # Тот же формат, что и у WebSocket.send_json: без пробелов, кириллица без \u-экранирования
+        if orjson is not None:
+            return orjson.dumps(data).decode('utf-8')
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def decode(frame: Frame):
+        if orjson is not None:
+            return orjson.loads(frame)
+        return json.loads(frame)
+
+
+class MsgpackCodec:
+    name = 'msgpack'
+    binary = True
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    @staticmethod
+    def encode(data) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    @staticmethod
+    def decode(frame: Frame):
+        return msgpack.unpackb(frame, raw=False)
+
+
+JSON = JsonCodec()
+MSGPACK = MsgpackCodec() if msgpack is not None else None
+
+
+def negotiate(subprotocols, codec_flag: Optional[str] = None):
+    """
+    Выбор кодека соединения по подпротоколам клиента и параметру ?codec=.
+    Возвращает (кодек, подпротокол для accept или None).
+    """
+    if MSGPACK is not None:
+        if MSGPACK_SUBPROTOCOL in (subprotocols or ()):
+            return MSGPACK, MSGPACK_SUBPROTOCOL
+        if codec_flag == MSGPACK.name:
+            return MSGPACK, None
+    return JSON, None
+
+
+def decode_frame(message: dict):
+    """Разбор входящего ASGI-сообщения websocket.receive: текст - JSON, байты - MessagePack."""
+    text = message.get('text')
+    if text is not None:
+        return JSON.decode(text)
+    if MSGPACK is None:
+        raise ValueError('Бинарные кадры не поддерживаются: пакет msgpack не установлен')
+    return MSGPACK.decode(message.get('bytes') or b'')
@@ -0,0 +1,128 @@
+import os
+
+
+# Настройки сервера читаются из переменных окружения, чтобы их можно было
+# менять без правки кода (например, при нагрузочном тестировании).
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Проверка слов
+# Обращаться ли к Wiktionary, если слова нет в локальном словаре
+WORD_REMOTE_FALLBACK = _env_bool('WORD_REMOTE_FALLBACK', True)
+# Считать слово валидным, если удаленная проверка упала с ошибкой. По умолчанию выключено:
+# при недоступном Wiktionary слово отклоняется (иначе принималось бы любое сочетание букв)
+WORD_REMOTE_FAIL_OPEN = _env_bool('WORD_REMOTE_FAIL_OPEN', False)
+
+# Кэш вердиктов проверки слов
+WORD_CACHE_SIZE = _env_int('WORD_CACHE_SIZE', 50000)
+# Срок жизни положительного / отрицательного вердикта, секунд
+WORD_CACHE_POSITIVE_TTL = _env_float('WORD_CACHE_POSITIVE_TTL', 86400.0)
+WORD_CACHE_NEGATIVE_TTL = _env_float('WORD_CACHE_NEGATIVE_TTL', 3600.0)
+
+# Клиент Wiktionary
+# Шаблон адреса API; {lang} заменяется на код языка (можно указать локальный stub-сервер)
+WIKTIONARY_API_URL = os.environ.get('WIKTIONARY_API_URL', 'https://{lang}.wiktionary.org/w/api.php')
+WIKTIONARY_TIMEOUT = _env_float('WIKTIONARY_TIMEOUT', 10.0)
+WIKTIONARY_LIMIT_PER_HOST = _env_int('WIKTIONARY_LIMIT_PER_HOST', 20)
+WIKTIONARY_KEEPALIVE = _env_float('WIKTIONARY_KEEPALIVE', 30.0)
+WIKTIONARY_USER_AGENT = os.environ.get('WIKTIONARY_USER_AGENT', 'ksis-word-game/1.0 (word validation)')
+
+# Максимум слов в одном пакетном запросе (POST /check_words, SUBMIT_WORDS)
+BATCH_MAX_WORDS = _env_int('BATCH_MAX_WORDS', 100)
+
+# Ограничение нагрузки (token bucket: запросов в секунду и запас; 0 - без ограничения)
+# Сообщения SUBMIT_WORD / SUBMIT_WORDS от одного игрока
+RATE_LIMIT_PLAYER_RATE = _env_float('RATE_LIMIT_PLAYER_RATE', 5.0)
+RATE_LIMIT_PLAYER_BURST = _env_float('RATE_LIMIT_PLAYER_BURST', 10.0)
+# Отправка слов и /check_word, /check_words с одного IP (общий лимит для WebSocket и HTTP)
+RATE_LIMIT_IP_RATE = _env_float('RATE_LIMIT_IP_RATE', 20.0)
+RATE_LIMIT_IP_BURST = _env_float('RATE_LIMIT_IP_BURST', 40.0)
+# Сколько ключей (игроков, IP) помнить; давно не обращавшиеся вытесняются
+RATE_LIMIT_MAX_KEYS = _env_int('RATE_LIMIT_MAX_KEYS', 100000)
+# Максимум одновременных обращений к Wiktionary; сверх него проверка сразу отклоняется (0 - без предела)
+REMOTE_LOOKUP_MAX_INFLIGHT = _env_int('REMOTE_LOOKUP_MAX_INFLIGHT', 50)
+
+# Выбор основного слова: минимум слов словаря, которые можно из него составить (0 - без фильтра)
+MAIN_WORD_MIN_SUBWORDS = _env_int('MAIN_WORD_MIN_SUBWORDS', 0)
+
+# Шардирование комнат по процессам (run.py --workers N задает эти переменные каждому процессу)
+SHARD_INDEX = _env_int('SHARD_INDEX', 0)
+SHARD_COUNT = _env_int('SHARD_COUNT', 1)
+# Порт шарда i = SHARD_BASE_PORT + i
+SHARD_BASE_PORT = _env_int('SHARD_BASE_PORT', 8000)
+# Каталог Unix-сокетов шины между шардами
+SHARD_SOCKET_DIR = os.environ.get('SHARD_SOCKET_DIR', '/tmp')
+# Публичные адреса WebSocket шардов через запятую (если шарды стоят за прокси)
+SHARD_PUBLIC_URLS = [url.strip() for url in os.environ.get('SHARD_PUBLIC_URLS', '').split(',') if url.strip()]
+
+# Исходящие очереди соединений
+# Максимум неотправленных кадров на соединение
+OUTBOUND_QUEUE_SIZE = _env_int('OUTBOUND_QUEUE_SIZE', 64)
+# Таймаут отправки одного кадра, секунд (дольше - клиент отключается)
+OUTBOUND_SEND_TIMEOUT = _env_float('OUTBOUND_SEND_TIMEOUT', 5.0)
+# Сколько секунд очередь может оставаться полной, прежде чем клиент будет отключен
+OUTBOUND_SLOW_TIMEOUT = _env_float('OUTBOUND_SLOW_TIMEOUT', 10.0)
+
+# Восстановление сессии: сколько секунд отключившийся игрок сохраняет место и очки в комнате
+# (переподключение с resume-токеном в этот срок продолжает игру; 0 - выход из комнаты сразу)
+RECONNECT_GRACE = _env_float('RECONNECT_GRACE', 30.0)
+
+# Жизненный цикл комнат и соединений (0 - проверка отключена / без предела)
+# Сколько секунд хранить завершенную комнату (итоги) до удаления
+ROOM_FINISHED_RETENTION = _env_float('ROOM_FINISHED_RETENTION', 300.0)
+# Через сколько секунд без активности закрывать комнату в ожидании игроков
+ROOM_WAITING_IDLE_TIMEOUT = _env_float('ROOM_WAITING_IDLE_TIMEOUT', 900.0)
+# Период PING соединениям и время без сообщений от клиента, после которого соединение закрывается
+HEARTBEAT_INTERVAL = _env_float('HEARTBEAT_INTERVAL', 25.0)
+HEARTBEAT_TIMEOUT = _env_float('HEARTBEAT_TIMEOUT', 60.0)
+# Пределы числа комнат и WebSocket соединений на процесс
+MAX_ROOMS = _env_int('MAX_ROOMS', 10000)
+MAX_CONNECTIONS = _env_int('MAX_CONNECTIONS', 10000)
+
+# Результаты игр и лидерборды
+# Файл SQLite (пустая строка - результаты не сохраняются)
+RESULTS_DB_PATH = os.environ.get('RESULTS_DB_PATH', 'data/results.sqlite3')
+# Отложенная запись: максимум игр в одной транзакции и сколько секунд копить пакет
+RESULTS_BATCH_SIZE = _env_int('RESULTS_BATCH_SIZE', 100)
+RESULTS_FLUSH_INTERVAL = _env_float('RESULTS_FLUSH_INTERVAL', 1.0)
+# Максимум игр в очереди записи (сверх него результаты отбрасываются)
+RESULTS_QUEUE_SIZE = _env_int('RESULTS_QUEUE_SIZE', 10000)
+# Размер лидербордов в памяти (top-K)
+LEADERBOARD_SIZE = _env_int('LEADERBOARD_SIZE', 100)
+# Период перечитывания лидербордов из базы, секунд: в ней и игры других шардов (0 - не перечитывать)
+LEADERBOARD_REFRESH_INTERVAL = _env_float('LEADERBOARD_REFRESH_INTERVAL', 5.0)
+
+# Статика клиента
+# Каталог собранной статики (python -m server.assets); без сборки файлы отдаются из client/static
+ASSETS_DIR = os.environ.get('ASSETS_DIR', 'client/dist')
+
+# Дельта-обновления GAME_STATE: сколько последних дельт хранить для догоняющих клиентов
+STATE_DELTA_LOG_SIZE = _env_int('STATE_DELTA_LOG_SIZE', 64)
+
+# Наблюдаемость
+# Уровень журнала (DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Ограничение частоты записей одного события: записей в секунду и запас
+LOG_RATE_PER_EVENT = _env_float('LOG_RATE_PER_EVENT', 1.0)
+LOG_BURST = _env_float('LOG_BURST', 10.0)
+# Период замера задержки event loop, секунд (0 - не замерять)
+LOOP_LAG_PROBE_INTERVAL = _env_float('LOOP_LAG_PROBE_INTERVAL', 0.5)
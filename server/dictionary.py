@@ -1,39 +1,160 @@
 import os
+import random
+from typing import Callable, Dict, Optional
 
+from .anagram_index import AnagramIndex, can_make_word
+from .packed_dictionary import PackedWordSet
 
 
 class Dictionary:
     def __init__(self, dictionary_file=None):
         self.words = set()
+        # Индекс по длине: длина -> кортеж слов этой длины (строится при загрузке)
+        self._by_length: Optional[Dict[int, tuple]] = None
+        # Отфильтрованные по качеству индексы: минимум подслов -> {длина -> кортеж слов}
+        self._quality_by_length: Dict[int, Dict[int, tuple]] = {}
+        # Функция подсчета подслов для фильтра качества (по умолчанию - собственный AnagramIndex)
+        self.subword_counter: Optional[Callable[[str], int]] = None
 
         if dictionary_file:
             self.load_from_file(dictionary_file)
         else:
             # Сначала пробуем загрузить расширенный словарь
-            extended_path = os.path.join(os.path.dirname(__file__), 'resources', 'extended_russian_words.txt')
-            if os.path.exists(extended_path):
+            extended_path = self._resolve_path('extended_russian_words.txt')
+            if extended_path:
                 print("Загружаем расширенный словарь...")
                 self.load_from_file(extended_path)
             else:
                 # Если расширенного нет, загружаем базовый
-                default_path = os.path.join(os.path.dirname(__file__), 'resources', 'russian_words.txt')
-                if os.path.exists(default_path):
+                default_path = self._resolve_path('russian_words.txt')
+                if default_path:
                     self.load_from_file(default_path)
 
+    @staticmethod
+    def _resolve_path(file_name):
+        """
+        Путь к словарю в resources: собранный .kdict, если он есть и не старше текстового файла,
+        иначе сам текстовый файл. None, если нет ни того, ни другого.
+        """
+        text_path = os.path.join(os.path.dirname(__file__), 'resources', file_name)
+        packed_path = os.path.splitext(text_path)[0] + '.kdict'
+        if os.path.exists(packed_path) and (
+                not os.path.exists(text_path) or os.path.getmtime(packed_path) >= os.path.getmtime(text_path)):
+            return packed_path
+        if os.path.exists(text_path):
+            return text_path
+        return None
+
     def load_from_file(self, file_path):
+        if file_path.endswith('.kdict'):
+            return self.load_packed(file_path)
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 for line in file:
                     word = line.strip().lower()
                     if len(word) >= 3:  # Отфильтровываем слишком короткие слова
                         self.words.add(word)
+            self._build_length_index()
             return True
         except Exception as e:
             print(f"Ошибка загрузки словаря: {e}")
             return False
 
+    def load_packed(self, file_path):
+        """
+        Открывает собранный словарь .kdict через mmap (см. packed_dictionary.py).
+        Файл не читается целиком: время запуска не зависит от размера словаря.
+        """
+        try:
+            packed = PackedWordSet(file_path)
+        except Exception as e:
+            print(f"Ошибка загрузки словаря: {e}")
+            return False
+
+        # Уже загруженные слова сохраняем поверх упакованного словаря
+        for word in self.words:
+            packed.add(word)
+        self.words = packed
+        self._by_length = None
+        self._quality_by_length = {}
+        return True
+
     def add_word(self, word):
         self.words.add(word.lower())
+        # Индексы перестроятся при следующем выборе слова
+        self._by_length = None
+        self._quality_by_length = {}
+
+    def _build_length_index(self):
+        if isinstance(self.words, PackedWordSet):
+            # В упакованном словаре слова уже лежат по длинам: берем корзины без копирования
+            buckets = self.words.by_length()
+            extra = {}
+            for word in self.words.added_words():
+                extra.setdefault(len(word), []).append(word)
+            for length, words in extra.items():
+                buckets[length] = tuple(buckets.get(length, ())) + tuple(sorted(words))
+            self._by_length = buckets
+            self._quality_by_length = {}
+            return
+
+        buckets = {}
+        for word in self.words:
+            buckets.setdefault(len(word), []).append(word)
+        # Сортируем, чтобы индекс не зависел от порядка обхода множества
+        self._by_length = {length: tuple(sorted(words)) for length, words in buckets.items()}
+        self._quality_by_length = {}
+
+    def _length_buckets(self, min_subwords: int = 0) -> Dict[int, tuple]:
+        if self._by_length is None:
+            self._build_length_index()
+        if min_subwords <= 0:
+            return self._by_length
+
+        quality = self._quality_by_length.get(min_subwords)
+        if quality is None:
+            quality = {}
+            self._quality_by_length[min_subwords] = quality
+        return quality
+
+    def _filter_quality(self, length: int, min_subwords: int) -> tuple:
+        if self.subword_counter is None:
+            self.subword_counter = AnagramIndex(self.words).count_solutions
+        return tuple(word for word in self._by_length.get(length, ())
+                     if self.subword_counter(word) >= min_subwords)
+
+    def _quality_bucket(self, length: int, min_subwords: int) -> tuple:
+        """Слова заданной длины, из которых можно составить не менее min_subwords слов словаря."""
+        quality = self._length_buckets(min_subwords)
+        bucket = quality.get(length)
+        if bucket is None:
+            bucket = self._filter_quality(length, min_subwords)
+            quality[length] = bucket
+        return bucket
+
+    def build_quality_index(self, min_subwords: int, min_length: int, max_length: int):
+        """
+        Заранее строит отфильтрованные корзины для длин min_length..max_length (перебор всей
+        корзины - долгий). Сервер вызывает его при старте в пуле потоков, а до готовности
+        выбирает слова без фильтра (quality_ready).
+        """
+        buckets = self._length_buckets()
+        built = {length: self._filter_quality(length, min_subwords)
+                 for length in range(min_length, max_length + 1) if length in buckets}
+        quality = dict(self._quality_by_length.get(min_subwords, {}))
+        quality.update(built)
+        # Готовый индекс подставляется целиком: читатели не видят частично заполненный
+        self._quality_by_length[min_subwords] = quality
+
+    def quality_ready(self, min_subwords: int, min_length: int, max_length: int) -> bool:
+        """Построены ли отфильтрованные корзины для всех длин диапазона."""
+        buckets = self._length_buckets()
+        quality = self._quality_by_length.get(min_subwords, {})
+        return all(length in quality for length in range(min_length, max_length + 1) if length in buckets)
+
+    def max_word_length(self) -> int:
+        """Длина самого длинного слова словаря (0 - словарь пуст)."""
+        return max(self._length_buckets(), default=0)
 
     def contains(self, word):
         return word.lower() in self.words
@@ -41,24 +162,54 @@ class Dictionary:
     def __contains__(self, word):
         return self.contains(word)
 
+    def has_prefix(self, prefix):
+        """Есть ли в словаре слово, начинающееся с prefix."""
+        prefix = prefix.lower()
+        if isinstance(self.words, PackedWordSet):
+            return self.words.has_prefix(prefix)
+        return any(word.startswith(prefix) for word in self.words)
+
     def filter_words_by_length(self, min_length=3, max_length=None):
-        if max_length is None:
-            return [word for word in self.words if len(word) >= min_length]
-        else:
-            return [word for word in self.words if min_length <= len(word) <= max_length]
+        buckets = self._length_buckets()
+        return [word for length, words in buckets.items()
+                if length >= min_length and (max_length is None or length <= max_length)
+                for word in words]
 
-    def generate_word(self, min_length=3, max_length=None):
+    def generate_word(self, min_length=3, max_length=None, min_subwords=0):
         """Алиас для get_random_word для обратной совместимости."""
-        return self.get_random_word(min_length, max_length)
-
-    def get_random_word(self, min_length=3, max_length=None):
-        import random
-        suitable_words = self.filter_words_by_length(min_length, max_length)
-
-        if not suitable_words:
+        return self.get_random_word(min_length, max_length, min_subwords)
+
+    def get_random_word(self, min_length=3, max_length=None, min_subwords=0):
+        """
+        Случайное слово длиной от min_length до max_length без копирования словаря:
+        выбирается случайный номер среди слов подходящих длин и берется из корзины по длине.
+        min_subwords - фильтр качества: из слова можно составить хотя бы столько слов словаря.
+        """
+        buckets = self._length_buckets()
+        if max_length is None:
+            max_length = max(buckets, default=0)
+
+        def bucket(length):
+            if length not in buckets:
+                return ()
+            if min_subwords > 0:
+                return self._quality_bucket(length, min_subwords)
+            return buckets[length]
+
+        # Два прохода по диапазону длин (их единицы): считаем общее количество, затем выбираем
+        total = 0
+        for length in range(min_length, max_length + 1):
+            total += len(bucket(length))
+        if not total:
             return None
 
-        return random.choice(suitable_words)
+        index = random.randrange(total)
+        for length in range(min_length, max_length + 1):
+            words = bucket(length)
+            if index < len(words):
+                return words[index]
+            index -= len(words)
+        return None
 
     def size(self):
         return len(self.words)
@@ -75,15 +226,8 @@ class Dictionary:
             return False
 
         # Если указано основное слово, проверяем возможность составления
-        if main_word:
-            main_word = main_word.lower()
-            main_word_chars = list(main_word)
-
-            for char in word:
-                if char in main_word_chars:
-                    main_word_chars.remove(char)
-                else:
-                    return False
+        if main_word and not can_make_word(word, main_word.lower()):
+            return False
 
         return True
 
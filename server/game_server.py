@@ -1,28 +1,56 @@
-import json
-import ssl
 import time
 import random
-import uuid
 import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 
-import aiohttp
-import certifi
-import requests
-from typing import Dict, Set, Optional
+from typing import Dict, Iterable, List, Set, Optional
 from fastapi import WebSocket, WebSocketDisconnect
-from collections import Counter
 
 from fastapi.responses import JSONResponse
 
+from . import config
+from .anagram_index import AnagramIndex, can_make_word
+from .codec import JSON, Frame
 from .dictionary import Dictionary
+from .levels import LevelPack
+from .lifecycle import LifecycleManager
+from .log import get_logger
+from .metrics import LoopLagProbe, MetricsRegistry
+from .models import Player, Room
+from .outbound import OutboundQueue, OutboundStats
+from .ratelimit import ConcurrencyLimit, RateLimiter
+from .results_store import ResultsStore
+from .scheduler import DeadlineScheduler
+from .sharding import BusError, UnixSocketBus, new_room_id, shard_for_room
+from .verdict_cache import VerdictCache
+from .wiktionary import WiktionaryClient
+from .word_validator import RemoteLookupBusy, WordValidator
+
+logger = get_logger(__name__)
+
+# Типы сообщений клиента (метка метрик; остальные считаются как 'unknown')
+MESSAGE_TYPES = frozenset(('JOIN', 'CREATE_ROOM', 'JOIN_ROOM', 'SUBMIT_WORD', 'SUBMIT_WORDS',
+                           'RESYNC', 'GAME_FINISHED', 'PLAYER_EXIT', 'PONG'))
+# Сообщения, на которые действуют лимиты частоты (могут вызывать проверку по Wiktionary)
+THROTTLED_MESSAGES = frozenset(('SUBMIT_WORD', 'SUBMIT_WORDS'))
+
+THROTTLED_MESSAGE = 'Слишком много слов подряд, подождите немного'
+BUSY_MESSAGE = 'Сервер проверки слов перегружен, попробуйте еще раз'
+
+# Длина основного слова: от MAIN_WORD_LENGTH до MAIN_WORD_LENGTH + 4 букв
+MAIN_WORD_LENGTH = 10
 
 
 class GameServer:
     def __init__(self):
         # комнаты с игроками
-        self.rooms: Dict[str, dict] = {}
+        self.rooms: Dict[str, Room] = {}
         # активные соединения пользователей
         self.connections: Dict[str, dict] = {}
+        # отключившиеся игроки, чье место в комнате ждет переподключения:
+        # id -> {'resume_token', 'room_id', 'username'} (срок - задача ('session_expire', id))
+        self.detached: Dict[str, dict] = {}
 
         self.dictionary = Dictionary()
 
@@ -32,23 +60,350 @@ class GameServer:
             create_sample_dictionary()
             self.dictionary = Dictionary()
 
-        # Запускаем фоновую задачу проверки истечения времени игр
-        asyncio.create_task(self.check_expired_games())
+        # Индекс слов по количеству букв: все решения для основного слова считаются один раз
+        self.anagram_index = AnagramIndex(self.dictionary.words)
+        # Фильтр качества основного слова использует тот же индекс
+        self.dictionary.subword_counter = self.anagram_index.count_solutions
+        # Перебор решений для нового основного слова - вне event loop (один поток: не конкурируем за GIL)
+        self._anagram_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='anagram')
+        # Уровни и практика с готовыми множествами решений (GET /levels)
+        self.level_pack = LevelPack(self.anagram_index, config.WORD_REMOTE_FALLBACK)
+
+        # Общий кэш вердиктов (положительных и отрицательных) для всех комнат
+        self.verdict_cache = VerdictCache(
+            max_size=config.WORD_CACHE_SIZE,
+            positive_ttl=config.WORD_CACHE_POSITIVE_TTL,
+            negative_ttl=config.WORD_CACHE_NEGATIVE_TTL
+        )
+
+        # Метрики для GET /metrics
+        self.metrics = MetricsRegistry()
+        self.message_seconds = self.metrics.histogram(
+            'ksis_message_handle_seconds', 'Время обработки сообщения клиента', ['type'])
+        self.validation_seconds = self.metrics.histogram(
+            'ksis_word_validation_seconds', 'Время проверки слова по источнику вердикта', ['source'])
+        self.fanout_seconds = self.metrics.histogram(
+            'ksis_broadcast_seconds', 'Время постановки рассылки в очереди получателей', ['type'])
+        self.fanout_frames = self.metrics.counter(
+            'ksis_broadcast_frames_total', 'Кадров поставлено в очереди рассылкой', ['type'])
+        self.throttled = self.metrics.counter(
+            'ksis_throttled_total', 'Запросов отклонено лимитом частоты', ['scope', 'source'])
+        self.session_resumes = self.metrics.counter(
+            'ksis_session_resume_total', 'Переподключения по resume-токену и истекшие сессии', ['result'])
+        self.loop_lag = LoopLagProbe(
+            self.metrics.histogram('ksis_event_loop_lag_seconds', 'Задержка пробуждения event loop'),
+            interval=config.LOOP_LAG_PROBE_INTERVAL)
+
+        # Лимиты частоты: на игрока (WebSocket) и на IP (WebSocket и HTTP вместе)
+        self.player_limiter = RateLimiter(config.RATE_LIMIT_PLAYER_RATE, config.RATE_LIMIT_PLAYER_BURST,
+                                          config.RATE_LIMIT_MAX_KEYS)
+        self.ip_limiter = RateLimiter(config.RATE_LIMIT_IP_RATE, config.RATE_LIMIT_IP_BURST,
+                                      config.RATE_LIMIT_MAX_KEYS)
+        # Предел одновременных обращений к Wiktionary: сверх него проверка отклоняется, а не ждет
+        self.remote_limit = ConcurrencyLimit(config.REMOTE_LOOKUP_MAX_INFLIGHT)
+
+        # Общий HTTP клиент Wiktionary (сессия открывается в start())
+        self.wiktionary = WiktionaryClient()
+
+        # Проверка слов: локальный словарь, затем (опционально) Wiktionary
+        self.word_validator = WordValidator(
+            self.dictionary,
+            remote_lookup=self.check_word_in_wiktionary_async if config.WORD_REMOTE_FALLBACK else None,
+            fail_open=config.WORD_REMOTE_FAIL_OPEN,
+            cache=self.verdict_cache,
+            remote_batch_lookup=self.check_words_in_wiktionary_async if config.WORD_REMOTE_FALLBACK else None,
+            observer=lambda source, seconds: self.validation_seconds.observe(seconds, source),
+            remote_limit=self.remote_limit
+        )
+
+        # Шардирование: этот процесс владеет комнатами, у которых shard_for_room(id) == shard_index
+        self.shard_index = config.SHARD_INDEX
+        self.shard_count = config.SHARD_COUNT
+        self.bus = None
+        if self.shard_count > 1:
+            self.bus = UnixSocketBus(self.shard_index, config.SHARD_SOCKET_DIR)
+
+        # Счетчики исходящих очередей (отправлено, отброшено, объединено, отключено)
+        self.outbound_stats = OutboundStats()
+
+        # Таймеры: окончание игр и другие отложенные задачи
+        self.scheduler = DeadlineScheduler()
+
+        # Удаление завершенных и брошенных комнат, heartbeat соединений, пределы числа комнат и соединений
+        self.lifecycle = LifecycleManager(
+            self, self.scheduler, self.metrics,
+            finished_retention=config.ROOM_FINISHED_RETENTION,
+            waiting_idle_timeout=config.ROOM_WAITING_IDLE_TIMEOUT,
+            heartbeat_interval=config.HEARTBEAT_INTERVAL,
+            heartbeat_timeout=config.HEARTBEAT_TIMEOUT,
+            max_rooms=config.MAX_ROOMS,
+            max_connections=config.MAX_CONNECTIONS
+        )
+
+        # Результаты игр и лидерборды: запись в SQLite в фоне, лидерборды в памяти
+        self.results: Optional[ResultsStore] = None
+        if config.RESULTS_DB_PATH:
+            self.results = ResultsStore(
+                config.RESULTS_DB_PATH,
+                batch_size=config.RESULTS_BATCH_SIZE,
+                flush_interval=config.RESULTS_FLUSH_INTERVAL,
+                queue_size=config.RESULTS_QUEUE_SIZE,
+                leaderboard_size=config.LEADERBOARD_SIZE,
+                refresh_interval=config.LEADERBOARD_REFRESH_INTERVAL
+            )
+            results_seconds = self.metrics.histogram(
+                'ksis_results_batch_seconds', 'Время записи пакета результатов в базу')
+            self.results.observer = lambda games, seconds: results_seconds.observe(seconds)
+
+        self._background_tasks = []
+        self._register_gauges()
+
+    def _register_gauges(self):
+        """Метрики, которые считываются из состояния сервера в момент запроса /metrics."""
+        metrics = self.metrics
+        metrics.callback('ksis_rooms', 'Комнаты по статусу', self._rooms_by_status, labels=['status'])
+        metrics.callback('ksis_connections', 'Активные WebSocket соединения', lambda: len(self.connections))
+        metrics.callback('ksis_sessions_detached', 'Отключившиеся игроки, ожидающие переподключения',
+                         lambda: len(self.detached))
+        metrics.callback('ksis_event_loop_lag_last_seconds', 'Последний замер задержки event loop',
+                         lambda: self.loop_lag.last_lag)
+        metrics.callback('ksis_scheduled_jobs', 'Запланированные задачи (окончание игр и др.)',
+                         lambda: len(self.scheduler))
+        metrics.callback('ksis_word_cache_hit_ratio', 'Доля попаданий в кэш вердиктов',
+                         self.verdict_cache.hit_rate)
+        metrics.callback('ksis_word_cache_requests_total', 'Обращения к кэшу вердиктов', lambda: {
+            ('hit',): self.verdict_cache.hits, ('miss',): self.verdict_cache.misses
+        }, type='counter', labels=['result'])
+        metrics.callback('ksis_word_cache_size', 'Записей в кэше вердиктов', lambda: len(self.verdict_cache))
+        metrics.callback('ksis_word_remote_coalesced_total', 'Проверок, присоединившихся к идущему запросу',
+                         lambda: self.word_validator.coalesced, type='counter')
+        metrics.callback('ksis_word_remote_inflight', 'Выполняющиеся обращения к Wiktionary',
+                         lambda: self.remote_limit.active)
+        metrics.callback('ksis_word_remote_rejected_total', 'Проверок отклонено из-за предела обращений к Wiktionary',
+                         lambda: self.remote_limit.rejected, type='counter')
+        metrics.callback('ksis_rate_limit_keys', 'Отслеживаемые ключи лимитов частоты', lambda: {
+            ('player',): len(self.player_limiter), ('ip',): len(self.ip_limiter)
+        }, labels=['scope'])
+        metrics.callback('ksis_outbound_frames_total', 'Исходящие кадры по результату', lambda: {
+            (result,): value for result, value in self.outbound_stats.as_dict().items() if result != 'evicted'
+        }, type='counter', labels=['result'])
+        metrics.callback('ksis_outbound_evicted_total', 'Отключено медленных клиентов',
+                         lambda: self.outbound_stats.evicted, type='counter')
+
+        if self.results is not None:
+            results = self.results
+            metrics.callback('ksis_results_queue', 'Результатов игр в очереди на запись', lambda: len(results))
+            metrics.callback('ksis_results_games_total', 'Результаты игр по исходу записи', lambda: {
+                ('written',): results.written, ('dropped',): results.dropped, ('failed',): results.failed
+            }, type='counter', labels=['result'])
+
+    def _rooms_by_status(self) -> dict:
+        counts = {('waiting',): 0, ('playing',): 0, ('finished',): 0}
+        for room in self.rooms.values():
+            counts[(room.status,)] = counts.get((room.status,), 0) + 1
+        return counts
+
+    async def start(self):
+        """Запуск при старте приложения (lifespan): HTTP клиент, шина шардов и фоновые задачи."""
+        await self.wiktionary.start()
+        if self.bus is not None:
+            await self.bus.start(self.handle_bus_message)
+        # Планировщик завершает игры точно в срок (вместо ежесекундного обхода комнат)
+        self.scheduler.start()
+        self.lifecycle.start()
+        if config.MAIN_WORD_MIN_SUBWORDS > 0:
+            # Фильтр качества основного слова перебирает корзины словаря - строим его в пуле потоков
+            self._background_tasks.append(asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(
+                None, self.dictionary.build_quality_index, config.MAIN_WORD_MIN_SUBWORDS,
+                MAIN_WORD_LENGTH, MAIN_WORD_LENGTH + 4)))
+        if self.results is not None:
+            await self.results.start()
+        self.loop_lag.start()
+
+    async def close(self):
+        """Остановка при завершении приложения."""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks = []
+        await self.loop_lag.stop()
+        await self.scheduler.stop()
+        for connection in list(self.connections.values()):
+            await connection['outbox'].close()
+        if self.bus is not None:
+            await self.bus.close()
+        await self.wiktionary.close()
+        if self.results is not None:
+            # Дописываем результаты из очереди
+            await self.results.close()
+        self._anagram_executor.shutdown(wait=False)
+
+    async def connect(self, websocket: WebSocket, player_id: str, username: str = None,
+                      codec=JSON, subprotocol: Optional[str] = None,
+                      resume_token: Optional[str] = None, since_seq: Optional[int] = None) -> bool:
+        """
+        Регистрация соединения. False - соединение отклонено (достигнут предел числа
+        соединений): клиент получает ERROR, сокет закрывается с кодом 1013.
 
-    async def connect(self, websocket: WebSocket, player_id: str, username: str = None):
-        await websocket.accept()
+        Клиент получает SESSION с resume-токеном. Переподключение с этим токеном (после обрыва
+        или пока старое соединение еще не закрыто) возвращает игрока в его комнату с прежними
+        очками: досылаются пропущенные дельты после since_seq или снимок состояния.
+        """
+        # codec - формат исходящих кадров соединения (см. server/codec.py)
+        await websocket.accept(subprotocol=subprotocol)
+        if not self.lifecycle.admit_connection(player_id):
+            frame = codec.encode({'type': 'ERROR', 'message': 'Сервер переполнен, попробуйте позже'})
+            try:
+                await (websocket.send_bytes(frame) if isinstance(frame, bytes) else websocket.send_text(frame))
+                await websocket.close(code=1013)
+            except Exception:
+                pass
+            return False
         # Если username не передан в URL, используем значение по умолчанию
         default_username = f'Игрок {player_id[:8]}'
+
+        previous = self.connections.get(player_id)
+        session = previous if previous is not None else self.detached.get(player_id)
+        resumed = (session is not None and bool(resume_token)
+                   and secrets.compare_digest(session['resume_token'], resume_token))
+        if previous is not None:
+            # Обработчик старого сокета увидит, что соединение заменено (см. handle_disconnect)
+            del self.connections[player_id]
+            await previous['outbox'].close()
+        if resumed:
+            self.scheduler.cancel(('session_expire', player_id))
+            self.detached.pop(player_id, None)
+            self.session_resumes.inc('resumed')
+        elif session is not None:
+            # Тот же id без верного токена: прежняя сессия завершается, место в комнате освобождается
+            if resume_token:
+                self.session_resumes.inc('rejected')
+            self.detached.pop(player_id, None)
+            self.scheduler.cancel(('session_expire', player_id))
+            if session['room_id']:
+                await self.handle_player_exit(player_id, session['room_id'])
+
+        # Исходящие сообщения идут через очередь соединения и отдельную задачу-писатель
+        outbox = OutboundQueue(
+            websocket,
+            self.outbound_stats,
+            max_size=config.OUTBOUND_QUEUE_SIZE,
+            send_timeout=config.OUTBOUND_SEND_TIMEOUT,
+            slow_timeout=config.OUTBOUND_SLOW_TIMEOUT,
+            on_evict=lambda reason: logger.warning('slow_client_evicted', player=player_id, reason=reason)
+        )
+        outbox.start()
+
         self.connections[player_id] = {
             'ws': websocket,
+            'outbox': outbox,
+            'codec': codec,
             'username': username.strip() if username and username.strip() else default_username,
-            'room_id': None
+            'ip': websocket.client.host if websocket.client else None,
+            'room_id': None,
+            # Время последнего сообщения от клиента (heartbeat, см. server/lifecycle.py)
+            'last_seen': time.monotonic(),
+            'resume_token': session['resume_token'] if resumed else secrets.token_urlsafe(16)
         }
+        connection = self.connections[player_id]
+
+        room = None
+        if resumed:
+            connection['username'] = session['username']
+            room = self.rooms.get(session['room_id']) if session['room_id'] else None
+            if room is not None and room.get_player(player_id) is None:
+                room = None
+            connection['room_id'] = room.id if room is not None else None
+
+        await self.send_to_player(player_id, {
+            'type': 'SESSION',
+            'resumeToken': connection['resume_token'],
+            'resumed': resumed,
+            'roomId': connection['room_id'],
+            'username': connection['username']
+        })
+        if room is not None:
+            # Вместо пересборки комнаты - только то, что игрок пропустил
+            await self.resync_player(player_id, room.id, since_seq)
+            if room.status == 'finished':
+                await self.send_to_player(player_id, self._game_end_message(room))
+        return True
+
+    def admit(self, player_id: Optional[str], ip: Optional[str], source: str, cost: int = 1) -> float:
+        """
+        Проверка лимитов частоты для игрока и IP (source - ws или http, метка метрики).
+        cost - число слов в запросе. Токены списываются, только если допускают оба лимита.
+        0 - запрос допущен, иначе - через сколько секунд можно повторить.
+        """
+        now = time.monotonic()
+        limits = []
+        if player_id is not None:
+            limits.append(('player', self.player_limiter, player_id))
+        if ip:
+            limits.append(('ip', self.ip_limiter, ip))
+        for scope, limiter, key in limits:
+            retry_after = limiter.check(key, cost, now)
+            if retry_after:
+                self.throttled.inc(scope, source)
+                return retry_after
+        for _, limiter, key in limits:
+            limiter.acquire(key, cost, now)
+        return 0.0
+
+    @staticmethod
+    def request_cost(words) -> int:
+        """Стоимость пакета слов для лимитов частоты: по токену на слово (не больше BATCH_MAX_WORDS)."""
+        if not isinstance(words, list):
+            return 1
+        return max(1, min(len(words), config.BATCH_MAX_WORDS))
+
+    @staticmethod
+    def _rejected_word(word, message: str, **extra) -> dict:
+        return {
+            'type': 'WORD_RESULT',
+            'word': word,
+            'valid': False,
+            'score': 0,
+            'message': message,
+            **extra
+        }
+
+    async def _reject_throttled(self, player_id: str, data: dict, retry_after: float):
+        """Быстрый явный отказ на отправку слов сверх лимита (без постановки в очередь)."""
+        extra = {'throttled': True, 'retryAfter': round(retry_after, 2)}
+        if data.get('type') == 'SUBMIT_WORDS':
+            words = data.get('words')
+            words = words[:config.BATCH_MAX_WORDS] if isinstance(words, list) else []
+            results = []
+            for word in words:
+                result = self._rejected_word(word, THROTTLED_MESSAGE, **extra)
+                del result['type']
+                results.append(result)
+            await self.send_to_player(player_id, {'type': 'WORD_RESULTS', 'results': results})
+        else:
+            await self.send_to_player(player_id, self._rejected_word(data.get('word', ''), THROTTLED_MESSAGE, **extra))
 
     async def handle_client_message(self, player_id: str, data: dict):
         if player_id not in self.connections:
             return
         connection = self.connections[player_id]
+        connection['last_seen'] = time.monotonic()
+        started = time.perf_counter()
+        message_type = data.get('type')
+        if message_type in THROTTLED_MESSAGES:
+            cost = self.request_cost(data.get('words')) if message_type == 'SUBMIT_WORDS' else 1
+            retry_after = self.admit(player_id, connection['ip'], 'ws', cost)
+            if retry_after:
+                await self._reject_throttled(player_id, data, retry_after)
+                return
+        try:
+            await self._dispatch_message(player_id, data)
+        finally:
+            self.message_seconds.observe(time.perf_counter() - started,
+                                         message_type if message_type in MESSAGE_TYPES else 'unknown')
+
+    async def _dispatch_message(self, player_id: str, data: dict):
+        connection = self.connections[player_id]
         message_type = data.get('type')
 
         if message_type == 'JOIN':
@@ -58,11 +413,9 @@ class GameServer:
             connection['username'] = new_username
             # Обновляем username в комнате, если игрок уже в комнате
             if connection['room_id'] and connection['room_id'] in self.rooms:
-                room = self.rooms[connection['room_id']]
-                for player in room['players']:
-                    if player['id'] == player_id:
-                        player['username'] = new_username
-                        break
+                player = self.rooms[connection['room_id']].get_player(player_id)
+                if player is not None:
+                    player.username = new_username
                 await self.update_room_state(connection['room_id'])
             await self.send_to_player(player_id, {
                 'type': 'CONNECTED',
@@ -77,6 +430,14 @@ class GameServer:
         elif message_type == 'SUBMIT_WORD':
             # Добавлено - обработка отправки слова
             await self.process_word(player_id, data.get('word', ''), connection['room_id'])
+        elif message_type == 'SUBMIT_WORDS':
+            # Пакетная отправка слов
+            words = data.get('words')
+            if isinstance(words, list):
+                await self.process_words(player_id, words, connection['room_id'])
+        elif message_type == 'RESYNC':
+            # Клиент пропустил дельту: досылаем недостающие или полный снимок
+            await self.resync_player(player_id, connection['room_id'], data.get('seq'))
         elif message_type == 'GAME_FINISHED':
             await self.finish_game(data.get('roomId'))
         elif message_type == 'PLAYER_EXIT':  # Новый тип сообщения
@@ -87,63 +448,104 @@ class GameServer:
             return
 
         room = self.rooms[room_id]
-        player = next((p for p in room['players'] if p['id'] == player_id), None)
-
+        # Удаляем игрока из комнаты
+        player = room.remove_player(player_id)
         if not player:
             return
 
-        # Удаляем игрока из комнаты
-        room['players'] = [p for p in room['players'] if p['id'] != player_id]
-
         # Уведомляем оставшихся игроков о выходе
-        for other_player in room['players']:
-            await self.send_to_player(other_player['id'], {
-                'type': 'PLAYER_EXIT',
-                'playerId': player_id,
-                'username': player['username']
-            })
+        await self.broadcast_room(room, {
+            'type': 'PLAYER_EXIT',
+            'playerId': player_id,
+            'username': player.username
+        })
 
-        if not room['players']:
+        if not room.players:
             # Если в комнате не осталось игроков, удаляем комнату
-            del self.rooms[room_id]
+            self.remove_room(room_id)
         else:
-            if room['status'] == 'playing':
-                if len(room['players']) < 2:
+            if room.status == 'playing':
+                if len(room) < 2:
                     # Завершаем игру, если остался 1 игрок
                     await self.finish_game(room_id)
                 else:
                     # Возвращаем комнату в состояние ожидания
-                    room['status'] = 'waiting'
-                    room['startTime'] = None
-                    room['mainWord'] = self.generate_word(10)
-                    room['availableCells'] = 20
-                    room['timeLimit'] = 300
-                    for p in room['players']:
-                        p['score'] = 0
-                        p['userWords'] = []
+                    room.status = 'waiting'
+                    room.start_time = None
+                    self.scheduler.cancel(('game_end', room_id))
+                    room.available_cells = 20
+                    room.time_limit = 300
+                    room.reset_scores()
+                    self.lifecycle.room_waiting(room_id)
+                    main_word = self.generate_word()
+                    solutions = await self.find_solutions(main_word)
+                    # Пока считались решения, в комнату мог войти игрок и начать игру со старым словом
+                    if self.rooms.get(room_id) is room and room.status == 'waiting':
+                        self._set_main_word(room, main_word, solutions)
                     await self.update_room_state(room_id)
-            elif room['status'] == 'waiting':
+            elif room.status == 'waiting':
                 await self.update_room_state(room_id)
-    async def create_room(self, player_id: str):
-        room_id = str(uuid.uuid4())[:8]
-        connection = self.connections[player_id]
 
-        self.rooms[room_id] = {
-            'id': room_id,
-            'players': [
-                {
-                    'id': player_id,
-                    'username': connection['username'],
-                    'score': 0,
-                    'userWords': []
-                }
-            ],
-            'mainWord': self.generate_word(10),
-            'availableCells': 20,
-            'timeLimit': 300,  # 5 минут
-            'status': 'waiting',  # waiting / playing / finished
-            'created': time.time()
-        }
+    def owns_room(self, room_id: str) -> bool:
+        return shard_for_room(room_id, self.shard_count) == self.shard_index
+
+    def shard_address(self, shard: int) -> dict:
+        address = {'shard': shard, 'port': config.SHARD_BASE_PORT + shard}
+        if shard < len(config.SHARD_PUBLIC_URLS):
+            address['url'] = config.SHARD_PUBLIC_URLS[shard]
+        return address
+
+    async def redirect_to_shard(self, player_id: str, action: str, room_id: str):
+        """Отправляет клиента на шард-владелец комнаты: клиент переподключается и повторяет action."""
+        await self.send_to_player(player_id, {
+            'type': 'ROOM_REDIRECT',
+            'action': action,
+            'roomId': room_id,
+            **self.shard_address(shard_for_room(room_id, self.shard_count))
+        })
+
+    async def handle_bus_message(self, message: dict) -> dict:
+        """Запросы от других шардов."""
+        message_type = message.get('type')
+        if message_type == 'ROOM_EXISTS':
+            room = self.rooms.get(message.get('roomId'))
+            return {'exists': room is not None, 'status': room.status if room else None}
+        if message_type == 'STATS':
+            return {'shard': self.shard_index, 'rooms': len(self.rooms), 'connections': len(self.connections)}
+        return {'error': f'Неизвестный запрос: {message_type}'}
+
+    def new_owned_room_id(self) -> str:
+        """
+        Свободный id комнаты, принадлежащей этому шарду. Id случайный, поэтому подходящий
+        находится в среднем за shard_count попыток, и создателя не нужно перенаправлять.
+        """
+        while True:
+            room_id = new_room_id()
+            if self.owns_room(room_id) and room_id not in self.rooms:
+                return room_id
+
+    async def create_room(self, player_id: str):
+        if not self.lifecycle.admit_room():
+            await self.send_to_player(player_id, {
+                'type': 'ERROR',
+                'message': 'Слишком много комнат на сервере, попробуйте позже'
+            })
+            return
+        main_word = self.generate_word()
+        solutions = await self.find_solutions(main_word)
+        # Пока считались решения, игрок мог отключиться
+        connection = self.connections.get(player_id)
+        if connection is None:
+            return
+        # Комната создается на том шарде, к которому подключен создатель; перенаправление - только при входе.
+        # Id всегда генерирует сервер: предложенный клиентом не принимается
+        room_id = self.new_owned_room_id()
+
+        room = Room(room_id, config.STATE_DELTA_LOG_SIZE, available_cells=20, time_limit=300)  # 5 минут
+        room.add_player(player_id, connection['username'])
+        self._set_main_word(room, main_word, solutions)
+        self.rooms[room_id] = room
+        self.lifecycle.room_waiting(room_id)
         # обновление инфы о подключении
         connection['room_id'] = room_id
         # отправка инфы о комнате
@@ -154,8 +556,48 @@ class GameServer:
         # обновление состояния комнаты для всех игроков
         await self.update_room_state(room_id)
 
+    async def find_solutions(self, main_word: str):
+        """
+        Все слова словаря, которые можно составить из основного слова. Перебор словаря
+        (десятки миллисекунд на больших словарях) выполняется в отдельном потоке, чтобы
+        не задерживать остальные комнаты; повторные слова берутся из кэша индекса.
+        """
+        cached = self.anagram_index.cached_solutions(main_word)
+        if cached is not None:
+            return cached
+        return await asyncio.get_running_loop().run_in_executor(
+            self._anagram_executor, self.anagram_index.solutions, main_word)
+
+    def _set_main_word(self, room: Room, main_word: str, solutions):
+        """
+        Установка основного слова комнаты вместе с заранее вычисленным множеством
+        всех слов словаря, которые из него можно составить (find_solutions).
+        """
+        room.main_word = main_word
+        room.solutions = solutions
+        room.possible_words = len(room.solutions)
+        room.possible_score = sum(len(w) for w in room.solutions)
+
     async def join_room(self, player_id: str, room_id: str):
         # присоединение к существующей комнате
+        if room_id and room_id not in self.rooms and not self.owns_room(room_id):
+            # Комната живет на другом шарде: спрашиваем владельца через шину
+            try:
+                owner = await self.bus.request(shard_for_room(room_id, self.shard_count),
+                                               {'type': 'ROOM_EXISTS', 'roomId': room_id})
+            except BusError as e:
+                logger.warning('shard_request_failed', room=room_id, error=str(e))
+                owner = {'exists': False}
+            if owner.get('exists') and owner.get('status') == 'waiting':
+                await self.redirect_to_shard(player_id, 'JOIN_ROOM', room_id)
+                return
+            if owner.get('exists'):
+                await self.send_to_player(player_id, {
+                    'type': 'ERROR',
+                    'message': 'Игра уже началась'
+                })
+                return
+
         if not room_id or room_id not in self.rooms:
             await self.send_to_player(player_id, {
                 'type': 'ERROR',
@@ -164,19 +606,14 @@ class GameServer:
             return
         room = self.rooms[room_id]
         connection = self.connections[player_id]
-        if room['status'] != 'waiting':
+        if room.status != 'waiting':
             await self.send_to_player(player_id, {
                 'type': 'ERROR',
                 'message': 'Игра уже началась'
             })
             return
         # добавление игрока в комнату
-        room['players'].append({
-            'id': player_id,
-            'username': connection['username'],
-            'score': 0,
-            'userWords': []
-        })
+        room.add_player(player_id, connection['username'])
         # обновление инфы о подключении
         connection['room_id'] = room_id
         # отправка подтверждения
@@ -185,9 +622,10 @@ class GameServer:
             'roomId': room_id
         })
         # если в комнате 2 и более игроков, начинаем игру
-        if len(room['players']) >= 2:
+        if len(room) >= 2:
             await self.start_game(room_id)
         else:
+            self.lifecycle.room_waiting(room_id)
             # обновление состояния комнаты для всех игроков
             await self.update_room_state(room_id)
 
@@ -195,349 +633,486 @@ class GameServer:
         if room_id not in self.rooms:
             return
         room = self.rooms[room_id]
-        room['status'] = 'playing'
-        room['startTime'] = time.time()
+        room.status = 'playing'
+        room.start_time = time.time()
+        self.lifecycle.room_started(room_id)
+        # Завершение игры ровно по истечении времени
+        self.scheduler.schedule_in(('game_end', room_id), room.time_limit,
+                                   lambda: self.finish_game(room_id))
         # отправка всем игрокам события начала игры
-        for player in room['players']:
-            await self.send_to_player(player['id'], {
-                'type': 'GAME_START',
-                'mainWord': room['mainWord'],
-                'availableCells': room['availableCells'],
-                'timeLimit': room['timeLimit']
-            })
+        await self.broadcast_room(room, {
+            'type': 'GAME_START',
+            'mainWord': room.main_word,
+            'availableCells': room.available_cells,
+            'timeLimit': room.time_limit,
+            'possibleWords': room.possible_words,
+            'possibleScore': room.possible_score,
+            'seq': room.seq
+        })
 
-    async def process_word(self, player_id: str, word: str, room_id: str):
-        """Исправленная обработка слова от игрока"""
+    def _precheck_word(self, room: Room, player: Player, word: str) -> Optional[str]:
+        """Дешевые проверки слова без обращения к словарю. Возвращает текст ошибки или None."""
+        # Базовая проверка слова
+        if not word or len(word) < 2:
+            return 'Слово должно быть не менее 2 букв'
+
+        # Проверка, что слово еще не использовалось этим игроком
+        if room.has_used(player, word):
+            return 'Вы уже использовали это слово'
+
+        # Можно ли составить слово из букв основного (слова из словаря - одна проверка по множеству)
+        if word not in room.solutions and not self.can_make_word(word, room.main_word):
+            return 'Это слово нельзя составить из основного слова'
+
+        return None
+
+    def _accept_word(self, room: Room, player: Player, word: str, word_exists: bool) -> dict:
+        """
+        Окончательная проверка слова (после проверки по словарю) и начисление очков.
+        Возвращает сообщение WORD_RESULT для игрока.
+        """
+        # Повторяем дешевые проверки: пока шла проверка по словарю, состояние могло измениться
+        message = self._precheck_word(room, player, word)
+        if message is None and not word_exists:
+            message = 'Это слово не найдено в словаре'
+
+        if message:
+            return self._rejected_word(word, message)
+
+        # подсчет очков (1 очко за каждую букву), добавление слова игроку и обновление таблицы
+        score = len(word)
+        room.add_word(player, word, score)
+
+        return {
+            'type': 'WORD_RESULT',
+            'word': word,
+            'valid': True,
+            'score': score
+        }
+
+    async def _notify_word_found(self, room: Room, player: Player, word: str, score: int):
+        # уведомляем всех остальных игроков о найденном слове
+        await self.broadcast_room(room, {
+            'type': 'WORD_FOUND',
+            'playerId': player.id,
+            'username': player.username,
+            'word': word,
+            'score': score
+        }, exclude=player.id)
+
+    def _get_playing_room_and_player(self, room_id: str, player_id: str):
         if not room_id or room_id not in self.rooms:
-            return
+            return None, None
         room = self.rooms[room_id]
-        if room['status'] != 'playing':
-            return
+        if room.status != 'playing':
+            return None, None
+        return room, room.get_player(player_id)
 
-        # поиск игрока в комнате
-        player = None
-        for p in room['players']:
-            if p['id'] == player_id:
-                player = p
-                break
+    async def process_word(self, player_id: str, word: str, room_id: str):
+        """Обработка слова от игрока"""
+        room, player = self._get_playing_room_and_player(room_id, player_id)
         if not player:
             return
 
         # Приводим слово к нижнему регистру и убираем пробелы
         word = word.strip().lower()
 
-        # Базовая проверка слова
-        if not word or len(word) < 2:
-            await self.send_to_player(player_id, {
-                'type': 'WORD_RESULT',
-                'word': word,
-                'valid': False,
-                'score': 0,
-                'message': 'Слово должно быть не менее 2 букв'
-            })
+        # 1. СНАЧАЛА дешевые проверки, 2. ТОЛЬКО ЕСЛИ они пройдены - проверка по словарю
+        word_exists = word in room.solutions
+        if not word_exists and self._precheck_word(room, player, word) is None:
+            try:
+                word_exists = await self.word_validator.validate(word)
+            except RemoteLookupBusy:
+                await self.send_to_player(player_id, self._rejected_word(word, BUSY_MESSAGE, throttled=True))
+                return
+            # За время проверки игра могла закончиться или игрок - выйти
+            room, player = self._get_playing_room_and_player(room_id, player_id)
+            if not player:
+                return
+
+        # 3. Если все проверки пройдены - принимаем слово
+        result = self._accept_word(room, player, word, word_exists)
+
+        # отправка результата игроку
+        await self.send_to_player(player_id, result)
+        if not result['valid']:
             return
 
-        # Проверка, что слово еще не использовалось этим игроком
-        if word in [w.lower() for w in player['userWords']]:
-            await self.send_to_player(player_id, {
-                'type': 'WORD_RESULT',
-                'word': word,
-                'valid': False,
-                'score': 0,
-                'message': 'Вы уже использовали это слово'
-            })
+        await self._notify_word_found(room, player, word, result['score'])
+
+        # обновление состояния комнаты для всех игроков: небольшая дельта вместо снимка
+        await self.publish_delta(room, self._word_added_ops(player, [word]))
+
+    async def process_words(self, player_id: str, words: List[str], room_id: str):
+        """
+        Пакетная обработка слов (SUBMIT_WORDS): все слова проверяются по словарю одним пакетом,
+        игрок получает один ответ WORD_RESULTS с вердиктом по каждому слову.
+        """
+        room, player = self._get_playing_room_and_player(room_id, player_id)
+        if not player:
             return
 
-        # 1. СНАЧАЛА проверяем существование в Wiktionary
-        word_exists = False
+        words = [str(w).strip().lower() for w in words[:config.BATCH_MAX_WORDS]]
+
+        # Слова из множества решений комнаты уже проверены; по словарю проверяем только
+        # остальные слова, прошедшие дешевые проверки
+        verdicts = {w: True for w in words if w in room.solutions}
+        candidates = [w for w in dict.fromkeys(words)
+                      if w not in verdicts and self._precheck_word(room, player, w) is None]
+        unchecked = ()
         try:
-            word_exists = await self.check_word_in_wiktionary_async(word)
-            print(f"Результат проверки в Wiktionary для '{word}': {word_exists}")
-        except Exception as e:
-            print(f"Ошибка при проверке слова в Wiktionary: {e}")
-            # В случае ошибки API пробуем синхронную версию
-            try:
-                word_exists = self.check_word_in_wiktionary(word)
-                print(f"Результат синхронной проверки в Wiktionary для '{word}': {word_exists}")
-            except Exception as e2:
-                print(f"Ошибка и в синхронной проверке: {e2}")
-                # В крайнем случае считаем слово валидным, чтобы не блокировать игру
-                word_exists = True
-
-        # Если слова нет в словаре - сразу отклоняем
-        if not word_exists:
-            await self.send_to_player(player_id, {
-                'type': 'WORD_RESULT',
-                'word': word,
-                'valid': False,
-                'score': 0,
-                'message': 'Это слово не найдено в словаре'
-            })
-            return
+            verdicts.update(zip(candidates, await self.word_validator.validate_many(candidates)))
+        except RemoteLookupBusy:
+            # Слова, которые не удалось проверить, отклоняются с предложением повторить
+            unchecked = set(candidates)
 
-        # 2. ТОЛЬКО ЕСЛИ слово есть в словаре - проверяем, можно ли его составить
-        if not self.can_make_word(word, room['mainWord']):
-            await self.send_to_player(player_id, {
-                'type': 'WORD_RESULT',
-                'word': word,
-                'valid': False,
-                'score': 0,
-                'message': 'Это слово нельзя составить из основного слова'
-            })
+        room, player = self._get_playing_room_and_player(room_id, player_id)
+        if not player:
             return
 
-        # 3. Если все проверки пройдены - принимаем слово
-        # добавление слова в список игрока
-        player['userWords'].append(word)
-        # подсчет очков (1 очко за каждую букву)
-        score = len(word)
-        player['score'] += score
+        results = []
+        accepted = []
+        for word in words:
+            if word in unchecked:
+                result = self._rejected_word(word, BUSY_MESSAGE, throttled=True)
+            else:
+                result = self._accept_word(room, player, word, verdicts.get(word, False))
+            del result['type']
+            results.append(result)
+            if result['valid']:
+                accepted.append(result)
 
-        # отправка результата игроку
         await self.send_to_player(player_id, {
-            'type': 'WORD_RESULT',
-            'word': word,
-            'valid': True,
-            'score': score
+            'type': 'WORD_RESULTS',
+            'results': results
         })
 
-        # уведомляем всех остальных игроков о найденном слове
-        for other_player in room['players']:
-            if other_player['id'] != player_id:  # Всем кроме того, кто нашел слово
-                await self.send_to_player(other_player['id'], {
-                    'type': 'WORD_FOUND',
-                    'playerId': player_id,
-                    'username': player['username'],
-                    'word': word,
-                    'score': score
-                })
+        for result in accepted:
+            await self._notify_word_found(room, player, result['word'], result['score'])
 
-        # обновление состояния комнаты для всех игроков
-        await self.update_room_state(room_id)
+        if accepted:
+            await self.publish_delta(room, self._word_added_ops(player, [r['word'] for r in accepted]))
 
     async def finish_game(self, room_id: str):
         if not room_id or room_id not in self.rooms:
             return
         room = self.rooms[room_id]
-        if room['status'] == 'finished':
+        if room.status == 'finished':
             return
-        room['status'] = 'finished'
-        room['endTime'] = time.time()
-        # сортировка игроков по очкам
-        room['players'] = sorted(room['players'], key=lambda p: p['score'], reverse=True)
-        for player in room['players']:
-            await self.send_to_player(player['id'], {
-                'type': 'GAME_END',
-                'results': [
-                    {
-                        'username': p['username'],
-                        'score': p['score'],
-                        'userWords': p['userWords']
-                    } for p in room['players']
+        room.status = 'finished'
+        room.end_time = time.time()
+        self.scheduler.cancel(('game_end', room_id))
+        # Комната с итогами хранится ограниченное время, затем удаляется
+        self.lifecycle.room_finished(room_id)
+        if self.results is not None and room.players:
+            # Только постановка в очередь: запись в базу идет в фоне
+            self.results.record_game({
+                'roomId': room_id,
+                'mainWord': room.main_word,
+                'startedAt': room.start_time,
+                'finishedAt': room.end_time,
+                'possibleWords': room.possible_words,
+                'possibleScore': room.possible_score,
+                'players': [
+                    {'playerId': p.id, 'username': p.username, 'score': p.score, 'words': list(p.user_words)}
+                    for p in room.scoreboard
                 ]
             })
+        # Итоги одинаковы для всех: сериализуются один раз; таблица уже упорядочена по очкам
+        await self.broadcast_room(room, self._game_end_message(room))
+
+    @staticmethod
+    def _game_end_message(room: Room) -> dict:
+        return {
+            'type': 'GAME_END',
+            'results': [
+                {
+                    'username': p.username,
+                    'score': p.score,
+                    'userWords': p.user_words
+                } for p in room.scoreboard
+            ],
+            'possibleWords': room.possible_words,
+            'possibleScore': room.possible_score
+        }
 
-    async def update_room_state(self, room_id: str):
+    @staticmethod
+    def _word_added_ops(player: Player, words: List[str]) -> List[dict]:
+        ops = [{'op': 'word_added', 'playerId': player.id, 'word': word} for word in words]
+        ops.append({
+            'op': 'score_changed',
+            'playerId': player.id,
+            'score': player.score,
+            'wordsCount': len(player.user_words)
+        })
+        return ops
+
+    async def publish_delta(self, room: Room, ops: List[dict]):
+        """
+        Рассылка изменения состояния комнаты в виде дельты с номером версии.
+        Дельта одинакова для всех игроков и не растет с ходом игры.
+        """
+        room.seq += 1
+        data = {'type': 'GAME_DELTA', 'seq': room.seq, 'ops': ops}
+        # Закодированные кадры сохраняются вместе с дельтой и переиспользуются при RESYNC
+        frames = {}
+        room.deltas.append((room.seq, data, frames))
+        await self._send_concurrently(self._frames_for(room.players, data, frames), kind='GAME_DELTA')
+
+    async def resync_player(self, player_id: str, room_id: str, since_seq=None):
+        if not room_id or room_id not in self.rooms:
+            return
+        room = self.rooms[room_id]
+        deltas = room.deltas
+        # Если все дельты после since_seq еще в журнале - досылаем только их
+        if isinstance(since_seq, int) and deltas and deltas[0][0] <= since_seq + 1 and since_seq < room.seq:
+            await self._send_sequence(player_id, [self._frames_for([player_id], data, frames)[player_id]
+                                                  for seq, data, frames in deltas if seq > since_seq])
+            return
+        await self.update_room_state(room_id, only=player_id)
+
+    async def _send_sequence(self, player_id: str, frames: List[Frame]):
+        for frame in frames:
+            if not await self.send_raw_to_player(player_id, frame, kind='GAME_DELTA'):
+                return
+
+    async def update_room_state(self, room_id: str, only: Optional[str] = None):
+        """
+        Полный снимок состояния комнаты (GAME_STATE) с текущим номером версии.
+        Отправляется при входе, выходе и смене статуса; only - только одному игроку (ресинхронизация).
+        """
         if room_id not in self.rooms:
             return
         room = self.rooms[room_id]
-        for player in room['players']:
-            opponents = [
-                {
-                    'username': p['username'],
-                    'score': p['score'],
-                    'wordsCount': len(p['userWords']),
-                    'playerId': p['id']
-                } for p in room['players'] if p['id'] != player['id']
-            ]
-            print(f"Отправка состояния для игрока {player['id']}: opponents={opponents}")
-            time_left = 0
-            if room['status'] == 'playing':
-                elapsed = time.time() - room['startTime']
-                time_left = max(0, room['timeLimit'] - int(elapsed))
-            else:
-                time_left = room['timeLimit']
-
-            await self.send_to_player(player['id'], {
-                'type': 'GAME_STATE',
-                'state': {
-                    'mainWord': room['mainWord'],
-                    'availableCells': room['availableCells'],
-                    'timeLeft': time_left,
-                    'score': player['score'],
-                    'userWords': player['userWords'],
-                    'opponents': opponents,
-                    'roomId': room_id,
-                    'status': room['status']
-                }
-            })
+        if only is None:
+            # Снимок для всех - новая версия состояния; старые дельты больше не нужны
+            room.seq += 1
+            room.deltas.clear()
+
+        time_left = 0
+        if room.status == 'playing':
+            elapsed = time.time() - room.start_time
+            time_left = max(0, room.time_limit - int(elapsed))
+        else:
+            time_left = room.time_limit
+
+        common = {
+            'mainWord': room.main_word,
+            'availableCells': room.available_cells,
+            'timeLeft': time_left,
+            'roomId': room_id,
+            'status': room.status,
+            'possibleWords': room.possible_words,
+            'possibleScore': room.possible_score
+        }
+        cards = {
+            p.id: {
+                'username': p.username,
+                'score': p.score,
+                'wordsCount': len(p.user_words),
+                'playerId': p.id
+            } for p in room
+        }
+        logger.debug('room_state_sent', room=room_id, players=len(cards))
 
-    async def handle_disconnect(self, player_id: str):
-        if player_id not in self.connections:
+        # Для JSON общая часть и карточки соперников сериализуются один раз,
+        # для каждого получателя из готовых фрагментов собирается только его сообщение
+        json_common = None
+        json_cards = None
+
+        messages = {}
+        for player in room:
+            if only is not None and player.id != only:
+                continue
+            codec = self._codec_of(player.id)
+            if codec.binary:
+                messages[player.id] = codec.encode({'type': 'GAME_STATE', 'seq': room.seq, 'state': {
+                    **common,
+                    'score': player.score,
+                    'userWords': player.user_words,
+                    'opponents': [card for pid, card in cards.items() if pid != player.id]
+                }})
+                continue
+
+            if json_common is None:
+                json_common = self._encode(common)[1:-1]
+                json_cards = {pid: self._encode(card) for pid, card in cards.items()}
+            opponents = ','.join(card for pid, card in json_cards.items() if pid != player.id)
+            messages[player.id] = (
+                '{"type":"GAME_STATE","seq":' + str(room.seq) + ',"state":{' + json_common
+                + ',"score":' + self._encode(player.score)
+                + ',"userWords":' + self._encode(player.user_words)
+                + ',"opponents":[' + opponents + ']}}'
+            )
+
+        await self._send_concurrently(messages, kind='GAME_STATE')
+
+    async def handle_disconnect(self, player_id: str, websocket: Optional[WebSocket] = None):
+        """
+        Отключение клиента. websocket - сокет, чей обработчик завершился: если соединение
+        игрока уже заменено новым (переподключение), вызов относится к старому сокету и игнорируется.
+        """
+        connection = self.connections.get(player_id)
+        if connection is None or (websocket is not None and connection['ws'] is not websocket):
             return
-        connection = self.connections[player_id]
-        room_id = connection.get('room_id')
 
-        # Обрабатываем выход игрока из комнаты
-        if room_id and room_id in self.rooms:
+        # Удаляем соединение (до ожидания закрытия очереди: обработчик может быть отменен)
+        del self.connections[player_id]
+        room_id = connection.get('room_id')
+        room = self.rooms.get(room_id) if room_id else None
+
+        if (room is not None and room.status != 'finished' and config.RECONNECT_GRACE > 0
+                and room.get_player(player_id) is not None):
+            # Обрыв связи: место и очки игрока сохраняются до переподключения или истечения срока
+            self.detached[player_id] = {
+                'resume_token': connection['resume_token'],
+                'room_id': room_id,
+                'username': connection['username']
+            }
+            self.scheduler.schedule_in(('session_expire', player_id), config.RECONNECT_GRACE,
+                                       lambda: self._expire_session(player_id))
+        elif room is not None:
+            # Обрабатываем выход игрока из комнаты
             await self.handle_player_exit(player_id, room_id)
 
-        # Удаляем соединение
-        del self.connections[player_id]
+        await connection['outbox'].close()
 
-    async def send_to_player(self, player_id: str, data: dict):
-        if player_id not in self.connections:
+    async def _expire_session(self, player_id: str):
+        """Игрок не переподключился за RECONNECT_GRACE: выход из комнаты."""
+        session = self.detached.pop(player_id, None)
+        if session is None:
             return
-        connection = self.connections[player_id]
+        self.session_resumes.inc('expired')
+        if session['room_id'] in self.rooms:
+            await self.handle_player_exit(player_id, session['room_id'])
+
+    def remove_room(self, room_id: str):
+        """Удаление комнаты вместе с ее таймерами; соединения игроков отвязываются от нее."""
+        room = self.rooms.pop(room_id, None)
+        if room is None:
+            return
+        self.scheduler.cancel(('game_end', room_id))
+        self.lifecycle.room_removed(room_id)
+        for pid in room.players:
+            connection = self.connections.get(pid)
+            if connection is not None and connection['room_id'] == room_id:
+                connection['room_id'] = None
+
+    async def close_room(self, room_id: str, message: str):
+        """Принудительное закрытие комнаты: игроки получают ROOM_CLOSED."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            return
+        await self.broadcast_room(room, {'type': 'ROOM_CLOSED', 'roomId': room_id, 'message': message})
+        self.remove_room(room_id)
+
+    async def drop_connection(self, player_id: str, code: int = 1001):
+        """Закрытие соединения сервером (например, не отвечает на heartbeat) с выходом из комнаты."""
+        connection = self.connections.get(player_id)
+        if connection is None:
+            return
+        await self.handle_disconnect(player_id)
         try:
-            await connection['ws'].send_json(data)
-        except Exception as e:
-            print(f"Ошибка при отправке сообщения: {e}")
+            await asyncio.wait_for(connection['ws'].close(code=code), config.OUTBOUND_SEND_TIMEOUT)
+        except Exception:
+            pass
 
-    async def check_expired_games(self):
-        # Фоновая задача для проверки истекших игр
-        while True:
-            try:
-                for room_id, room in list(self.rooms.items()):
-                    if room['status'] == 'playing':
-                        elapsed = time.time() - room['startTime']
-                        if elapsed >= room['timeLimit']:
-                            await self.finish_game(room_id)
-                await asyncio.sleep(1)  # Проверка каждую секунду
-            except Exception as e:
-                print(f"Ошибка в check_expired_games: {e}")
-                await asyncio.sleep(1)
-
-    def generate_word(self, length: int) -> str:
-        word = self.dictionary.generate_word(min_length=length, max_length=length + 4)
-        return word if word else "программирование"  # fallback
+    @staticmethod
+    def _encode(data) -> str:
+        # JSON в том же формате, что и у WebSocket.send_json (для сборки GAME_STATE из фрагментов)
+        return JSON.encode(data)
 
-    def can_make_word(self, word: str, main_word: str) -> bool:
+    def _codec_of(self, player_id: str):
+        connection = self.connections.get(player_id)
+        return connection['codec'] if connection else JSON
+
+    def _frames_for(self, player_ids: Iterable[str], data: dict, cache: Optional[dict] = None) -> Dict[str, Frame]:
         """
-        Проверка возможности составить слово из букв основного слова с учетом количества букв.
+        Кадры одного сообщения для нескольких игроков: сообщение кодируется один раз
+        на каждый используемый кодек. cache - уже закодированные кадры (имя кодека -> кадр).
         """
-        if not word or not main_word:
-            return False
-
-        word = word.lower().strip()
-        main_word = main_word.lower().strip()
+        cache = {} if cache is None else cache
+        frames = {}
+        for pid in player_ids:
+            codec = self._codec_of(pid)
+            frame = cache.get(codec.name)
+            if frame is None:
+                frame = cache[codec.name] = codec.encode(data)
+            frames[pid] = frame
+        return frames
 
-        word_counter = Counter(word)
-        main_word_counter = Counter(main_word)
-
-        for char, count in word_counter.items():
-            if main_word_counter[char] < count:
-                return False
-
-        return True
+    async def send_to_player(self, player_id: str, data: dict):
+        return await self.send_raw_to_player(player_id, self._codec_of(player_id).encode(data), data.get('type'))
 
-    def check_word_in_wiktionary(self, word: str) -> bool:
+    async def send_raw_to_player(self, player_id: str, text: Frame, kind: Optional[str] = None) -> bool:
         """
-        Улучшенная синхронная версия проверки слова в Wiktionary с обходом SSL проблем.
+        Постановка уже сериализованного сообщения в исходящую очередь игрока (без ожидания сети).
+        Возвращает False, если сообщение не принято (соединение закрыто или очередь переполнена).
         """
-        if not word or len(word.strip()) < 2:
+        if player_id not in self.connections:
             return False
+        return self.connections[player_id]['outbox'].put(text, kind)
 
-        word = word.strip().lower()
-
-        # Проверяем русский и английский Викисловарь
-        for lang in ['ru', 'en']:
-            url = f"https://{lang}.wiktionary.org/w/api.php"
-            params = {
-                'action': 'query',
-                'format': 'json',
-                'titles': word,
-                'prop': 'info'
-            }
+    async def _send_concurrently(self, messages: Dict[str, Frame], kind: Optional[str] = None) -> List[str]:
+        """
+        Отправка {игрок: сообщение}: каждое сообщение ставится в очередь своего соединения,
+        писатели соединений отправляют параллельно. Возвращает игроков, чьи очереди не приняли кадр.
+        """
+        started = time.perf_counter()
+        failed = []
+        for pid, text in messages.items():
+            if not await self.send_raw_to_player(pid, text, kind) and pid not in self.detached:
+                # Отключившиеся игроки (ждут переподключения) получат пропущенное при возврате
+                failed.append(pid)
+        label = kind or 'other'
+        self.fanout_seconds.observe(time.perf_counter() - started, label)
+        self.fanout_frames.inc(label, amount=len(messages))
+        if failed:
+            logger.warning('send_failed', type=label, players=len(failed))
+        return failed
+
+    async def broadcast(self, player_ids, data: dict) -> List[str]:
+        """
+        Рассылка одного сообщения нескольким игрокам: сериализуется один раз на кодек,
+        отправляется всем параллельно. Возвращает список игроков, которым доставить не удалось.
+        """
+        return await self._send_concurrently(self._frames_for(player_ids, data), kind=data.get('type'))
+
+    async def broadcast_room(self, room: Room, data: dict, exclude: Optional[str] = None) -> List[str]:
+        return await self.broadcast([pid for pid in room.players if pid != exclude], data)
+
+    def generate_word(self, length: int = MAIN_WORD_LENGTH) -> str:
+        min_subwords = config.MAIN_WORD_MIN_SUBWORDS
+        if min_subwords > 0 and not self.dictionary.quality_ready(min_subwords, length, length + 4):
+            # Фильтр качества еще строится в фоне (start): не перебираем корзину в event loop
+            min_subwords = 0
+        word = self.dictionary.generate_word(min_length=length, max_length=length + 4,
+                                             min_subwords=min_subwords)
+        if not word and min_subwords > 0:
+            # Нет слов, проходящих фильтр качества - выбираем без него
+            word = self.dictionary.generate_word(min_length=length, max_length=length + 4)
+        return word if word else "программирование"  # fallback
 
-            try:
-                # Добавляем headers для имитации браузера
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-
-                # Отключаем проверку SSL сертификатов если есть проблемы
-                response = requests.get(
-                    url,
-                    params=params,
-                    timeout=10,
-                    headers=headers,
-                    verify=False  # Отключаем SSL верификацию
-                )
-
-                if response.status_code != 200:
-                    continue
-
-                data = response.json()
-                pages = data.get("query", {}).get("pages", {})
-
-                for page_id, page_info in pages.items():
-                    if page_id != "-1" and not page_info.get('missing', False):
-                        print(f"Слово '{word}' найдено в {lang} Викисловаре")
-                        return True
-
-            except Exception as e:
-                print(f"Ошибка при проверке слова '{word}' в {lang} Wiktionary: {e}")
-                continue
+    def can_make_word(self, word: str, main_word: str) -> bool:
+        """
+        Проверка возможности составить слово из букв основного слова с учетом количества букв.
+        """
+        if not word or not main_word:
+            return False
 
-        print(f"Слово '{word}' не найдено в Викисловарях")
-        return False
+        return can_make_word(word.lower().strip(), main_word.lower().strip())
 
     async def check_word_in_wiktionary_async(self, word: str) -> bool:
         """
-        Асинхронная проверка слова в Wiktionary с исправленными SSL настройками.
+        Асинхронная проверка слова в Wiktionary через общий HTTP клиент.
         """
         if not word or len(word.strip()) < 2:
             return False
 
-        word = word.strip().lower()
+        return await self.wiktionary.lookup(word.strip().lower())
 
-        # Создаем SSL контекст с правильными сертификатами
-        try:
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-        except:
-            # Если certifi недоступен, создаем контекст без проверки сертификатов (небезопасно, но работает)
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
-        # Настройки для aiohttp с таймаутом и SSL
-        timeout = aiohttp.ClientTimeout(total=10)
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-
-        try:
-            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-                for lang in ['ru', 'en']:
-                    url = f"https://{lang}.wiktionary.org/w/api.php"
-                    params = {
-                        'action': 'query',
-                        'format': 'json',
-                        'titles': word,
-                        'prop': 'info'
-                    }
-
-                    try:
-                        async with session.get(url, params=params) as response:
-                            if response.status != 200:
-                                continue
-
-                            data = await response.json()
-                            pages = data.get("query", {}).get("pages", {})
-
-                            for page_id, page_info in pages.items():
-                                if page_id != "-1" and not page_info.get('missing', False):
-                                    print(f"Слово '{word}' найдено в {lang} Викисловаре (async)")
-                                    return True
-
-                    except Exception as e:
-                        print(f"Ошибка при проверке слова '{word}' в {lang} Wiktionary: {e}")
-                        continue
-
-        except Exception as e:
-            print(f"Общая ошибка при асинхронной проверке слова '{word}': {e}")
-
-        print(f"Слово '{word}' не найдено в Викисловарях (async)")
-        return False
-
-# Создание глобального экземпляра сервера
-game_server = GameServer()
\ No newline at end of file
+    async def check_words_in_wiktionary_async(self, words: List[str]) -> Dict[str, Optional[bool]]:
+        """
+        Пакетная проверка слов в Wiktionary (один запрос на язык для до 50 слов).
+        """
+        return await self.wiktionary.lookup_many(words)
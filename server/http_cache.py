@@ -0,0 +1,111 @@
+"""
+Неизменяемые HTTP ответы с предварительным сжатием и проверкой ETag.
+
+CachedBody хранит тело в памяти вместе со сжатыми вариантами (gzip, br - если установлен
+пакет brotli), которые вычисляются один раз. respond() выбирает вариант по Accept-Encoding
+и отвечает 304 на If-None-Match с ETag любого варианта, поэтому повторная выдача не сжимает
+и не сериализует ничего заново. У каждого варианта свой сильный ETag (суффикс кодировки):
+байты вариантов различаются, и кэши не должны подменять один другим.
+"""
+import gzip
+import hashlib
+from typing import Dict, Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдается gzip
+    brotli = None
+
+# Для версионированных адресов (версия или хэш содержимого в URL)
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Для адресов с постоянным именем: кэш есть, но каждый раз проверяется ETag
+REVALIDATE = 'no-cache'
+
+# Меньшие тела не сжимаются: заголовки и распаковка дороже выигрыша
+MIN_COMPRESS_SIZE = 256
+
+# Суффикс ETag сжатого варианта: "<хэш>-br", "<хэш>-gz"
+ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+
+
+def content_hash(data: bytes, length: int = 16) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def compress_variants(content: bytes) -> Dict[str, bytes]:
+    """Сжатые варианты тела с максимальным уровнем сжатия (gzip детерминирован: mtime=0)."""
+    variants = {}
+    if brotli is not None:
+        variants['br'] = brotli.compress(content, quality=11)
+    variants['gzip'] = gzip.compress(content, compresslevel=9, mtime=0)
+    return variants
+
+
+def _accepts(header: str, encoding: str) -> bool:
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() == encoding:
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+    return False
+
+
+def _etag_matches(header: str, etags: Iterable[str]) -> bool:
+    if header.strip() == '*':
+        return True
+    tags = {tag.strip() for tag in header.split(',')}
+    return any(etag in tags or f'W/{etag}' in tags for etag in etags)
+
+
+class CachedBody:
+    def __init__(self, content: bytes, media_type: str, cache_control: str = IMMUTABLE,
+                 encoded: Optional[Dict[str, bytes]] = None):
+        self.content = content
+        self.media_type = media_type
+        self.cache_control = cache_control
+        digest = content_hash(content)
+        # ETag исходного тела; у сжатых вариантов - свои (см. etags)
+        self.etag = f'"{digest}"'
+        # кодировка -> сжатое тело (только если оно меньше исходного)
+        self.encoded: Dict[str, bytes] = {}
+        if encoded is not None:
+            # Сжато заранее (сборка статики): повторно не сжимаем
+            for encoding, data in encoded.items():
+                self._add(encoding, data)
+        elif len(content) >= MIN_COMPRESS_SIZE:
+            for encoding, data in compress_variants(content).items():
+                self._add(encoding, data)
+
+        # кодировка (None - без сжатия) -> ETag варианта
+        self.etags: Dict[Optional[str], str] = {None: self.etag}
+        for encoding in self.encoded:
+            self.etags[encoding] = f'"{digest}{ETAG_SUFFIXES[encoding]}"'
+
+    def _add(self, encoding: str, data: bytes):
+        if len(data) < len(self.content):
+            self.encoded[encoding] = data
+
+    def _select(self, accept: str) -> Optional[str]:
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and _accepts(accept, encoding):
+                return encoding
+        return None
+
+    def respond(self, request: Request, cache_control: Optional[str] = None) -> Response:
+        encoding = self._select(request.headers.get('accept-encoding', ''))
+        headers = {
+            'ETag': self.etags[encoding],
+            'Cache-Control': cache_control or self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        # Содержимое всех вариантов одно и то же: подходит ETag любого из них
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match and _etag_matches(if_none_match, self.etags.values()):
+            return Response(status_code=304, headers=headers)
+
+        if encoding is None:
+            return Response(self.content, media_type=self.media_type, headers=headers)
+        headers['Content-Encoding'] = encoding
+        return Response(self.encoded[encoding], media_type=self.media_type, headers=headers)
@@ -0,0 +1,203 @@
+"""
+Наборы уровней (level packs) для режимов уровней и практики.
+
+Данные уровней хранятся на сервере. Для каждого основного слова набор содержит множество
+допустимых слов, посчитанное по словарю (AnagramIndex), в виде отсортированных 32-битных
+хэшей FNV-1a (base64): клиент проверяет слово локально, без запросов к серверу, а ответы
+уровня не лежат в наборе открытым текстом.
+
+Набор версионируется хэшем содержимого и отдается по адресу /levels/<версия>.json как
+неизменяемый (Cache-Control immutable, ETag, заранее сжатое тело). /levels - маленький
+манифест с текущей версией, который браузер перепроверяет по ETag.
+"""
+import base64
+import struct
+from typing import Iterable, List
+
+from .anagram_index import AnagramIndex, can_make_word
+from .codec import JSON
+from .http_cache import REVALIDATE, CachedBody, content_hash
+
+LEVELS = [
+    {
+        'id': 1,
+        'mainWord': 'программа',
+        'wordsToFind': ['ром', 'грамм', 'пора', 'рама', 'амор', 'марма', 'гамма'],
+        'targets': [3, 5, 7],
+        'timeLimit': 180,
+        'hint': "Ищите короткие слова из 3-4 букв, затем переходите к более длинным.",
+    },
+    {
+        'id': 2,
+        'mainWord': 'компьютер',
+        'wordsToFind': ['кот', 'метр', 'порт', 'трек', 'комп', 'ютро', 'перо', 'корт'],
+        'targets': [4, 6, 8],
+        'timeLimit': 240,
+        'hint': "Буква 'ю' встречается редко — используйте её в конце слов.",
+    },
+    {
+        'id': 3,
+        'mainWord': 'технология',
+        'wordsToFind': ['тело', 'лого', 'гол', 'хет', 'неон', 'хол', 'гиена', 'техно', 'лето'],
+        'targets': [4, 6, 9],
+        'timeLimit': 300,
+        'hint': "Слова с 'х' и 'г' могут быть неочевидными.",
+    },
+    {
+        'id': 4,
+        'mainWord': 'автомобиль',
+        'wordsToFind': ['мот', 'лита', 'бит', 'авто', 'моль', 'том', 'лимо', 'бомба', 'таль'],
+        'targets': [4, 6, 9],
+        'timeLimit': 240,
+        'hint': "Обратите внимание на 'ь' — его можно использовать в конце слов.",
+    },
+    {
+        'id': 5,
+        'mainWord': 'республика',
+        'wordsToFind': ['пес', 'куб', 'липа', 'суп', 'белка', 'пир', 'репа', 'булка', 'спур'],
+        'targets': [4, 6, 9],
+        'timeLimit': 270,
+        'hint': "Попробуйте слова с 'у' и 'и'.",
+    },
+    {
+        'id': 6,
+        'mainWord': 'эксперимент',
+        'wordsToFind': ['пир', 'мен', 'тип', 'крем', 'метр', 'перт', 'экран', 'кит', 'треп'],
+        'targets': [4, 6, 9],
+        'timeLimit': 300,
+        'hint': "Буква 'э' встречается редко — используйте её в начале слов.",
+    },
+    {
+        'id': 7,
+        'mainWord': 'директор',
+        'wordsToFind': ['код', 'рок', 'тир', 'кит', 'ред', 'док', 'кино', 'ток', 'диктор'],
+        'targets': [4, 6, 9],
+        'timeLimit': 240,
+        'hint': "Попробуйте слова с 'д' и 'к'.",
+    },
+    {
+        'id': 8,
+        'mainWord': 'калькулятор',
+        'wordsToFind': ['куль', 'рак', 'рот', 'люк', 'торт', 'акр', 'крот', 'лак', 'каюр'],
+        'targets': [4, 6, 9],
+        'timeLimit': 270,
+        'hint': "Буква 'ь' может быть сложной — используйте её в середине слов.",
+    },
+    {
+        'id': 9,
+        'mainWord': 'телевизор',
+        'wordsToFind': ['лев', 'зло', 'тело', 'вино', 'литр', 'резит', 'вето', 'зило', 'тезис'],
+        'targets': [4, 6, 9],
+        'timeLimit': 300,
+        'hint': "Слова с 'з' и 'в' могут быть неочевидными.",
+    },
+    {
+        'id': 10,
+        'mainWord': 'фотография',
+        'wordsToFind': ['торф', 'граф', 'рот', 'фрау', 'гора', 'агора', 'фора', 'тиф', 'арго'],
+        'targets': [4, 6, 9],
+        'timeLimit': 270,
+        'hint': "Буква 'ф' встречается редко — используйте её в начале или конце.",
+    },
+    {
+        'id': 11,
+        'mainWord': 'лаборатория',
+        'wordsToFind': ['лоб', 'робот', 'борт', 'лира', 'табор', 'оратор', 'брат', 'литр', 'бал'],
+        'targets': [4, 6, 9],
+        'timeLimit': 300,
+        'hint': "Попробуйте длинные слова с 'р' и 'т'.",
+    },
+    {
+        'id': 12,
+        'mainWord': 'космонавт',
+        'wordsToFind': ['сом', 'нос', 'ток', 'ван', 'кост', 'сова', 'мост', 'наст', 'команда'],
+        'targets': [4, 6, 9],
+        'timeLimit': 240,
+        'hint': "Буква 'в' может быть ключевой в некоторых словах.",
+    },
+    {
+        'id': 13,
+        'mainWord': 'электричество',
+        'wordsToFind': ['кит', 'лев', 'тире', 'река', 'литр', 'ветер', 'китель', 'телец', 'кельт'],
+        'targets': [4, 6, 9],
+        'timeLimit': 330,
+        'hint': "Длинное слово — ищите комбинации из 3-5 букв.",
+    },
+    {
+        'id': 14,
+        'mainWord': 'стадион',
+        'wordsToFind': ['сад', 'нос', 'тон', 'доит', 'аист', 'дина', 'стои', 'данс', 'оазис'],
+        'targets': [4, 6, 9],
+        'timeLimit': 240,
+        'hint': "Попробуйте слова с 'д' и 'н'.",
+    },
+    {
+        'id': 15,
+        'mainWord': 'библиотека',
+        'wordsToFind': ['бит', 'либ', 'кот', 'бал', 'лита', 'акт', 'билет', 'тека', 'блок'],
+        'targets': [4, 6, 9],
+        'timeLimit': 300,
+        'hint': "Буква 'б' встречается дважды — используйте её в разных словах.",
+    },
+]
+
+# Основные слова режима практики
+PRACTICE_WORDS = [
+    'программирование', 'разработка', 'алгоритм', 'компьютер',
+    'интернет', 'технология', 'виртуальный', 'разработчик',
+    'программист', 'приложение', 'операционная', 'система'
+]
+
+FNV_OFFSET = 0x811c9dc5
+FNV_PRIME = 0x01000193
+
+
+def fnv1a_32(word: str) -> int:
+    """FNV-1a (32 бита) по байтам UTF-8; та же функция есть в клиенте (game_client.js)."""
+    value = FNV_OFFSET
+    for byte in word.encode('utf-8'):
+        value = ((value ^ byte) * FNV_PRIME) & 0xffffffff
+    return value
+
+
+def encode_hash_set(words: Iterable[str]) -> str:
+    """Отсортированные уникальные хэши слов, упакованные big-endian uint32, в base64."""
+    hashes = sorted({fnv1a_32(word) for word in words})
+    return base64.b64encode(struct.pack(f'>{len(hashes)}I', *hashes)).decode('ascii')
+
+
+def _solution_words(index: AnagramIndex, main_word: str, extra: Iterable[str] = ()) -> List[str]:
+    # Слова словаря плюс целевые слова уровня, которые можно составить из основного
+    words = set(index.solutions(main_word))
+    words.update(word for word in extra if can_make_word(word, main_word))
+    return sorted(words)
+
+
+def build_level_pack(index: AnagramIndex, remote_fallback: bool) -> dict:
+    levels = []
+    for level in LEVELS:
+        words = _solution_words(index, level['mainWord'], level['wordsToFind'])
+        levels.append({**level, 'solutionCount': len(words), 'solutions': encode_hash_set(words)})
+    practice = []
+    for main_word in PRACTICE_WORDS:
+        words = _solution_words(index, main_word)
+        practice.append({'mainWord': main_word, 'solutionCount': len(words), 'solutions': encode_hash_set(words)})
+    return {
+        'hash': 'fnv1a32',
+        # Слова вне множества клиент проверяет на сервере (как и в мультиплеере), если включен Wiktionary
+        'remoteFallback': remote_fallback,
+        'levels': levels,
+        'practice': practice
+    }
+
+
+class LevelPack:
+    """Собранный набор уровней: неизменяемое тело с версией и манифест."""
+
+    def __init__(self, index: AnagramIndex, remote_fallback: bool):
+        content = JSON.encode(build_level_pack(index, remote_fallback)).encode('utf-8')
+        self.version = content_hash(content)
+        self.url = f'/levels/{self.version}.json'
+        self.body = CachedBody(content, 'application/json')
+        self.manifest = CachedBody(JSON.encode({'version': self.version, 'url': self.url}).encode('utf-8'),
+                                   'application/json', REVALIDATE)
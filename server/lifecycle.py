@@ -0,0 +1,123 @@
+"""
+Жизненный цикл комнат и соединений: освобождение памяти и пределы.
+
+- Завершенная комната удаляется через finished_retention секунд после GAME_END
+  (игроки успевают посмотреть итоги).
+- Комната в ожидании без активности (создание, вход игрока) дольше waiting_idle_timeout
+  закрывается: игроки получают ROOM_CLOSED.
+- Раз в heartbeat_interval всем соединениям отправляется PING; соединение, от которого
+  ничего не приходило дольше heartbeat_timeout (полуоткрытое TCP соединение, зависший
+  клиент), закрывается и обрабатывается как отключение.
+- Пределы числа комнат и соединений: сверх них создание комнаты / подключение отклоняется.
+
+Все сроки - задачи общего DeadlineScheduler (без отдельных циклов опроса комнат).
+Время 0 отключает соответствующую проверку, предел 0 - без предела.
+"""
+import time
+
+from .log import get_logger
+from .metrics import MetricsRegistry
+from .scheduler import DeadlineScheduler
+
+logger = get_logger(__name__)
+
+ROOM_CLOSED_MESSAGE = 'Комната закрыта из-за неактивности'
+
+
+class LifecycleManager:
+    def __init__(self, server, scheduler: DeadlineScheduler, metrics: MetricsRegistry,
+                 finished_retention: float = 300.0, waiting_idle_timeout: float = 900.0,
+                 heartbeat_interval: float = 25.0, heartbeat_timeout: float = 60.0,
+                 max_rooms: int = 0, max_connections: int = 0):
+        # server - GameServer (комнаты, соединения, рассылка)
+        self.server = server
+        self.scheduler = scheduler
+        self.finished_retention = finished_retention
+        self.waiting_idle_timeout = waiting_idle_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_rooms = max_rooms
+        self.max_connections = max_connections
+
+        self.reclaimed = metrics.counter(
+            'ksis_reclaimed_total', 'Освобождено комнат и соединений', ['kind'])
+        self.capacity_rejected = metrics.counter(
+            'ksis_capacity_rejected_total', 'Отказов из-за предела числа комнат или соединений', ['kind'])
+
+    def start(self):
+        if self.heartbeat_interval > 0:
+            self.scheduler.schedule_in(('heartbeat',), self.heartbeat_interval, self._heartbeat)
+
+    # Пределы
+
+    def admit_room(self) -> bool:
+        if 0 < self.max_rooms <= len(self.server.rooms):
+            self.capacity_rejected.inc('room')
+            return False
+        return True
+
+    def admit_connection(self, player_id: str) -> bool:
+        # Переподключение с тем же id заменяет старое соединение и не увеличивает их число
+        if player_id in self.server.connections or player_id in self.server.detached:
+            return True
+        if 0 < self.max_connections <= len(self.server.connections):
+            self.capacity_rejected.inc('connection')
+            return False
+        return True
+
+    # События комнат
+
+    def room_waiting(self, room_id: str):
+        """Комната создана или в ней была активность в ожидании игроков: срок простоя отсчитывается заново."""
+        if self.waiting_idle_timeout > 0:
+            self.scheduler.schedule_in(('room_idle', room_id), self.waiting_idle_timeout,
+                                       lambda: self._reap_idle_room(room_id))
+
+    def room_started(self, room_id: str):
+        self.scheduler.cancel(('room_idle', room_id))
+
+    def room_finished(self, room_id: str):
+        self.scheduler.cancel(('room_idle', room_id))
+        if self.finished_retention > 0:
+            self.scheduler.schedule_in(('room_expire', room_id), self.finished_retention,
+                                       lambda: self._expire_room(room_id))
+
+    def room_removed(self, room_id: str):
+        self.scheduler.cancel(('room_idle', room_id))
+        self.scheduler.cancel(('room_expire', room_id))
+
+    async def _expire_room(self, room_id: str):
+        room = self.server.rooms.get(room_id)
+        if room is None or room.status != 'finished':
+            return
+        self.server.remove_room(room_id)
+        self.reclaimed.inc('finished_room')
+
+    async def _reap_idle_room(self, room_id: str):
+        room = self.server.rooms.get(room_id)
+        if room is None or room.status != 'waiting':
+            return
+        await self.server.close_room(room_id, ROOM_CLOSED_MESSAGE)
+        self.reclaimed.inc('idle_room')
+        logger.info('idle_room_closed', room=room_id, players=len(room))
+
+    # Heartbeat
+
+    async def _heartbeat(self):
+        # Следующий обход планируется сразу: ошибка в этом обходе не останавливает heartbeat
+        self.scheduler.schedule_in(('heartbeat',), self.heartbeat_interval, self._heartbeat)
+        now = time.monotonic()
+        alive, stale = [], []
+        for player_id, connection in self.server.connections.items():
+            if now - connection['last_seen'] > self.heartbeat_timeout:
+                stale.append(player_id)
+            else:
+                alive.append(player_id)
+
+        for player_id in stale:
+            self.reclaimed.inc('stale_connection')
+            logger.info('stale_connection_dropped', player=player_id)
+            await self.server.drop_connection(player_id)
+
+        if alive:
+            await self.server.broadcast(alive, {'type': 'PING'})
@@ -0,0 +1,78 @@
+"""
+Структурированное журналирование с ограничением частоты.
+
+Запись - имя события и поля ключ=значение поверх стандартного logging:
+    logger = get_logger(__name__)
+    logger.warning('send_failed', players=3, room='ab12cd34')
+    -> WARNING server.game_server: send_failed players=3 room=ab12cd34
+
+Уровень проверяется до форматирования, поэтому отключенный debug в горячем пути почти
+ничего не стоит. Каждое событие ограничено token bucket (rate записей в секунду, запас
+burst); пропущенные записи считаются и выводятся полем suppressed в следующей записи.
+"""
+import logging
+import time
+from typing import Dict
+
+from . import config
+
+
+def _format_value(value) -> str:
+    text = str(value)
+    if not text or any(char in text for char in ' ="'):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+
+class EventLogger:
+    def __init__(self, logger: logging.Logger, rate: float, burst: float):
+        self.logger = logger
+        self.rate = rate
+        self.burst = burst
+        # событие -> [токены, время последнего пополнения, пропущено записей]
+        self._buckets: Dict[str, list] = {}
+
+    def _allow(self, event: str) -> int:
+        """-1 - запись пропускается, иначе - сколько записей события было пропущено до нее."""
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        bucket = self._buckets.get(event)
+        if bucket is None:
+            bucket = self._buckets[event] = [self.burst, now, 0]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return -1
+        bucket[0] -= 1
+        suppressed, bucket[2] = bucket[2], 0
+        return suppressed
+
+    def log(self, level: int, event: str, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        suppressed = self._allow(event)
+        if suppressed < 0:
+            return
+        if suppressed:
+            fields['suppressed'] = suppressed
+        message = ' '.join([event] + [f'{key}={_format_value(value)}' for key, value in fields.items()])
+        self.logger.log(level, message)
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(logging.getLogger(name), config.LOG_RATE_PER_EVENT, config.LOG_BURST)
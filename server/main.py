@@ -1,43 +1,96 @@
+import math
 import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
-from typing import Optional
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from typing import List, Optional
+from pydantic import BaseModel
 import logging
 
+from server import config
+
 # Настройка логирования
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=getattr(logging, config.LOG_LEVEL, logging.INFO))
 logger = logging.getLogger(__name__)
 
-from server.game_server import GameServer
+from server.assets import AssetStore
+from server.codec import decode_frame, negotiate
+from server.game_server import BUSY_MESSAGE, THROTTLED_MESSAGE, GameServer
+from server.http_cache import REVALIDATE, CachedBody
+from server.word_validator import RemoteLookupBusy
+
+# Создание экземпляра игрового сервера
+game_server = GameServer()
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Общий HTTP клиент и фоновые задачи живут вместе с приложением
+    await game_server.start()
+    try:
+        yield
+    finally:
+        await game_server.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Монтирование статических файлов
 app.mount("/static", StaticFiles(directory="client/static"), name="static")
 
+# Собранная статика с отпечатками (/assets); исходная остается доступна по /static
+assets = AssetStore(config.ASSETS_DIR)
+
 # Шаблоны
 templates = Jinja2Templates(directory="client/templates")
 
-# Создание экземпляра игрового сервера
-game_server = GameServer()
+# Страница не зависит от запроса: рендерится один раз при старте и сжимается заранее
+index_page = CachedBody(
+    templates.get_template("index.html").render(asset=assets.url).encode("utf-8"),
+    "text/html; charset=utf-8",
+    REVALIDATE
+)
 
 
 @app.get("/", response_class=HTMLResponse)
 async def get_index(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return index_page.respond(request)
+
+
+@app.get("/assets/{path:path}")
+async def get_asset(request: Request, path: str):
+    """Собранный файл статики (имя содержит хэш содержимого, поэтому ответ неизменяем)."""
+    body = assets.get(path)
+    if body is None:
+        return PlainTextResponse("Not Found", status_code=404)
+    return body.respond(request)
 
 
 @app.websocket("/ws/{player_id}")
-async def websocket_endpoint(websocket: WebSocket, player_id: str, username: Optional[str] = None):
-    await game_server.connect(websocket, player_id, username)
+async def websocket_endpoint(websocket: WebSocket, player_id: str, username: Optional[str] = None,
+                             codec: Optional[str] = None, resume: Optional[str] = None,
+                             seq: Optional[int] = None):
+    # Формат кадров: JSON по умолчанию, MessagePack - подпротокол ksis.msgpack или ?codec=msgpack
+    wire_codec, subprotocol = negotiate(websocket.scope.get('subprotocols'), codec)
+    # resume - токен из SESSION для возврата в комнату после обрыва, seq - последняя версия состояния клиента
+    if not await game_server.connect(websocket, player_id, username, wire_codec, subprotocol, resume, seq):
+        return
     try:
         while True:
-            data = await websocket.receive_json()
-            await game_server.handle_client_message(player_id, data)
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(message.get('code', 1000))
+            try:
+                data = decode_frame(message)
+            except Exception as e:
+                logger.warning(f"Некорректный кадр от {player_id}: {e!r}")
+                continue
+            if isinstance(data, dict):
+                await game_server.handle_client_message(player_id, data)
     except WebSocketDisconnect:
-        await game_server.handle_disconnect(player_id)
+        await game_server.handle_disconnect(player_id, websocket)
 
 
 @app.get("/generate_player_id")
@@ -45,13 +98,31 @@ async def generate_player_id():
     return {"player_id": str(uuid.uuid4())[:8]}
 
 
+def _client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+
+def _retry_response(content: dict, status_code: int, retry_after: float) -> JSONResponse:
+    """Быстрый отказ (429 - лимит частоты, 503 - удаленная проверка перегружена)."""
+    return JSONResponse(
+        content=content,
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
 @app.get("/check_word")
-async def check_word(word: str):
+async def check_word(word: str, request: Request):
     """
-    Эндпоинт для проверки существования слова в Wiktionary
+    Эндпоинт для проверки существования слова (локальный словарь, кэш, Wiktionary).
+    Использует тот же асинхронный валидатор, что и игра через WebSocket.
     """
+    retry_after = game_server.admit(None, _client_ip(request), 'http')
+    if retry_after:
+        return _retry_response({"valid": False, "error": THROTTLED_MESSAGE}, 429, retry_after)
+
     try:
-        logger.info(f"Проверка слова: {word}")
+        logger.debug(f"Проверка слова: {word}")
 
         # Базовая валидация
         if not word or len(word.strip()) < 2:
@@ -62,10 +133,13 @@ async def check_word(word: str):
 
         word = word.strip().lower()
 
-        # Проверяем слово через game_server
-        is_valid = game_server.check_word_in_wiktionary(word)
+        # Проверяем слово через общий асинхронный валидатор (не блокирует event loop)
+        try:
+            is_valid = await game_server.word_validator.validate(word)
+        except RemoteLookupBusy:
+            return _retry_response({"valid": False, "error": BUSY_MESSAGE}, 503, 1)
 
-        logger.info(f"Результат проверки слова '{word}': {is_valid}")
+        logger.debug(f"Результат проверки слова '{word}': {is_valid}")
 
         return JSONResponse(
             content={"valid": is_valid},
@@ -74,13 +148,95 @@ async def check_word(word: str):
 
     except Exception as e:
         logger.error(f"Ошибка при проверке слова '{word}': {str(e)}")
-        # В случае ошибки возвращаем True, чтобы не блокировать игру
+        # Как и при ошибке Wiktionary: слово принимается только если это явно разрешено
         return JSONResponse(
-            content={"valid": True, "error": "Ошибка API"},
+            content={"valid": config.WORD_REMOTE_FAIL_OPEN, "error": "Ошибка API"},
             status_code=200
         )
 
 
+class CheckWordsRequest(BaseModel):
+    words: List[str]
+
+
+@app.post("/check_words")
+async def check_words(payload: CheckWordsRequest, request: Request):
+    """
+    Пакетная проверка слов: один запрос - вердикт по каждому слову в исходном порядке.
+    """
+    # Лимит считается по словам, а не по запросам: пакет не обходит ограничение частоты
+    retry_after = game_server.admit(None, _client_ip(request), 'http', game_server.request_cost(payload.words))
+    if retry_after:
+        return _retry_response({"error": THROTTLED_MESSAGE}, 429, retry_after)
+
+    if len(payload.words) > config.BATCH_MAX_WORDS:
+        return JSONResponse(
+            content={"error": f"Не более {config.BATCH_MAX_WORDS} слов за запрос"},
+            status_code=400
+        )
+
+    words = [word.strip().lower() for word in payload.words]
+    try:
+        verdicts = await game_server.word_validator.validate_many(words)
+    except RemoteLookupBusy:
+        return _retry_response({"error": BUSY_MESSAGE}, 503, 1)
+
+    return JSONResponse(
+        content={"results": [
+            {"word": word, "valid": valid} for word, valid in zip(words, verdicts)
+        ]},
+        status_code=200
+    )
+
+
+@app.get("/levels")
+async def level_manifest(request: Request):
+    """Текущая версия набора уровней (перепроверяется по ETag при каждой загрузке страницы)."""
+    return game_server.level_pack.manifest.respond(request)
+
+
+@app.get("/levels/{version}.json")
+async def level_pack(request: Request, version: str):
+    """Набор уровней с множествами решений; адрес содержит версию, поэтому ответ неизменяем."""
+    pack = game_server.level_pack
+    if version != pack.version:
+        return JSONResponse(content={"error": "Неизвестная версия набора уровней", "version": pack.version},
+                            status_code=404)
+    return pack.body.respond(request)
+
+
+@app.get("/leaderboard")
+async def leaderboard(period: str = "all", limit: int = 20):
+    """
+    Таблица лидеров по сумме очков: period=all (за все время) или daily (за текущие сутки UTC).
+    Отдается из памяти, без запросов к базе.
+    """
+    if period not in ("all", "daily"):
+        return JSONResponse(content={"error": "period: all или daily"}, status_code=400)
+    if game_server.results is None:
+        return JSONResponse(content={"period": period, "entries": []}, status_code=200)
+    limit = max(1, min(limit, config.LEADERBOARD_SIZE))
+    content = {"period": period, "entries": game_server.results.leaderboard(period, limit)}
+    if period == "daily":
+        content["day"] = game_server.results.day
+    return JSONResponse(content=content, status_code=200)
+
+
+@app.get("/players/{player_id}/history")
+async def player_history(player_id: str, limit: int = 20):
+    """Последние игры игрока (чтение из базы в отдельном потоке)."""
+    if game_server.results is None:
+        return JSONResponse(content={"playerId": player_id, "games": []}, status_code=200)
+    games = await game_server.results.history(player_id, max(1, min(limit, 100)))
+    return JSONResponse(content={"playerId": player_id, "games": games}, status_code=200)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Метрики сервера в текстовом формате Prometheus."""
+    return PlainTextResponse(game_server.metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Необработанная ошибка: {str(exc)}")
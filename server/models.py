@@ -0,0 +1,132 @@
+"""
+Модель комнаты и игрока.
+
+Классы со __slots__ вместо вложенных словарей: меньше памяти на комнату и нет поиска
+игрока перебором списка. Формат сообщений клиенту при этом не меняется - словари
+для JSON собираются в game_server.
+
+Найденные игроком слова хранятся списком (в порядке нахождения, уходит клиенту) и
+битовой маской по номерам слов в room.solutions: проверка повтора - O(1) без отдельного
+множества на каждого игрока. Слова вне решений комнаты (принятые по Wiktionary) редки
+и попадают в небольшое множество extra_words.
+"""
+import time
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional
+
+
+class Player:
+    __slots__ = ('id', 'username', 'score', 'user_words', 'found_mask', 'extra_words', 'order')
+
+    def __init__(self, player_id: str, username: str, order: int = 0):
+        self.id = player_id
+        self.username = username
+        self.score = 0
+        self.user_words: List[str] = []
+        # биты номеров найденных слов из room.solutions и слова вне решений комнаты
+        self.found_mask = 0
+        self.extra_words: Optional[set] = None
+        # Порядок входа в комнату: при равенстве очков выше тот, кто вошел раньше
+        self.order = order
+
+    def has_used(self, word: str, solutions: Mapping[str, int]) -> bool:
+        index = solutions.get(word)
+        if index is not None:
+            return bool(self.found_mask >> index & 1)
+        return self.extra_words is not None and word in self.extra_words
+
+    def add_word(self, word: str, score: int, solutions: Mapping[str, int]):
+        index = solutions.get(word)
+        if index is not None:
+            self.found_mask |= 1 << index
+        else:
+            if self.extra_words is None:
+                self.extra_words = set()
+            self.extra_words.add(word)
+        self.user_words.append(word)
+        self.score += score
+
+    def reset(self):
+        self.score = 0
+        self.user_words = []
+        self.found_mask = 0
+        self.extra_words = None
+
+    def rank_key(self) -> tuple:
+        return -self.score, self.order
+
+
+class Room:
+    __slots__ = ('id', 'players', 'scoreboard', 'main_word', 'solutions', 'possible_words',
+                 'possible_score', 'available_cells', 'time_limit', 'status', 'created',
+                 'start_time', 'end_time', 'seq', 'deltas', '_joined')
+
+    def __init__(self, room_id: str, delta_log_size: int, available_cells: int = 20, time_limit: int = 300):
+        self.id = room_id
+        # id -> игрок; словарь сохраняет порядок входа
+        self.players: Dict[str, Player] = {}
+        # Игроки по убыванию очков, поддерживается при каждом начислении (без сортировки в конце игры)
+        self.scoreboard: List[Player] = []
+        self.main_word = ''
+        # слово -> номер (общий для комнат с тем же основным словом, см. AnagramIndex.solutions)
+        self.solutions: Mapping[str, int] = MappingProxyType({})
+        self.possible_words = 0
+        self.possible_score = 0
+        self.available_cells = available_cells
+        self.time_limit = time_limit  # секунды
+        self.status = 'waiting'  # waiting / playing / finished
+        self.created = time.time()
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        # номер версии состояния и последние дельты (seq, сообщение, закодированные кадры),
+        # см. update_room_state / publish_delta
+        self.seq = 0
+        self.deltas = deque(maxlen=delta_log_size)
+        self._joined = 0
+
+    def __len__(self):
+        return len(self.players)
+
+    def __iter__(self) -> Iterator[Player]:
+        return iter(self.players.values())
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        return self.players.get(player_id)
+
+    def add_player(self, player_id: str, username: str) -> Player:
+        player = Player(player_id, username, self._joined)
+        self._joined += 1
+        self.players[player_id] = player
+        self.scoreboard.append(player)
+        self._raise(len(self.scoreboard) - 1)
+        return player
+
+    def remove_player(self, player_id: str) -> Optional[Player]:
+        player = self.players.pop(player_id, None)
+        if player is not None:
+            self.scoreboard.remove(player)
+        return player
+
+    def has_used(self, player: Player, word: str) -> bool:
+        return player.has_used(word, self.solutions)
+
+    def add_word(self, player: Player, word: str, score: int):
+        """Начисление очков игроку и перемещение его вверх по таблице."""
+        player.add_word(word, score, self.solutions)
+        self._raise(self.scoreboard.index(player))
+
+    def reset_scores(self):
+        for player in self.players.values():
+            player.reset()
+        self.scoreboard = list(self.players.values())
+
+    def _raise(self, index: int):
+        # Очки только растут, поэтому игрок может сдвинуться лишь вверх (шаг сортировки вставками)
+        board = self.scoreboard
+        player = board[index]
+        key = player.rank_key()
+        while index > 0 and board[index - 1].rank_key() > key:
+            board[index] = board[index - 1]
+            index -= 1
+        board[index] = player
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Optional, Union
+
+# Кадры, которые заменяются новым снимком состояния (GAME_STATE), если еще не отправлены
+SUPERSEDED_BY_SNAPSHOT = ('GAME_STATE', 'GAME_DELTA')
+
+
+class OutboundStats:
+    """Общие счетчики исходящих очередей всех соединений."""
+
+    def __init__(self):
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'evicted': self.evicted
+        }
+
+
+class OutboundQueue:
+    """
+    Ограниченная исходящая очередь одного соединения с отдельной задачей-писателем.
+
+    put() никогда не ждет сеть: игровая логика кладет кадр и продолжает работу.
+    Если очередь забита, еще не отправленные GAME_STATE/GAME_DELTA заменяются новым
+    снимком, а лишние кадры отбрасываются (клиент догонит пропущенные дельты через RESYNC).
+    Клиент, у которого очередь остается полной дольше slow_timeout или отправка
+    одного кадра дольше send_timeout, отключается.
+    """
+
+    def __init__(self, ws, stats: OutboundStats, max_size: int = 64, send_timeout: float = 5.0,
+                 slow_timeout: float = 10.0, on_evict: Optional[Callable[[str], None]] = None):
+        self.ws = ws
+        self.stats = stats
+        self.max_size = max_size
+        self.send_timeout = send_timeout
+        self.slow_timeout = slow_timeout
+        self.on_evict = on_evict
+
+        # (тип сообщения, кадр: str - текстовый, bytes - бинарный)
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self._full_since: Optional[float] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put(self, frame: Union[str, bytes], kind: Optional[str] = None) -> bool:
+        """Кладет кадр в очередь. False - кадр не принят (соединение закрыто или очередь полна)."""
+        if self.closed:
+            return False
+
+        if kind == 'GAME_STATE' and self._frames:
+            # Новый снимок делает неотправленные снимки и дельты ненужными
+            before = len(self._frames)
+            self._frames = deque(frame for frame in self._frames if frame[0] not in SUPERSEDED_BY_SNAPSHOT)
+            self.stats.coalesced += before - len(self._frames)
+
+        if len(self._frames) >= self.max_size:
+            self.stats.dropped += 1
+            now = time.monotonic()
+            if self._full_since is None:
+                self._full_since = now
+            elif now - self._full_since > self.slow_timeout:
+                self.evict('очередь переполнена')
+            return False
+
+        self._full_since = None
+        self._frames.append((kind, frame))
+        self._ready.set()
+        return True
+
+    def evict(self, reason: str):
+        """Отключение медленного или мертвого клиента."""
+        if self.closed:
+            return
+        self.stats.evicted += 1
+        if self.on_evict is not None:
+            self.on_evict(reason)
+        asyncio.ensure_future(self.close(code=1013))
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                if not self._frames:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                _, frame = self._frames.popleft()
+                send = self.ws.send_bytes(frame) if isinstance(frame, bytes) else self.ws.send_text(frame)
+                try:
+                    await asyncio.wait_for(send, self.send_timeout)
+                except asyncio.TimeoutError:
+                    self.evict('таймаут отправки')
+                    return
+                except Exception:
+                    # Соединение уже закрыто: дальнейшие записи бессмысленны
+                    self.closed = True
+                    self._frames.clear()
+                    return
+                self.stats.sent += 1
+        except asyncio.CancelledError:
+            pass
+
+    async def close(self, code: int = 1000):
+        if self.closed and self._writer is None:
+            return
+        self.closed = True
+        self._frames.clear()
+        # Будим писателя: он увидит closed и завершится, даже если отмена будет поглощена wait_for
+        self._ready.set()
+        writer, self._writer = self._writer, None
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+        if code != 1000:
+            try:
+                await asyncio.wait_for(self.ws.close(code=code), self.send_timeout)
+            except Exception:
+                pass
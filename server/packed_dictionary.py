@@ -0,0 +1,313 @@
+"""
+Компактный бинарный формат словаря (.kdict), который открывается через mmap только для чтения.
+
+Формат (little-endian):
+    8 байт    сигнатура b'KDICT2\\0\\0'
+    uint32    количество слов N
+    uint32    количество различных длин L
+    uint32    количество групп индекса анаграмм G
+    uint32    количество слов в индексе анаграмм M
+    L x 3 x uint32   таблица длин: (длина в символах, номер первого слова, номер после последнего)
+    0 или 4 байта    выравнивание до 8 байт
+    G x uint64       маски букв групп (по возрастанию)
+    (G + 1) x uint32 начало каждой группы в массивах индекса (последнее значение - M)
+    (N + 1) x uint32 смещения слов в блоке данных
+    M x uint32       номера слов индекса, сгруппированные по маске букв
+    M x 33 байта     векторы количества букв тех же слов (letter_counts)
+    блок данных: слова в UTF-8 подряд, отсортированы по (длина в символах, байты UTF-8)
+
+Слова одной длины лежат подряд и отсортированы, поэтому проверка наличия - бинарный поиск
+внутри корзины нужной длины, а случайный выбор по длине - обращение по номеру. Индекс
+анаграмм (см. AnagramIndex) тоже собран заранее: при запуске он не строится в памяти
+процесса, а читается из тех же страниц. Файл не разбирается при открытии: несколько
+процессов uvicorn разделяют одни и те же страницы.
+
+Файлы предыдущей версии (KDICT1, без индекса анаграмм) тоже открываются; индекс для них
+строится в памяти, как для текстового словаря.
+
+Сборка:
+    python -m server.packed_dictionary server/resources/russian_words.txt
+"""
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .anagram_index import ALPHABET, letter_counts, letter_mask
+
+MAGIC = b'KDICT2\0\0'
+MAGIC_V1 = b'KDICT1\0\0'
+_HEADER = struct.Struct('<8sIIII')
+_HEADER_V1 = struct.Struct('<8sII')
+_LENGTH_ENTRY = struct.Struct('<III')
+# Размер вектора количества букв
+COUNTS_SIZE = len(ALPHABET)
+
+
+def _align8(position: int) -> int:
+    """Сколько байт добавить, чтобы position делилось на 8."""
+    return -position % 8
+
+
+def build_packed_dictionary(words: Iterable[str], output_path: str) -> int:
+    """Записывает слова в формате .kdict. Возвращает количество записанных слов."""
+    encoded = sorted({word for word in words}, key=lambda w: (len(w), w.encode('utf-8')))
+
+    length_table = []
+    for index, word in enumerate(encoded):
+        if not length_table or length_table[-1][0] != len(word):
+            length_table.append([len(word), index, index])
+        length_table[-1][2] = index + 1
+
+    offsets = [0]
+    blob = bytearray()
+    for word in encoded:
+        blob += word.encode('utf-8')
+        offsets.append(len(blob))
+
+    # Индекс анаграмм: слова из букв алфавита, сгруппированные по маске букв
+    indexed = []
+    for index, word in enumerate(encoded):
+        counts = letter_counts(word)
+        if counts is not None:
+            indexed.append((letter_mask(counts), index, counts))
+    indexed.sort(key=lambda entry: (entry[0], entry[1]))
+    masks: List[int] = []
+    group_starts: List[int] = []
+    for position, (mask, _, _) in enumerate(indexed):
+        if not masks or masks[-1] != mask:
+            masks.append(mask)
+            group_starts.append(position)
+    group_starts.append(len(indexed))
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, len(encoded), len(length_table), len(masks), len(indexed)))
+        for entry in length_table:
+            file.write(_LENGTH_ENTRY.pack(*entry))
+        file.write(bytes(_align8(_HEADER.size + len(length_table) * _LENGTH_ENTRY.size)))
+        file.write(struct.pack(f'<{len(masks)}Q', *masks))
+        file.write(struct.pack(f'<{len(group_starts)}I', *group_starts))
+        file.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        file.write(struct.pack(f'<{len(indexed)}I', *(index for _, index, _ in indexed)))
+        for _, _, counts in indexed:
+            file.write(counts)
+        file.write(blob)
+    # Атомарная замена: работающие процессы продолжают читать старый файл
+    os.replace(tmp_path, output_path)
+    return len(encoded)
+
+
+def build_from_text(source_path: str, output_path: Optional[str] = None) -> str:
+    """Сборка .kdict из текстового словаря (та же фильтрация, что и в Dictionary.load_from_file)."""
+    if output_path is None:
+        output_path = os.path.splitext(source_path)[0] + '.kdict'
+
+    with open(source_path, 'r', encoding='utf-8') as file:
+        words = [line.strip().lower() for line in file]
+    count = build_packed_dictionary((w for w in words if len(w) >= 3), output_path)
+    print(f"Записано {count} слов в {output_path}")
+    return output_path
+
+
+class AnagramTable:
+    """
+    Индекс анаграмм из файла .kdict: группы слов по маске букв и векторы количества букв.
+    Используется AnagramIndex вместо групп в памяти процесса.
+    """
+
+    __slots__ = ('_packed', '_masks', '_group_starts', '_order', '_counts')
+
+    def __init__(self, packed: 'PackedWordSet', masks, group_starts, order, counts_position: int):
+        self._packed = packed
+        self._masks = masks
+        self._group_starts = group_starts
+        self._order = order
+        self._counts = counts_position
+
+    def __len__(self):
+        return len(self._order)
+
+    def candidates(self, main_mask: int) -> Iterator[tuple]:
+        """(номер слова в индексе, вектор количества букв) для групп, чьи буквы все есть в main_mask."""
+        mmap_ = self._packed._mmap
+        starts = self._group_starts
+        for group, mask in enumerate(self._masks):
+            if mask & ~main_mask:
+                continue
+            for position in range(starts[group], starts[group + 1]):
+                offset = self._counts + position * COUNTS_SIZE
+                yield position, mmap_[offset:offset + COUNTS_SIZE]
+
+    def word(self, position: int) -> str:
+        return self._packed.word_at(self._order[position])
+
+
+class _PackedRange:
+    """Слова одной длины: последовательность с доступом по номеру без копирования словаря."""
+
+    __slots__ = ('_packed', '_start', '_end')
+
+    def __init__(self, packed: 'PackedWordSet', start: int, end: int):
+        self._packed = packed
+        self._start = start
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._packed.word_at(self._start + index)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._start, self._end):
+            yield self._packed.word_at(index)
+
+
+class PackedWordSet:
+    """
+    Множество слов поверх mmap файла .kdict. Поддерживает `in`, len() и перебор, как set.
+    Добавленные во время работы слова (add) хранятся в обычном множестве поверх файла.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mmap[:len(MAGIC)]
+        if magic == MAGIC:
+            _, self._count, length_count, group_count, indexed_count = _HEADER.unpack_from(self._mmap, 0)
+            position = _HEADER.size
+        elif magic == MAGIC_V1:
+            _, self._count, length_count = _HEADER_V1.unpack_from(self._mmap, 0)
+            group_count = indexed_count = 0
+            position = _HEADER_V1.size
+        else:
+            self._mmap.close()
+            raise ValueError(f"{path}: неверный формат словаря")
+
+        # длина -> (номер первого слова, номер после последнего)
+        self._ranges: Dict[int, tuple] = {}
+        for _ in range(length_count):
+            length, start, end = _LENGTH_ENTRY.unpack_from(self._mmap, position)
+            self._ranges[length] = (start, end)
+            position += _LENGTH_ENTRY.size
+
+        self._views = []
+        self.anagram_table: Optional[AnagramTable] = None
+        if magic == MAGIC:
+            position += _align8(position)
+            masks = self._array(position, 'Q', group_count)
+            position += group_count * 8
+            group_starts = self._array(position, 'I', group_count + 1)
+            position += (group_count + 1) * 4
+
+        self._offsets = self._array(position, 'I', self._count + 1)
+        position += (self._count + 1) * 4
+
+        if magic == MAGIC:
+            order = self._array(position, 'I', indexed_count)
+            position += indexed_count * 4
+            self.anagram_table = AnagramTable(self, masks, group_starts, order, position)
+            position += indexed_count * COUNTS_SIZE
+        self._data = position
+
+        self._extra = set()
+
+    def _array(self, position: int, code: str, count: int):
+        """Массив чисел из файла без копирования (на big-endian машинах - копия)."""
+        size = struct.calcsize(code) * count
+        view = memoryview(self._mmap)[position:position + size]
+        if sys.byteorder == 'little':
+            array = view.cast(code)
+            self._views.extend((view, array))
+            return array
+        array = struct.unpack(f'<{count}{code}', view)
+        view.release()
+        return array
+
+    def close(self):
+        self.anagram_table = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def _raw(self, index: int) -> bytes:
+        return self._mmap[self._data + self._offsets[index]:self._data + self._offsets[index + 1]]
+
+    def word_at(self, index: int) -> str:
+        return self._raw(index).decode('utf-8')
+
+    def _lower_bound(self, start: int, end: int, key: bytes) -> int:
+        while start < end:
+            middle = (start + end) // 2
+            if self._raw(middle) < key:
+                start = middle + 1
+            else:
+                end = middle
+        return start
+
+    def __contains__(self, word) -> bool:
+        if word in self._extra:
+            return True
+        bounds = self._ranges.get(len(word))
+        if bounds is None:
+            return False
+        key = word.encode('utf-8')
+        index = self._lower_bound(bounds[0], bounds[1], key)
+        return index < bounds[1] and self._raw(index) == key
+
+    def __len__(self):
+        return self._count + len(self._extra)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self.word_at(index)
+        yield from self._extra
+
+    def add(self, word: str):
+        if word not in self:
+            self._extra.add(word)
+
+    def added_words(self) -> set:
+        """Слова, добавленные через add (их нет в файле)."""
+        return self._extra
+
+    def by_length(self) -> Dict[int, _PackedRange]:
+        """Корзины слов по длине (без добавленных через add)."""
+        return {length: _PackedRange(self, start, end) for length, (start, end) in self._ranges.items()}
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        """Слова, начинающиеся с prefix (по корзинам длин, бинарный поиск в каждой)."""
+        key = prefix.encode('utf-8')
+        for length in sorted(self._ranges):
+            if length < len(prefix):
+                continue
+            start, end = self._ranges[length]
+            index = self._lower_bound(start, end, key)
+            while index < end:
+                raw = self._raw(index)
+                if not raw.startswith(key):
+                    break
+                yield raw.decode('utf-8')
+                index += 1
+        for word in self._extra:
+            if word.startswith(prefix):
+                yield word
+
+    def has_prefix(self, prefix: str) -> bool:
+        return next(self.iter_prefix(prefix), None) is not None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Использование: python -m server.packed_dictionary <словарь.txt> [<словарь.kdict>]")
+        sys.exit(1)
+    build_from_text(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
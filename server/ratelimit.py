@@ -0,0 +1,100 @@
+"""
+Ограничение нагрузки от клиентов.
+
+RateLimiter - token bucket на каждый ключ (id игрока, IP): rate запросов в секунду, запас burst.
+Запрос сверх лимита не ставится в очередь, а сразу отклоняется с указанием, через сколько
+секунд можно повторить.
+
+ConcurrencyLimit - неблокирующий предел одновременных операций (например, обращений к
+Wiktionary): если все слоты заняты, операция отклоняется, а не ждет освобождения.
+"""
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        # rate <= 0 - ограничение отключено
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_keys = max_keys
+        # ключ -> [токены, время последнего пополнения]; порядок - давность обращения
+        self._buckets: 'OrderedDict[Hashable, list]' = OrderedDict()
+        # Сколько запросов отклонено
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _bucket(self, key: Hashable, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            # Давно не обращавшиеся ключи вытесняются: их ведро и так почти полное
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def check(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Как acquire, но без списания токенов: позволяет проверить несколько лимитов
+        и списать из всех, только если допускают все.
+        """
+        if self.rate <= 0:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        bucket = self._bucket(key, now)
+        # Запрос дороже запаса допускается при полном ведре (иначе он не прошел бы никогда)
+        needed = min(cost, self.burst)
+        if bucket[0] < needed:
+            self.rejected += 1
+            return (needed - bucket[0]) / self.rate
+        return 0.0
+
+    def acquire(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        0 - запрос допущен, иначе - через сколько секунд можно повторить.
+        cost - стоимость запроса в токенах (например, число слов в пакете). Списывается
+        полностью, даже если больше запаса: ведро уходит в минус, и средняя частота
+        не превышает rate при любом размере пакетов.
+        """
+        if self.rate <= 0:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        retry_after = self.check(key, cost, now)
+        if not retry_after:
+            self._buckets[key][0] -= cost
+        return retry_after
+
+    def forget(self, key: Hashable):
+        self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class ConcurrencyLimit:
+    def __init__(self, limit: int):
+        # limit <= 0 - без ограничения
+        self.limit = limit
+        self.active = 0
+        # Сколько операций отклонено из-за занятых слотов
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if 0 < self.limit <= self.active:
+            self.rejected += 1
+            return False
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
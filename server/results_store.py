@@ -0,0 +1,342 @@
+"""
+Хранилище результатов игр (SQLite) с отложенной записью и таблицами лидеров в памяти.
+
+finish_game только ставит результат в очередь (без обращения к диску). Фоновая задача
+собирает результаты в пакеты (до batch_size или flush_interval секунд) и записывает
+каждый пакет одной транзакцией в отдельном потоке, поэтому event loop не ждет диск.
+
+Таблицы:
+    games         - завершенные игры (комната, основное слово, время, максимум очков);
+    game_players  - результат каждого игрока в игре (история игрока);
+    player_totals - сумма очков игрока за все время;
+    daily_totals  - сумма очков игрока за день (UTC).
+
+Лидерборды (все время и текущий день) - top-K в памяти. Суммы игроков только растут,
+поэтому после записи пакета достаточно обновить в top-K игроков из этого пакета: игрок
+вне top-K, чья сумма не менялась, не может оказаться выше минимального в таблице.
+GET /leaderboard отвечает из памяти без запросов к базе.
+
+В одну базу пишут все шарды (run.py --workers N), а каждый видит в памяти только свои
+пакеты. Поэтому раз в refresh_interval секунд поток базы перечитывает top-K из
+player_totals / daily_totals (запрос по индексу score): через несколько секунд все шарды
+отдают одинаковую таблицу с играми всех шардов.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    room_id TEXT NOT NULL,
+    main_word TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL NOT NULL,
+    possible_words INTEGER NOT NULL,
+    possible_score INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    player_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    words TEXT NOT NULL,
+    place INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_players_player ON game_players(player_id, game_id);
+CREATE TABLE IF NOT EXISTS player_totals (
+    player_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    games INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_totals_score ON player_totals(score);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (day, player_id)
+);
+CREATE INDEX IF NOT EXISTS daily_totals_score ON daily_totals(day, score);
+"""
+
+UPSERT_TOTAL = """
+INSERT INTO player_totals (player_id, username, score, games) VALUES (?, ?, ?, 1)
+ON CONFLICT(player_id) DO UPDATE SET
+    username = excluded.username, score = score + excluded.score, games = games + 1
+RETURNING score, games
+"""
+
+UPSERT_DAILY = """
+INSERT INTO daily_totals (day, player_id, username, score, games) VALUES (?, ?, ?, ?, 1)
+ON CONFLICT(day, player_id) DO UPDATE SET
+    username = excluded.username, score = score + excluded.score, games = games + 1
+RETURNING score, games
+"""
+
+
+def utc_day(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+
+
+class Leaderboard:
+    """Top-K игроков по сумме очков; суммы только растут."""
+
+    def __init__(self, size: int):
+        self.size = size
+        # id игрока -> (очки, игр, имя)
+        self._entries: Dict[str, tuple] = {}
+        self._sorted: Optional[List[dict]] = None
+
+    def update(self, player_id: str, username: str, score: int, games: int):
+        entries = self._entries
+        if player_id not in entries and len(entries) >= self.size:
+            lowest = min(entries, key=lambda pid: entries[pid][0])
+            if score <= entries[lowest][0]:
+                return
+            del entries[lowest]
+        entries[player_id] = (score, games, username)
+        self._sorted = None
+
+    def top(self, limit: Optional[int] = None) -> List[dict]:
+        if self._sorted is None:
+            ranked = sorted(self._entries.items(), key=lambda item: -item[1][0])
+            self._sorted = [
+                {'rank': rank, 'playerId': pid, 'username': username, 'score': score, 'games': games}
+                for rank, (pid, (score, games, username)) in enumerate(ranked, 1)
+            ]
+        return self._sorted if limit is None else self._sorted[:limit]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResultsStore:
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 1.0,
+                 queue_size: int = 10000, leaderboard_size: int = 100, refresh_interval: float = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # 0 - лидерборды только по своим пакетам (без перечитывания из базы)
+        self.refresh_interval = refresh_interval
+        self.all_time = Leaderboard(leaderboard_size)
+        self.daily = Leaderboard(leaderboard_size)
+        self.day = utc_day(time.time())
+        self._queue: Optional[asyncio.Queue] = None
+        self._queue_size = queue_size
+        self._writer: Optional[asyncio.Task] = None
+        # Один поток: соединение SQLite используется только в нем, транзакции не пересекаются
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='results-db')
+        self._db: Optional[sqlite3.Connection] = None
+        # Счетчики для метрик
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        # Наблюдатель за записью пакетов (метрики): размер пакета и длительность в секундах
+        self.observer = None
+
+    async def _run_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def start(self):
+        if self._writer is not None:
+            return
+        all_time, daily = await self._run_db(self._open, self.day, self.all_time.size)
+        self._load_leaderboards(self.day, all_time, daily)
+        self._queue = asyncio.Queue(self._queue_size)
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        """Остановка с записью всего, что осталось в очереди."""
+        if self._writer is not None:
+            # None - признак остановки: писатель записывает накопленное и завершается
+            await self._queue.put(None)
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+            self._queue = None
+        if self._db is not None:
+            await self._run_db(self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=True)
+
+    def __len__(self):
+        """Результатов в очереди на запись."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def record_game(self, game: dict):
+        """
+        Постановка результата игры в очередь записи (без ожидания). game:
+        roomId, mainWord, startedAt, finishedAt, possibleWords, possibleScore,
+        players - [{playerId, username, score, words}] в порядке мест.
+        """
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(game)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning('results_queue_full', room=game.get('roomId'))
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        next_refresh = loop.time() + self.refresh_interval
+        stopping = False
+        while not stopping:
+            if self.refresh_interval > 0 and loop.time() >= next_refresh:
+                await self._refresh()
+                next_refresh = loop.time() + self.refresh_interval
+            try:
+                if self.refresh_interval > 0:
+                    # Без новых игр просыпаемся к следующему перечитыванию лидербордов
+                    game = await asyncio.wait_for(self._queue.get(), max(0.0, next_refresh - loop.time()))
+                else:
+                    game = await self._queue.get()
+            except asyncio.TimeoutError:
+                continue
+            if game is None:
+                return
+            batch = [game]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    game = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if game is None:
+                    stopping = True
+                    break
+                batch.append(game)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]):
+        started = time.perf_counter()
+        try:
+            totals = await self._run_db(self._write_batch, batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error('results_write_failed', games=len(batch), error=repr(e))
+            return
+        self.written += len(batch)
+        if self.observer is not None:
+            self.observer(len(batch), time.perf_counter() - started)
+
+        today = utc_day(time.time())
+        if today != self.day:
+            # Новые сутки: дневная таблица начинается заново
+            self.day = today
+            self.daily = Leaderboard(self.daily.size)
+        for player_id, username, score, games, day, day_score, day_games in totals:
+            self.all_time.update(player_id, username, score, games)
+            if day == self.day:
+                self.daily.update(player_id, username, day_score, day_games)
+
+    def _load_leaderboards(self, day: str, all_time: list, daily: list):
+        # Новые таблицы подставляются целиком: GET /leaderboard не видит частично заполненную
+        board = Leaderboard(self.all_time.size)
+        for row in all_time:
+            board.update(*row)
+        daily_board = Leaderboard(self.daily.size)
+        for row in daily:
+            daily_board.update(*row)
+        self.day, self.all_time, self.daily = day, board, daily_board
+
+    async def _refresh(self):
+        """Перечитывание top-K из базы (в ней и результаты, записанные другими шардами)."""
+        day = utc_day(time.time())
+        try:
+            all_time, daily = await self._run_db(self._read_top, day, self.all_time.size)
+        except Exception as e:
+            logger.error('leaderboard_refresh_failed', error=repr(e))
+            return
+        self._load_leaderboards(day, all_time, daily)
+
+    # Методы ниже выполняются в потоке базы
+
+    def _open(self, day: str, limit: int) -> tuple:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        # Несколько процессов-шардов пишут в один файл: ждем блокировку, а не падаем
+        self._db.execute('PRAGMA busy_timeout=5000')
+        self._db.executescript(SCHEMA)
+        return self._read_top(day, limit)
+
+    def _read_top(self, day: str, limit: int) -> tuple:
+        all_time = self._db.execute(
+            'SELECT player_id, username, score, games FROM player_totals ORDER BY score DESC LIMIT ?',
+            (limit,)).fetchall()
+        daily = self._db.execute(
+            'SELECT player_id, username, score, games FROM daily_totals WHERE day = ? '
+            'ORDER BY score DESC LIMIT ?', (day, limit)).fetchall()
+        return all_time, daily
+
+    def _write_batch(self, batch: List[dict]) -> list:
+        """Запись пакета одной транзакцией; возвращает новые суммы игроков из пакета."""
+        totals = []
+        with self._db:
+            for game in batch:
+                cursor = self._db.execute(
+                    'INSERT INTO games (room_id, main_word, started_at, finished_at, possible_words, possible_score) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (game['roomId'], game['mainWord'], game.get('startedAt'), game['finishedAt'],
+                     game['possibleWords'], game['possibleScore']))
+                game_id = cursor.lastrowid
+                day = utc_day(game['finishedAt'])
+                for place, player in enumerate(game['players'], 1):
+                    self._db.execute(
+                        'INSERT INTO game_players (game_id, player_id, username, score, words, place) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (game_id, player['playerId'], player['username'], player['score'],
+                         ' '.join(player['words']), place))
+                    score, games = self._db.execute(
+                        UPSERT_TOTAL, (player['playerId'], player['username'], player['score'])).fetchone()
+                    day_score, day_games = self._db.execute(
+                        UPSERT_DAILY, (day, player['playerId'], player['username'], player['score'])).fetchone()
+                    totals.append((player['playerId'], player['username'], score, games,
+                                   day, day_score, day_games))
+        return totals
+
+    def _read_history(self, player_id: str, limit: int) -> List[dict]:
+        rows = self._db.execute(
+            'SELECT g.id, g.main_word, g.finished_at, g.possible_score, p.score, p.words, p.place, '
+            '(SELECT COUNT(*) FROM game_players WHERE game_id = g.id) '
+            'FROM game_players p JOIN games g ON g.id = p.game_id '
+            'WHERE p.player_id = ? ORDER BY p.game_id DESC LIMIT ?', (player_id, limit)).fetchall()
+        return [{
+            'gameId': game_id,
+            'mainWord': main_word,
+            'finishedAt': finished_at,
+            'possibleScore': possible_score,
+            'score': score,
+            'words': words.split() if words else [],
+            'place': place,
+            'players': players
+        } for game_id, main_word, finished_at, possible_score, score, words, place, players in rows]
+
+    async def history(self, player_id: str, limit: int = 20) -> List[dict]:
+        """Последние игры игрока (чтение в потоке базы; только что сыгранные могут быть еще в очереди)."""
+        if self._db is None:
+            return []
+        return await self._run_db(self._read_history, player_id, limit)
+
+    def leaderboard(self, period: str = 'all', limit: Optional[int] = None) -> List[dict]:
+        if period == 'daily':
+            if utc_day(time.time()) != self.day:
+                return []
+            return self.daily.top(limit)
+        return self.all_time.top(limit)
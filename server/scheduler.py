@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# Задача по таймеру: корутинная функция без аргументов
+Job = Callable[[], Awaitable[None]]
+
+
+class DeadlineScheduler:
+    """
+    Планировщик задач по сроку: куча (heap) с ключом по времени срабатывания.
+
+    Одна фоновая корутина спит ровно до ближайшего срока (без периодического опроса),
+    поэтому в простое планировщик ничего не стоит. Задачи адресуются ключом
+    (например, ('game_end', room_id)): повторное планирование с тем же ключом переносит
+    срок, cancel() - отменяет. Отмененные записи остаются в куче и пропускаются при извлечении.
+    """
+
+    def __init__(self):
+        # (срок, порядковый номер, ключ)
+        self._heap = []
+        # ключ -> (срок, порядковый номер, задача); номер отличает актуальную запись от устаревших
+        self._jobs: Dict[Hashable, tuple] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._running_jobs = set()
+
+    def start(self):
+        if self._runner is None:
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        for task in list(self._running_jobs):
+            task.cancel()
+        await asyncio.gather(*self._running_jobs, return_exceptions=True)
+
+    @staticmethod
+    def now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def schedule(self, key: Hashable, when: float, job: Job):
+        """Запланировать задачу на момент when (время event loop). Заменяет задачу с тем же ключом."""
+        seq = next(self._counter)
+        self._jobs[key] = (when, seq, job)
+        heapq.heappush(self._heap, (when, seq, key))
+        # Новый срок раньше текущего ближайшего - будим фоновую корутину
+        if self._wakeup is not None and self._heap[0][1] == seq:
+            self._wakeup.set()
+
+    def schedule_in(self, key: Hashable, delay: float, job: Job):
+        self.schedule(key, self.now() + delay, job)
+
+    def cancel(self, key: Hashable) -> bool:
+        return self._jobs.pop(key, None) is not None
+
+    def is_scheduled(self, key: Hashable) -> bool:
+        return key in self._jobs
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        job = self._jobs.get(key)
+        return job[0] if job else None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def _is_current(self, entry: tuple) -> bool:
+        job = self._jobs.get(entry[2])
+        return job is not None and job[1] == entry[1]
+
+    async def _run(self):
+        while True:
+            # Убираем с вершины отмененные и перенесенные записи
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - self.now()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            _, _, job = self._jobs.pop(key)
+            # Каждая задача выполняется отдельно: медленная задача не задерживает следующие сроки
+            task = asyncio.create_task(self._execute(key, job))
+            self._running_jobs.add(task)
+            task.add_done_callback(self._running_jobs.discard)
+
+    @staticmethod
+    async def _execute(key: Hashable, job: Job):
+        try:
+            await job()
+        except Exception as e:
+            logger.error('scheduler_job_failed', key=key, error=repr(e))
@@ -0,0 +1,143 @@
+"""
+Разбиение комнат по нескольким процессам (шардам).
+
+Каждая комната принадлежит ровно одному шарду: номер шарда вычисляется по room_id.
+Шарды общаются через локальную шину сообщений (запрос -> ответ в JSON):
+  - UnixSocketBus: Unix-сокеты между процессами (боевой режим, см. run.py --workers);
+  - LocalBus: брокер внутри одного процесса (замена для проверки логики без процессов).
+"""
+import asyncio
+import json
+import os
+import uuid
+import zlib
+from typing import Awaitable, Callable, Dict, Optional
+
+# Обработчик запросов шины: сообщение -> ответ
+BusHandler = Callable[[dict], Awaitable[dict]]
+
+
+class BusError(Exception):
+    """Шард недоступен или не ответил вовремя."""
+
+
+def shard_for_room(room_id: str, shard_count: int) -> int:
+    """Номер шарда, которому принадлежит комната (стабилен между процессами)."""
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(room_id.encode('utf-8')) % shard_count
+
+
+def new_room_id() -> str:
+    return str(uuid.uuid4())[:8]
+
+
+class LocalBroker:
+    """Брокер внутри одного процесса: хранит обработчики шардов."""
+
+    def __init__(self):
+        self.handlers: Dict[int, BusHandler] = {}
+
+
+class LocalBus:
+    """Шина поверх LocalBroker (все шарды в одном процессе)."""
+
+    def __init__(self, broker: LocalBroker, shard_index: int):
+        self.broker = broker
+        self.shard_index = shard_index
+
+    async def start(self, handler: BusHandler):
+        self.broker.handlers[self.shard_index] = handler
+
+    async def request(self, shard: int, message: dict) -> dict:
+        handler = self.broker.handlers.get(shard)
+        if handler is None:
+            raise BusError(f"Шард {shard} недоступен")
+        return await handler(message)
+
+    async def close(self):
+        self.broker.handlers.pop(self.shard_index, None)
+
+
+class UnixSocketBus:
+    """
+    Шина между процессами: каждый шард слушает свой Unix-сокет, запросы и ответы -
+    строки JSON. К каждому соседу держится одно постоянное соединение.
+    """
+
+    def __init__(self, shard_index: int, socket_dir: str, timeout: float = 2.0):
+        self.shard_index = shard_index
+        self.socket_dir = socket_dir
+        self.timeout = timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handler: Optional[BusHandler] = None
+        # шард -> (reader, writer)
+        self._peers: Dict[int, tuple] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def socket_path(self, shard: int) -> str:
+        return os.path.join(self.socket_dir, f'ksis-shard-{shard}.sock')
+
+    async def start(self, handler: BusHandler):
+        self._handler = handler
+        path = self.socket_path(self.shard_index)
+        if os.path.exists(path):
+            os.unlink(path)  # сокет от прошлого запуска
+        self._server = await asyncio.start_unix_server(self._serve, path=path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self._handler(json.loads(line))
+                except Exception as e:
+                    response = {'error': str(e)}
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _connect(self, shard: int) -> tuple:
+        peer = self._peers.get(shard)
+        if peer is None:
+            peer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path(shard)), self.timeout)
+            self._peers[shard] = peer
+        return peer
+
+    async def request(self, shard: int, message: dict) -> dict:
+        lock = self._locks.setdefault(shard, asyncio.Lock())
+        async with lock:
+            # Одна повторная попытка: постоянное соединение могло оборваться (перезапуск шарда)
+            for attempt in range(2):
+                try:
+                    reader, writer = await self._connect(shard)
+                    writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+                    await writer.drain()
+                    line = await asyncio.wait_for(reader.readline(), self.timeout)
+                    if not line:
+                        raise ConnectionError('соединение закрыто')
+                    return json.loads(line)
+                except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                    peer = self._peers.pop(shard, None)
+                    if peer is not None:
+                        peer[1].close()
+                    if attempt:
+                        raise BusError(f"Шард {shard} недоступен: {e}")
+
+    async def close(self):
+        for _, writer in self._peers.values():
+            writer.close()
+        self._peers.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            path = self.socket_path(self.shard_index)
+            if os.path.exists(path):
+                os.unlink(path)
@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class VerdictCache:
+    """
+    Общий кэш вердиктов проверки слов (LRU с ограничением размера и TTL).
+
+    Хранит как положительные, так и отрицательные результаты; для них задаются
+    отдельные сроки жизни. Ведет счетчики попаданий, промахов и вытеснений.
+    """
+
+    def __init__(self, max_size: int = 50000, positive_ttl: float = 86400.0, negative_ttl: float = 3600.0):
+        self.max_size = max_size
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        # слово -> (вердикт, момент истечения)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(word: str) -> str:
+        return word.strip().lower()
+
+    def get(self, word: str) -> Optional[bool]:
+        """Возвращает закэшированный вердикт или None, если его нет (или он устарел)."""
+        key = self._key(word)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        verdict, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return verdict
+
+    def set(self, word: str, verdict: bool):
+        key = self._key(word)
+        ttl = self.positive_ttl if verdict else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (verdict, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'maxSize': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hitRate': round(self.hit_rate(), 4)
+        }
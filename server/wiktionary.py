@@ -0,0 +1,172 @@
+import ssl
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import aiohttp
+import certifi
+
+from . import config
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+class WiktionaryError(Exception):
+    """Ни один из Викисловарей не ответил (сеть, таймаут, ошибка HTTP)."""
+
+
+def _create_ssl_context() -> ssl.SSLContext:
+    try:
+        return ssl.create_default_context(cafile=certifi.where())
+    except Exception:
+        # Если certifi недоступен, создаем контекст без проверки сертификатов (небезопасно, но работает)
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+
+
+# Максимум заголовков в одном запросе action=query для обычных клиентов API
+MAX_TITLES_PER_QUERY = 50
+
+
+class WiktionaryClient:
+    """
+    Долгоживущий HTTP клиент для API Викисловаря.
+
+    Одна сессия aiohttp на все время жизни приложения: SSL контекст создается один раз,
+    соединения переиспользуются (keep-alive) и ограничены по количеству на хост.
+    Адрес API задается шаблоном с {lang}, поэтому вместо Wiktionary можно подставить
+    локальный тестовый сервер (см. tools/stub_wiktionary.py).
+    """
+
+    def __init__(self, api_url: str = config.WIKTIONARY_API_URL,
+                 languages: Sequence[str] = ('ru', 'en'),
+                 timeout: float = config.WIKTIONARY_TIMEOUT,
+                 limit_per_host: int = config.WIKTIONARY_LIMIT_PER_HOST,
+                 keepalive_timeout: float = config.WIKTIONARY_KEEPALIVE):
+        self.api_url = api_url
+        self.languages = tuple(languages)
+        self.timeout = timeout
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            ssl=_create_ssl_context(),
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'User-Agent': config.WIKTIONARY_USER_AGENT}
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Если start() не вызывали (например, в скриптах), создаем сессию при первом запросе
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def lookup(self, word: str) -> bool:
+        """
+        Есть ли страница для слова хотя бы в одном Викисловаре.
+        Бросает WiktionaryError, если ни один источник не дал ответа.
+        """
+        session = await self._get_session()
+        answered = False
+
+        for lang in self.languages:
+            url = self.api_url.format(lang=lang)
+            params = {
+                'action': 'query',
+                'format': 'json',
+                'titles': word,
+                'prop': 'info'
+            }
+
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status != 200:
+                        continue
+                    data = await response.json(content_type=None)
+            except Exception as e:
+                logger.warning('wiktionary_lookup_failed', lang=lang, word=word, error=repr(e))
+                continue
+
+            answered = True
+            pages = data.get("query", {}).get("pages", {})
+            for page_id, page_info in pages.items():
+                if page_id != "-1" and 'missing' not in page_info:
+                    return True
+
+        if not answered:
+            raise WiktionaryError(f"Викисловарь недоступен для слова '{word}'")
+        return False
+
+    async def lookup_many(self, words: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """
+        Пакетная проверка: одним запросом titles=a|b|c (до 50 слов) на каждый язык.
+        Возвращает вердикт для каждого слова; None - ни один Викисловарь не ответил.
+        """
+        session = await self._get_session()
+        words = list(dict.fromkeys(words))
+        # '|' - разделитель заголовков: такое слово превратилось бы в несколько заголовков
+        verdicts: Dict[str, Optional[bool]] = {word: False if '|' in word else None for word in words}
+        pending: List[str] = [word for word in words if verdicts[word] is None]
+
+        for lang in self.languages:
+            if not pending:
+                break
+            url = self.api_url.format(lang=lang)
+            not_found = []
+
+            for start in range(0, len(pending), MAX_TITLES_PER_QUERY):
+                chunk = pending[start:start + MAX_TITLES_PER_QUERY]
+                params = {
+                    'action': 'query',
+                    'format': 'json',
+                    'titles': '|'.join(chunk),
+                    'prop': 'info'
+                }
+
+                try:
+                    async with session.get(url, params=params) as response:
+                        if response.status != 200:
+                            not_found.extend(chunk)
+                            continue
+                        data = await response.json(content_type=None)
+                except Exception as e:
+                    logger.warning('wiktionary_batch_failed', lang=lang, words=len(chunk), error=repr(e))
+                    not_found.extend(chunk)
+                    continue
+
+                query = data.get("query", {})
+                # API может нормализовать заголовки (например, '_' -> ' ')
+                normalized = {item.get('to'): item.get('from') for item in query.get('normalized', [])}
+                found = set()
+                for page_id, page_info in query.get("pages", {}).items():
+                    if page_id.startswith('-') or 'missing' in page_info:
+                        continue
+                    title = page_info.get('title', '')
+                    found.add(normalized.get(title, title))
+
+                for word in chunk:
+                    if word in found:
+                        verdicts[word] = True
+                    else:
+                        verdicts[word] = False
+                        not_found.append(word)
+
+            pending = not_found
+
+        return verdicts
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .anagram_index import letter_counts
+from .dictionary import Dictionary
+from .log import get_logger
+from .ratelimit import ConcurrencyLimit
+from .verdict_cache import VerdictCache
+
+
+# Удаленный источник: корутина, получающая нормализованное слово и возвращающая вердикт
+RemoteLookup = Callable[[str], Awaitable[bool]]
+# Пакетный удаленный источник: список слов -> вердикт по каждому (None - нет ответа)
+RemoteBatchLookup = Callable[[List[str]], Awaitable[Dict[str, Optional[bool]]]]
+# Наблюдатель за проверками (метрики): источник вердикта и длительность в секундах
+Observer = Callable[[str, float], None]
+
+logger = get_logger(__name__)
+
+
+class RemoteLookupBusy(Exception):
+    """Все слоты удаленной проверки заняты: слово не проверено, запрос можно повторить позже."""
+
+
+class WordValidator:
+    """
+    Проверка существования слова.
+
+    Сначала слово ищется в локальном словаре (загружен в память, ответ за микросекунды
+    и без сети). Удаленный источник (например, Wiktionary) подключается опционально
+    и используется только для слов, которых нет в локальном словаре. Его вердикты
+    сохраняются в общем кэше, а одновременные запросы одного и того же слова
+    (из любых комнат) объединяются в один.
+    """
+
+    def __init__(self, dictionary: Dictionary, remote_lookup: Optional[RemoteLookup] = None,
+                 fail_open: bool = False, cache: Optional[VerdictCache] = None,
+                 remote_batch_lookup: Optional[RemoteBatchLookup] = None,
+                 observer: Optional[Observer] = None, remote_limit: Optional[ConcurrencyLimit] = None):
+        self.dictionary = dictionary
+        self.remote_lookup = remote_lookup
+        self.remote_batch_lookup = remote_batch_lookup
+        self.cache = cache
+        # Источники вердикта: local, cache, remote, rejected (короткое или недопустимое слово /
+        # нет удаленного источника),
+        # busy (удаленная проверка отклонена из-за предела), batch
+        self.observer = observer
+        # Предел одновременных удаленных запросов (одиночный или пакетный запрос занимает один слот)
+        self.remote_limit = remote_limit
+        # Вердикт на случай ошибки удаленного источника: False - слово отклоняется (по умолчанию),
+        # True - принимается, чтобы недоступность источника не останавливала игру
+        self.fail_open = fail_open
+        # Выполняющиеся удаленные проверки: слово -> задача
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Сколько проверок присоединилось к уже выполняющемуся запросу
+        self.coalesced = 0
+
+    @staticmethod
+    def normalize(word: str) -> str:
+        return word.strip().lower() if word else ''
+
+    def check_local(self, word: str) -> bool:
+        """Синхронная проверка только по локальному словарю."""
+        return self.dictionary.contains(self.normalize(word))
+
+    def remote_eligible(self, word: str) -> bool:
+        """
+        Имеет ли смысл спрашивать удаленный источник: только русские буквы и не длиннее
+        самого длинного слова словаря. Остальное (цифры, пробелы, '|' - разделитель заголовков
+        в запросе к Wiktionary) отклоняется без сетевого запроса.
+        """
+        return len(word) <= self.dictionary.max_word_length() and letter_counts(word) is not None
+
+    def _observe(self, source: str, started: float):
+        if self.observer is not None:
+            self.observer(source, time.perf_counter() - started)
+
+    async def validate(self, word: str) -> bool:
+        started = time.perf_counter()
+        word = self.normalize(word)
+        if len(word) < 2:
+            self._observe('rejected', started)
+            return False
+
+        if self.check_local(word):
+            self._observe('local', started)
+            return True
+
+        if self.remote_lookup is None or not self.remote_eligible(word):
+            self._observe('rejected', started)
+            return False
+
+        if self.cache is not None:
+            cached = self.cache.get(word)
+            if cached is not None:
+                self._observe('cache', started)
+                return cached
+
+        task = self._inflight.get(word)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            if not self._acquire_remote():
+                self._observe('busy', started)
+                raise RemoteLookupBusy(word)
+            task = self._start_remote(self._lookup_remote(word))
+            self._register_inflight(word, task)
+
+        # shield: отмена одного ожидающего не должна отменять общий запрос
+        verdict = await asyncio.shield(task)
+        self._observe('remote', started)
+        return verdict
+
+    def _acquire_remote(self) -> bool:
+        return self.remote_limit is None or self.remote_limit.try_acquire()
+
+    def _start_remote(self, coro) -> asyncio.Future:
+        """Запуск удаленного запроса, слот которого уже занят; слот освобождается по завершении."""
+        task = asyncio.ensure_future(coro)
+        if self.remote_limit is not None:
+            task.add_done_callback(lambda _: self.remote_limit.release())
+        return task
+
+    async def _lookup_remote(self, word: str) -> bool:
+        try:
+            verdict = await self.remote_lookup(word)
+        except Exception as e:
+            logger.warning('remote_lookup_failed', word=word, error=repr(e))
+            # Вердикт по ошибке не кэшируем
+            return self.fail_open
+
+        if self.cache is not None:
+            self.cache.set(word, verdict)
+        return verdict
+
+    async def validate_many(self, words: Iterable[str]) -> List[bool]:
+        """
+        Пакетная проверка: вердикт для каждого слова в исходном порядке.
+        Слова, которых нет ни в словаре, ни в кэше, проверяются одним пакетным запросом
+        (если источник его поддерживает), иначе - параллельно по одному.
+        Если для удаленной проверки нет свободного слота - RemoteLookupBusy.
+        """
+        started = time.perf_counter()
+        words = [self.normalize(word) for word in words]
+        verdicts: Dict[str, bool] = {}
+        waiting: Dict[str, asyncio.Task] = {}
+        pending: List[str] = []
+
+        for word in dict.fromkeys(words):
+            if len(word) < 2:
+                verdicts[word] = False
+            elif self.check_local(word):
+                verdicts[word] = True
+            elif self.remote_lookup is None or not self.remote_eligible(word):
+                verdicts[word] = False
+            else:
+                cached = self.cache.get(word) if self.cache is not None else None
+                if cached is not None:
+                    verdicts[word] = cached
+                elif word in self._inflight:
+                    self.coalesced += 1
+                    waiting[word] = self._inflight[word]
+                else:
+                    pending.append(word)
+
+        if pending:
+            if self.remote_batch_lookup is not None:
+                if not self._acquire_remote():
+                    self._observe('busy', started)
+                    raise RemoteLookupBusy(pending[0])
+                batch = self._start_remote(self._lookup_remote_batch(pending))
+                for word in pending:
+                    task = asyncio.ensure_future(self._from_batch(batch, word))
+                    self._register_inflight(word, task)
+                    waiting[word] = task
+            else:
+                for word in pending:
+                    waiting[word] = asyncio.ensure_future(self.validate(word))
+
+        if waiting:
+            results = await asyncio.shield(asyncio.gather(*waiting.values(), return_exceptions=True))
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            verdicts.update(zip(waiting.keys(), results))
+
+        self._observe('batch', started)
+        return [verdicts[word] for word in words]
+
+    def _register_inflight(self, word: str, task: asyncio.Task):
+        self._inflight[word] = task
+        task.add_done_callback(lambda _, w=word: self._inflight.pop(w, None))
+
+    @staticmethod
+    async def _from_batch(batch: asyncio.Task, word: str) -> bool:
+        return (await batch)[word]
+
+    async def _lookup_remote_batch(self, words: List[str]) -> Dict[str, bool]:
+        try:
+            answers = await self.remote_batch_lookup(words)
+        except Exception as e:
+            logger.warning('remote_batch_failed', words=len(words), error=repr(e))
+            return {word: self.fail_open for word in words}
+
+        verdicts = {}
+        for word in words:
+            verdict = answers.get(word)
+            if verdict is None:
+                # Источник не ответил по слову - вердикт по ошибке не кэшируем
+                verdicts[word] = self.fail_open
+                continue
+            if self.cache is not None:
+                self.cache.set(word, verdict)
+            verdicts[word] = verdict
+        return verdicts
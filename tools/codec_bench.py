@@ -0,0 +1,84 @@
+"""
+Сравнение кодеков WebSocket-сообщений (server/codec.py): время кодирования и разбора
+одного сообщения и размер кадра для типичных сообщений игры.
+
+    python tools/codec_bench.py --players 4 --words 40
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import codec  # noqa: E402
+
+
+def sample_messages(players: int, words: int) -> dict:
+    user_words = [f'слово{i}' for i in range(words)]
+    return {
+        'GAME_STATE': {'type': 'GAME_STATE', 'seq': 42, 'state': {
+            'mainWord': 'программирование',
+            'availableCells': 20,
+            'timeLeft': 187,
+            'roomId': '3f2a9c1e',
+            'status': 'playing',
+            'possibleWords': 312,
+            'possibleScore': 1684,
+            'score': 5 * words,
+            'userWords': user_words,
+            'opponents': [
+                {'username': f'Игрок {i}', 'score': 5 * words, 'wordsCount': words, 'playerId': f'p{i}'}
+                for i in range(players - 1)
+            ]
+        }},
+        'GAME_DELTA': {'type': 'GAME_DELTA', 'seq': 43, 'ops': [
+            {'op': 'word_added', 'playerId': 'p0', 'word': 'программа'},
+            {'op': 'score_changed', 'playerId': 'p0', 'score': 5 * words + 9, 'wordsCount': words + 1}
+        ]},
+        'SUBMIT_WORD': {'type': 'SUBMIT_WORD', 'word': 'программа'}
+    }
+
+
+def stdlib_json():
+    # Как было до server/codec.py: WebSocket.send_json / receive_json
+    return (lambda data: json.dumps(data, ensure_ascii=False, separators=(',', ':')), json.loads)
+
+
+def measure(encode, decode, message, number: int) -> dict:
+    frame = encode(message)
+    encode_time = min(timeit.repeat(lambda: encode(message), number=number, repeat=3)) / number
+    decode_time = min(timeit.repeat(lambda: decode(frame), number=number, repeat=3)) / number
+    size = len(frame.encode('utf-8')) if isinstance(frame, str) else len(frame)
+    return {
+        'encodeUs': round(encode_time * 1e6, 3),
+        'decodeUs': round(decode_time * 1e6, 3),
+        'bytes': size
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скорость и размер кадров кодеков')
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--words', type=int, default=40)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    codecs = {'json-stdlib': stdlib_json()}
+    if codec.orjson is not None:
+        codecs['json-orjson'] = (codec.JSON.encode, codec.JSON.decode)
+    if codec.MSGPACK is not None:
+        codecs['msgpack'] = (codec.MSGPACK.encode, codec.MSGPACK.decode)
+
+    result = {}
+    for name, message in sample_messages(args.players, args.words).items():
+        result[name] = {
+            codec_name: measure(encode, decode, message, args.number)
+            for codec_name, (encode, decode) in codecs.items()
+        }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
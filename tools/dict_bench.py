@@ -0,0 +1,261 @@
+"""
+Микробенчмарки словаря и проверки слов на синтетических словарях (по умолчанию 10k, 100k, 1M слов).
+
+Замеры для каждого размера (каждый размер - в отдельном процессе, чтобы пиковая память
+не смешивалась):
+  - загрузка текстового словаря и .kdict (Dictionary.load_from_file / load_packed);
+  - выбор случайного слова (get_random_word) и filter_words_by_length;
+  - проверка наличия (contains, половина слов отсутствует) и check_word с основным словом;
+  - can_make_word и поиск всех подслов (AnagramIndex.solutions) для основных слов разной длины,
+    в том числе по индексу, собранному в .kdict;
+  - пиковый RSS процесса.
+
+Сравнение с сохраненным прогоном: код возврата 1, если какая-то метрика ухудшилась больше порога.
+
+    python tools/dict_bench.py --save-baseline bench.json
+    python tools/dict_bench.py --baseline bench.json --threshold 0.25
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server.anagram_index import ALPHABET, AnagramIndex, can_make_word  # noqa: E402
+from server.dictionary import Dictionary  # noqa: E402
+from server.packed_dictionary import MAGIC, build_packed_dictionary  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+MAIN_WORD_LENGTHS = (6, 10, 14, 18)
+# Примерные частоты букв русского текста (на 1000 букв)
+LETTER_WEIGHTS = {
+    'о': 110, 'е': 85, 'а': 80, 'и': 74, 'н': 67, 'т': 63, 'с': 55, 'р': 47, 'в': 45, 'л': 44,
+    'к': 35, 'м': 32, 'д': 30, 'п': 28, 'у': 26, 'я': 20, 'ы': 19, 'ь': 17, 'г': 17, 'з': 16,
+    'б': 16, 'ч': 14, 'й': 12, 'х': 10, 'ж': 9, 'ш': 7, 'ю': 6, 'ц': 5, 'щ': 4, 'э': 3,
+    'ф': 3, 'ъ': 1, 'ё': 1
+}
+# Метрики, по которым проверяется регрессия (меньше - лучше)
+TRACKED = ('loadTextSec', 'loadPackedSec', 'randomWordUs', 'filterByLengthMs', 'containsUs',
+           'checkWordUs', 'indexBuildSec', 'packedIndexBuildSec', 'canMakeWordUs', 'solutionsMs',
+           'packedSolutionsMs', 'peakRssMb')
+# Шум замера в единицах метрики (по суффиксу имени): меньший рост не считается регрессией
+NOISE_FLOORS = {'Sec': 0.001, 'Ms': 0.05, 'Us': 0.5, 'Mb': 2.0}
+
+
+def generate_lexicon(size: int, seed: int = 1) -> list:
+    """Детерминированный синтетический словарь: длины 3..18, буквы с частотами русского языка."""
+    rng = random.Random(seed)
+    letters = list(LETTER_WEIGHTS)
+    weights = [LETTER_WEIGHTS[char] for char in letters]
+    lengths = list(range(3, 19))
+    length_weights = [max(1, 12 - abs(length - 8)) for length in lengths]
+    words = set()
+    while len(words) < size:
+        length = rng.choices(lengths, length_weights)[0]
+        words.add(''.join(rng.choices(letters, weights, k=length)))
+    return sorted(words)
+
+
+def is_current_format(path: str) -> bool:
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def prepare(size: int, workdir: str) -> tuple:
+    """Текстовый словарь и .kdict нужного размера (создаются один раз и переиспользуются)."""
+    os.makedirs(workdir, exist_ok=True)
+    text_path = os.path.join(workdir, f'lexicon-{size}.txt')
+    packed_path = os.path.join(workdir, f'lexicon-{size}.kdict')
+    if not os.path.exists(text_path):
+        words = generate_lexicon(size)
+        with open(text_path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write('\n'.join(words) + '\n')
+        os.replace(text_path + '.tmp', text_path)
+    if not os.path.exists(packed_path) or os.path.getmtime(packed_path) < os.path.getmtime(text_path) \
+            or not is_current_format(packed_path):
+        with open(text_path, encoding='utf-8') as file:
+            build_packed_dictionary((line.strip() for line in file if len(line.strip()) >= 3), packed_path)
+    return text_path, packed_path
+
+
+def per_call(func, iterations: int, repeat: int = 3) -> float:
+    """Лучшее из repeat среднее время одного вызова, секунд."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, (time.perf_counter() - started) / iterations)
+    return best
+
+
+def timed(func) -> tuple:
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def run_size(size: int, workdir: str) -> dict:
+    text_path, packed_path = prepare(size, workdir)
+    rng = random.Random(2)
+
+    dictionary, load_text = timed(lambda: Dictionary(text_path))
+    packed, load_packed = timed(lambda: Dictionary(packed_path))
+    packed.get_random_word(10, 14)  # индекс длин строится при первом выборе
+
+    words = list(dictionary.words)
+    present = rng.sample(words, 1000)
+    absent = [''.join(rng.sample(ALPHABET, len(w))) for w in present]
+    probes = present + absent
+    probe_iter = itertools.cycle(probes)
+
+    main_words = {}
+    for length in MAIN_WORD_LENGTHS:
+        candidates = [w for w in words if len(w) == length]
+        main_words[length] = rng.sample(candidates, min(20, len(candidates)))
+
+    index, index_build = timed(lambda: AnagramIndex(dictionary.words, cache_size=0))
+    # Индекс поверх .kdict: группы уже в файле, в памяти ничего не строится
+    packed_index, packed_index_build = timed(lambda: AnagramIndex(packed.words, cache_size=0))
+
+    result = {
+        'words': len(words),
+        'loadTextSec': round(load_text, 6),
+        'loadPackedSec': round(load_packed, 6),
+        'randomWordUs': round(per_call(lambda: dictionary.get_random_word(10, 14), 2000) * 1e6, 3),
+        'filterByLengthMs': round(per_call(lambda: dictionary.filter_words_by_length(10, 14), 3) * 1e3, 3),
+        'containsUs': round(per_call(lambda: dictionary.contains(next(probe_iter)), 20000) * 1e6, 3),
+        'packedContainsUs': round(per_call(lambda: packed.contains(next(probe_iter)), 20000) * 1e6, 3),
+        'indexBuildSec': round(index_build, 6),
+        'packedIndexBuildSec': round(packed_index_build, 6),
+        'canMakeWordUs': {},
+        'checkWordUs': {},
+        'solutionsMs': {},
+        'solutionsCount': {},
+        'packedSolutionsMs': {},
+    }
+
+    for length, mains in main_words.items():
+        if not mains:
+            continue
+        pairs = [(w, m) for m in mains for w in rng.sample(present, 50)]
+        pair_iter = itertools.cycle(pairs)
+
+        def check_pair():
+            word, main = next(pair_iter)
+            can_make_word(word, main)
+
+        def check_word():
+            word, main = next(pair_iter)
+            dictionary.check_word(word, main)
+
+        result['canMakeWordUs'][str(length)] = round(per_call(check_pair, len(pairs)) * 1e6, 3)
+        result['checkWordUs'][str(length)] = round(per_call(check_word, len(pairs)) * 1e6, 3)
+
+        started = time.perf_counter()
+        found = sum(len(index.solutions(main)) for main in mains)
+        result['solutionsMs'][str(length)] = round((time.perf_counter() - started) / len(mains) * 1e3, 3)
+        result['solutionsCount'][str(length)] = round(found / len(mains), 1)
+
+        started = time.perf_counter()
+        for main in mains:
+            packed_index.solutions(main)
+        result['packedSolutionsMs'][str(length)] = round((time.perf_counter() - started) / len(mains) * 1e3, 3)
+
+    # ru_maxrss в Linux - килобайты
+    result['peakRssMb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def flatten(result: dict) -> dict:
+    """Отслеживаемые метрики в виде {'100000.containsUs': ..., '100000.solutionsMs.10': ...}."""
+    flat = {}
+    for size, metrics in result['sizes'].items():
+        for name in TRACKED:
+            value = metrics.get(name)
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    flat[f'{size}.{name}.{key}'] = item
+            elif value is not None:
+                flat[f'{size}.{name}'] = value
+    return flat
+
+
+def noise_floor(key: str, scale: float = 1.0) -> float:
+    """Шум метрики в ее собственных единицах (секунды, миллисекунды, микросекунды, мегабайты)."""
+    name = key.split('.')[1]
+    for suffix, floor in NOISE_FLOORS.items():
+        if name.endswith(suffix):
+            return floor * scale
+    return 0.0
+
+
+def compare(current: dict, baseline: dict, threshold: float, noise_scale: float = 1.0) -> list:
+    """
+    Метрики, выросшие больше чем на threshold (доля). Рост в пределах шума метрики
+    (NOISE_FLOORS, в ее единицах) не считается; метрика, равная 0 в базовом прогоне,
+    регрессирует, как только превышает шум.
+    """
+    regressions = []
+    old = flatten(baseline)
+    for key, value in flatten(current).items():
+        before = old.get(key)
+        if before is None:
+            continue
+        if value - before <= noise_floor(key, noise_scale):
+            continue
+        if before <= 0 or value > before * (1 + threshold):
+            regressions.append({'metric': key, 'baseline': before, 'current': value,
+                                'change': round(value / before - 1, 3) if before > 0 else None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарки словаря')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='размеры словарей через запятую')
+    parser.add_argument('--workdir', default=os.path.join('/tmp', 'ksis-dict-bench'),
+                        help='каталог для синтетических словарей')
+    parser.add_argument('--baseline', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--save-baseline', help='сохранить результат в файл')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимое ухудшение (доля)')
+    parser.add_argument('--noise-scale', type=float, default=1.0,
+                        help='множитель шума метрик (NOISE_FLOORS): больше - терпимее к шумной машине')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_size(args.worker, args.workdir)))
+        return
+
+    result = {'sizes': {}}
+    for size in (int(s) for s in args.sizes.split(',') if s.strip()):
+        # Отдельный процесс на каждый размер: пиковый RSS не зависит от предыдущих замеров
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--worker', str(size), '--workdir', args.workdir])
+        result['sizes'][str(size)] = json.loads(output)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        result['regressions'] = compare(result, baseline, args.threshold, args.noise_scale)
+        status = 1 if result['regressions'] else 0
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    print(text)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+"""
+Нагрузочный тест игрового сервера через настоящий WebSocket протокол.
+
+Скрипт запускает stub Викисловаря (tools/stub_wiktionary.py) и сервер (uvicorn server.main:app)
+отдельными процессами, подключает rooms x 2 клиентов (игра начинается при двух игроках) и проводит игры:
+JOIN -> CREATE_ROOM / JOIN_ROOM -> SUBMIT_WORD с заданной частотой -> PLAYER_EXIT.
+
+Слова для отправки берутся из решений основного слова (локальный словарь), доля
+--offdict-ratio - слова вне словаря, которые уходят в stub (удаленная проверка).
+
+Результат - JSON (задержка SUBMIT_WORD -> WORD_RESULT p50/p95/p99, сообщений в секунду,
+память сервера на комнату, задержка event loop сервера по /metrics), чтобы сравнивать
+прогоны между коммитами:
+
+    python tools/loadtest.py --rooms 1000 --players 2 --rate 0.5 --duration 30 --output run.json
+
+--url подключает тест к уже запущенному серверу (без запуска процессов; без замера памяти).
+Клиенты и сервер на одной машине делят процессор: для больших прогонов генератор нагрузки
+лучше запускать с --url на другой машине (или других ядрах).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server.anagram_index import AnagramIndex  # noqa: E402
+from server.dictionary import Dictionary  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """Резидентная память процесса в байтах (Linux, /proc)."""
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def http_get(url: str, timeout: float = 5.0) -> str:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode('utf-8')
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(q / 100 * (len(values) - 1)))))
+    return values[index]
+
+
+def parse_histogram(metrics: str, name: str) -> dict:
+    """Корзины, сумма и количество гистограммы без меток из текста /metrics."""
+    buckets, total, count = [], 0.0, 0
+    for line in metrics.splitlines():
+        if line.startswith(f'{name}_bucket{{le="'):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets.append((float('inf') if bound == '+Inf' else float(bound), int(float(line.rsplit(' ', 1)[1]))))
+        elif line.startswith(f'{name}_sum '):
+            total = float(line.rsplit(' ', 1)[1])
+        elif line.startswith(f'{name}_count '):
+            count = int(float(line.rsplit(' ', 1)[1]))
+    return {'buckets': buckets, 'sum': total, 'count': count}
+
+
+def histogram_quantile(histogram: dict, q: float) -> Optional[float]:
+    """Верхняя граница корзины, в которую попадает квантиль q (как histogram_quantile, без интерполяции)."""
+    if not histogram['count']:
+        return None
+    rank = q * histogram['count']
+    for bound, cumulative in histogram['buckets']:
+        if cumulative >= rank:
+            return bound
+    return None
+
+
+# Сообщения, которые клиент разбирает; остальные кадры только считаются (сервер пишет type первым полем)
+PARSED_PREFIXES = tuple(f'{{"type":"{t}"' for t in ('WORD_RESULT', 'GAME_START', 'ERROR', 'CONNECTED',
+                                                     'ROOM_CREATED', 'ROOM_JOINED', 'PING'))
+
+
+class WordSource:
+    """Слова для отправки: решения основного слова из локального словаря."""
+
+    def __init__(self):
+        dictionary = Dictionary()
+        self.index = AnagramIndex(dictionary.words)
+        self._cache: Dict[str, List[str]] = {}
+
+    def solutions(self, main_word: str) -> List[str]:
+        words = self._cache.get(main_word)
+        if words is None:
+            words = self._cache[main_word] = list(self.index.solutions(main_word))
+        return words
+
+
+class Stats:
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.submitted = 0
+        self.results = 0
+        self.accepted = 0
+        self.errors = 0
+        # Отклонено ограничением частоты или занятостью удаленной проверки
+        self.throttled = 0
+        self.rtt: List[float] = []
+        self.measuring = False
+
+
+class SimulatedClient:
+    def __init__(self, base_url: str, player_id: str, stats: Stats, words: WordSource, args):
+        self.url = f'{base_url}/ws/{player_id}?username={player_id}'
+        self.player_id = player_id
+        self.stats = stats
+        self.words = words
+        self.args = args
+        self.ws = None
+        self.main_word = None
+        self.used = set()
+        # слово -> время отправки
+        self.pending: Dict[str, float] = {}
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.game_started = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, max_size=None, open_timeout=30,
+                                           compression=None if self.args.no_deflate else 'deflate')
+        self._reader = asyncio.create_task(self._read())
+        await self.send({'type': 'JOIN', 'username': self.player_id})
+        await self.expect('CONNECTED')
+
+    async def send(self, data: dict):
+        await self.ws.send(json.dumps(data, ensure_ascii=False))
+        self.stats.sent += 1
+
+    async def expect(self, message_type: str, timeout: float = 30.0) -> dict:
+        queue = self.queues.setdefault(message_type, asyncio.Queue())
+        return await asyncio.wait_for(queue.get(), timeout)
+
+    async def _read(self):
+        try:
+            async for frame in self.ws:
+                now = time.perf_counter()
+                self.stats.received += 1
+                if isinstance(frame, str) and not frame.startswith(PARSED_PREFIXES):
+                    continue
+                data = json.loads(frame)
+                message_type = data.get('type')
+                if message_type == 'WORD_RESULT':
+                    sent_at = self.pending.pop(data.get('word'), None)
+                    if sent_at is not None and self.stats.measuring:
+                        self.stats.rtt.append(now - sent_at)
+                    self.stats.results += 1
+                    if data.get('valid'):
+                        self.stats.accepted += 1
+                    elif data.get('throttled'):
+                        self.stats.throttled += 1
+                elif message_type == 'GAME_START':
+                    self.main_word = data.get('mainWord')
+                    self.game_started.set()
+                elif message_type == 'ERROR':
+                    self.stats.errors += 1
+                elif message_type == 'PING':
+                    await self.ws.send('{"type":"PONG"}')
+                if message_type in ('CONNECTED', 'ROOM_CREATED', 'ROOM_JOINED'):
+                    self.queues.setdefault(message_type, asyncio.Queue()).put_nowait(data)
+        except websockets.ConnectionClosed:
+            pass
+
+    def next_word(self) -> str:
+        if random.random() < self.args.offdict_ratio:
+            # Слово вне словаря: перестановка букв основного слова, уходит в удаленную проверку
+            letters = list(self.main_word)
+            random.shuffle(letters)
+            return ''.join(letters[:random.randint(3, min(8, len(letters)))])
+        candidates = [w for w in self.words.solutions(self.main_word) if w not in self.used]
+        if not candidates:
+            return self.main_word[:random.randint(2, 4)]
+        return random.choice(candidates)
+
+    async def play(self, until: float):
+        interval = 1.0 / self.args.rate if self.args.rate > 0 else None
+        # Случайный сдвиг, чтобы клиенты не отправляли слова одновременно
+        await asyncio.sleep(random.uniform(0, interval or 0))
+        while interval and time.perf_counter() < until:
+            word = self.next_word()
+            self.used.add(word)
+            self.pending[word] = time.perf_counter()
+            await self.send({'type': 'SUBMIT_WORD', 'word': word})
+            self.stats.submitted += 1
+            await asyncio.sleep(random.expovariate(1.0 / interval))
+
+    async def close(self, exit_room: bool = True):
+        try:
+            if exit_room:
+                await self.send({'type': 'PLAYER_EXIT'})
+            await self.ws.close()
+        except websockets.ConnectionClosed:
+            pass
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+async def start_room(base_url: str, index: int, stats: Stats, words: WordSource, args,
+                     connect_limit: asyncio.Semaphore) -> List[SimulatedClient]:
+    clients = [SimulatedClient(base_url, f'r{index}p{i}', stats, words, args) for i in range(args.players)]
+    async with connect_limit:
+        for client in clients:
+            await client.connect()
+        await clients[0].send({'type': 'CREATE_ROOM'})
+        room_id = (await clients[0].expect('ROOM_CREATED'))['roomId']
+        for client in clients[1:]:
+            await client.send({'type': 'JOIN_ROOM', 'roomId': room_id})
+            await client.expect('ROOM_JOINED')
+    await asyncio.wait_for(asyncio.gather(*(c.game_started.wait() for c in clients)), 30)
+    return clients
+
+
+def wait_for_http(url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            http_get(url, timeout=2)
+            return
+        except Exception:
+            if time.time() > deadline:
+                raise RuntimeError(f'{url} не ответил за {timeout} с')
+            time.sleep(0.2)
+
+
+def start_processes(args) -> tuple:
+    stub_port, server_port = free_port(), free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'tools', 'stub_wiktionary.py'),
+         '--port', str(stub_port), '--delay', str(args.stub_delay)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    env = dict(os.environ)
+    env.update({
+        'WIKTIONARY_API_URL': f'http://127.0.0.1:{stub_port}/{{lang}}/w/api.php',
+        'WORD_REMOTE_FALLBACK': '1',
+        'LOG_LEVEL': 'WARNING',
+        # Все клиенты теста приходят с 127.0.0.1: лимит на IP отключен, лимит на игрока остается
+        'RATE_LIMIT_IP_RATE': '0',
+        # Результаты тестовых игр не попадают в настоящие лидерборды
+        'RESULTS_DB_PATH': os.path.join('/tmp', 'ksis-loadtest-results.sqlite3'),
+    })
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'server.main:app', '--host', '127.0.0.1',
+         '--port', str(server_port), '--log-level', 'warning', '--ws-max-size', '1048576'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{server_port}'
+    try:
+        wait_for_http(f'{base}/generate_player_id')
+        wait_for_http(f'http://127.0.0.1:{stub_port}/stats')
+    except Exception:
+        stop_processes(stub, server)
+        raise
+    return stub, server, base
+
+
+def stop_processes(*processes):
+    for process in processes:
+        if process is not None and process.poll() is None:
+            process.terminate()
+    for process in processes:
+        if process is not None:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def run(args, base: str, server_pid: Optional[int]) -> dict:
+    ws_base = base.replace('http://', 'ws://').replace('https://', 'wss://')
+    words = WordSource()
+    stats = Stats()
+    # Замер памяти до создания комнат и после
+    rss_before = process_rss(server_pid) if server_pid else None
+    lag_before = parse_histogram(http_get(f'{base}/metrics'), 'ksis_event_loop_lag_seconds')
+
+    connect_limit = asyncio.Semaphore(args.connect_concurrency)
+    setup_started = time.perf_counter()
+    rooms = await asyncio.gather(*(start_room(ws_base, i, stats, words, args, connect_limit)
+                                   for i in range(args.rooms)), return_exceptions=True)
+    failed_rooms = [r for r in rooms if isinstance(r, BaseException)]
+    rooms = [r for r in rooms if not isinstance(r, BaseException)]
+    setup_time = time.perf_counter() - setup_started
+
+    await asyncio.sleep(1.0)
+    rss_rooms = process_rss(server_pid) if server_pid else None
+
+    clients = [client for room in rooms for client in room]
+    stats.measuring = True
+    sent_before, received_before = stats.sent, stats.received
+    started = time.perf_counter()
+    until = started + args.duration
+    await asyncio.gather(*(client.play(until) for client in clients))
+    # ожидание ответов на последние отправленные слова
+    await asyncio.sleep(min(2.0, args.stub_delay + 0.5))
+    elapsed = time.perf_counter() - started
+    stats.measuring = False
+
+    metrics = http_get(f'{base}/metrics')
+    lag = parse_histogram(metrics, 'ksis_event_loop_lag_seconds')
+    lag_window = {
+        'buckets': [(bound, cumulative - before) for (bound, cumulative), (_, before)
+                    in zip(lag['buckets'], lag_before['buckets'] or [(0, 0)] * len(lag['buckets']))],
+        'sum': lag['sum'] - lag_before['sum'],
+        'count': lag['count'] - lag_before['count']
+    }
+
+    await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    rtt_ms = [value * 1000 for value in stats.rtt]
+    memory_per_room = None
+    if rss_before is not None and rss_rooms is not None and rooms:
+        memory_per_room = round((rss_rooms - rss_before) / len(rooms))
+
+    def ms(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        'config': {
+            'rooms': args.rooms,
+            'players': args.players,
+            'ratePerClient': args.rate,
+            'durationSec': args.duration,
+            'offdictRatio': args.offdict_ratio,
+            'stubDelaySec': args.stub_delay,
+            'deflate': not args.no_deflate
+        },
+        'roomsStarted': len(rooms),
+        'roomsFailed': len(failed_rooms),
+        'clients': len(clients),
+        'setupSec': round(setup_time, 3),
+        'submitted': stats.submitted,
+        'results': stats.results,
+        'accepted': stats.accepted,
+        'errors': stats.errors,
+        'throttled': stats.throttled,
+        'submitRttMs': {
+            'p50': ms(percentile(rtt_ms, 50)),
+            'p95': ms(percentile(rtt_ms, 95)),
+            'p99': ms(percentile(rtt_ms, 99)),
+            'max': ms(max(rtt_ms) if rtt_ms else None)
+        },
+        'messagesPerSec': {
+            'sent': round((stats.sent - sent_before) / elapsed, 1),
+            'received': round((stats.received - received_before) / elapsed, 1)
+        },
+        'serverRssBytes': rss_rooms,
+        'memoryPerRoomBytes': memory_per_room,
+        'serverLoopLagMs': {
+            'mean': ms(lag_window['sum'] / lag_window['count'] * 1000 if lag_window['count'] else None),
+            'p99Bucket': ms(histogram_quantile(lag_window, 0.99) * 1000
+                            if histogram_quantile(lag_window, 0.99) not in (None, float('inf')) else None)
+        }
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест WebSocket сервера игры')
+    parser.add_argument('--rooms', type=int, default=200)
+    # Сервер начинает игру, как только в комнате двое (GameServer.join_room): третий игрок
+    # получил бы ERROR "Игра уже началась"
+    parser.add_argument('--players', type=int, default=2, choices=(2,),
+                        help='игроков в комнате (сервер начинает игру при двух)')
+    parser.add_argument('--rate', type=float, default=0.5, help='слов в секунду на клиента')
+    parser.add_argument('--duration', type=float, default=20.0, help='длительность игры, секунд')
+    parser.add_argument('--offdict-ratio', type=float, default=0.1, help='доля слов вне словаря')
+    parser.add_argument('--stub-delay', type=float, default=0.05, help='задержка stub Викисловаря, секунд')
+    parser.add_argument('--connect-concurrency', type=int, default=100)
+    parser.add_argument('--no-deflate', action='store_true', help='без сжатия permessage-deflate')
+    parser.add_argument('--url', help='адрес уже запущенного сервера (http://host:port)')
+    parser.add_argument('--output', help='файл для результата JSON')
+    parser.add_argument('--verbose', action='store_true', help='показывать вывод сервера')
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    stub = server = None
+    try:
+        if args.url:
+            base, server_pid = args.url.rstrip('/'), None
+        else:
+            stub, server, base = start_processes(args)
+            server_pid = server.pid
+        result = asyncio.run(run(args, base, server_pid))
+    finally:
+        stop_processes(server, stub)
+
+    result['commit'] = git_commit()
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
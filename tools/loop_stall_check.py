@@ -0,0 +1,162 @@
+"""
+Проверка, что медленная удаленная проверка слова не блокирует остальные комнаты.
+
+Скрипт поднимает stub Викисловаря с большой задержкой ответа, создает две комнаты
+и одновременно:
+  - в комнате A отправляет слово, которого нет в локальном словаре (уходит в медленный stub);
+  - в комнате B отправляет слово из локального словаря и замеряет время ответа;
+  - измеряет задержку event loop.
+
+Запуск:
+    python tools/loop_stall_check.py --delay 3
+
+Результат печатается в JSON; код возврата 1, если комната B ждала медленный запрос.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from aiohttp import web
+
+# Проверке не нужна база результатов
+os.environ.setdefault('RESULTS_DB_PATH', '')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.game_server import GameServer  # noqa: E402
+from server.wiktionary import WiktionaryClient  # noqa: E402
+from stub_wiktionary import create_app  # noqa: E402
+
+
+class FakeWebSocket:
+    """Минимальная замена WebSocket: запоминает отправленные сообщения."""
+
+    # Адрес клиента (у Starlette WebSocket - (host, port)); неизвестен
+    client = None
+
+    def __init__(self):
+        self.messages = []
+        self.received = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_json(self, data):
+        self._store(data)
+
+    async def send_text(self, text):
+        self._store(json.loads(text))
+
+    async def send_bytes(self, data):
+        self._store(json.loads(data))
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+    def _store(self, data):
+        self.messages.append((time.perf_counter(), data))
+        self.received.set()
+
+    async def wait_for(self, message_type, since=0.0, timeout=30.0):
+        deadline = time.perf_counter() + timeout
+        while True:
+            for ts, data in self.messages:
+                if ts >= since and data.get('type') == message_type:
+                    return ts, data
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(message_type)
+            self.received.clear()
+            try:
+                await asyncio.wait_for(self.received.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def setup_room(game, prefix):
+    sockets = {}
+    for suffix in ('1', '2'):
+        pid = f'{prefix}{suffix}'
+        sockets[pid] = FakeWebSocket()
+        await game.connect(sockets[pid], pid, pid)
+
+    await game.handle_client_message(f'{prefix}1', {'type': 'CREATE_ROOM'})
+    _, created = await sockets[f'{prefix}1'].wait_for('ROOM_CREATED')
+    await game.handle_client_message(f'{prefix}2', {'type': 'JOIN_ROOM', 'roomId': created['roomId']})
+    await sockets[f'{prefix}1'].wait_for('GAME_START')
+    return created['roomId'], sockets
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    loop = asyncio.get_running_loop()
+    max_lag = 0.0
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, loop.time() - expected)
+    return max_lag
+
+
+async def main(delay: float) -> dict:
+    runner = web.AppRunner(create_app(words=None, delay=delay))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    game = GameServer()
+    game.wiktionary = WiktionaryClient(api_url=f'http://127.0.0.1:{port}/{{lang}}/w/api.php',
+                                       timeout=delay + 5)
+    await game.start()
+
+    try:
+        room_a, sockets_a = await setup_room(game, 'a')
+        room_b, sockets_b = await setup_room(game, 'b')
+
+        # Слово для медленной проверки: перевернутое основное слово (его нет в локальном словаре)
+        slow_word = game.rooms[room_a].main_word[::-1]
+        main_b = game.rooms[room_b].main_word
+        local_word = next(w for w in game.dictionary.words
+                          if len(w) >= 3 and game.can_make_word(w, main_b))
+
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_loop_lag(stop))
+
+        started = time.perf_counter()
+        slow_task = asyncio.create_task(game.handle_client_message('a1', {'type': 'SUBMIT_WORD', 'word': slow_word}))
+        await asyncio.sleep(0.05)
+
+        local_sent = time.perf_counter()
+        await game.handle_client_message('b1', {'type': 'SUBMIT_WORD', 'word': local_word})
+        local_done, _ = await sockets_b['b1'].wait_for('WORD_RESULT', since=local_sent)
+
+        await slow_task
+        slow_done, _ = await sockets_a['a1'].wait_for('WORD_RESULT', since=started)
+        stop.set()
+        max_lag = await lag_task
+
+        return {
+            'backendDelaySec': delay,
+            'slowLookupSec': round(slow_done - started, 4),
+            'otherRoomLatencyMs': round((local_done - local_sent) * 1000, 3),
+            'maxLoopLagMs': round(max_lag * 1000, 3),
+        }
+    finally:
+        await game.close()
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Проверка блокировки event loop медленной проверкой слова')
+    parser.add_argument('--delay', type=float, default=3.0, help='задержка stub Викисловаря, секунд')
+    parser.add_argument('--max-latency-ms', type=float, default=100.0)
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args.delay))
+    result['ok'] = result['otherRoomLatencyMs'] < args.max_latency_ms
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(0 if result['ok'] else 1)
@@ -0,0 +1,110 @@
+"""
+Проверка, что недоступный Wiktionary не открывает дорогу произвольным словам.
+
+WIKTIONARY_API_URL указывает на закрытый порт. Слова, которых нет в локальном словаре,
+проверяются через валидатор GameServer (по одному и пакетом) и через WebSocket
+(SUBMIT_WORD). Ожидается:
+  - по умолчанию (WORD_REMOTE_FAIL_OPEN не задан) слова отклоняются;
+  - вердикт по ошибке не попадает в кэш;
+  - с fail_open=True (явное разрешение) те же слова принимаются;
+  - слова с '|', небуквенными символами или длиннее самого длинного слова словаря
+    отклоняются без обращения к Wiktionary даже с fail_open=True.
+
+Запуск:
+    python tools/remote_outage_check.py
+
+Результат печатается в JSON; код возврата 1, если какая-то проверка не прошла.
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+
+
+def closed_port() -> int:
+    # Порт, который только что был свободен: соединение с ним отклоняется
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+os.environ['WIKTIONARY_API_URL'] = f'http://127.0.0.1:{closed_port()}/{{lang}}/api.php'
+os.environ['WIKTIONARY_TIMEOUT'] = '2'
+os.environ.pop('WORD_REMOTE_FAIL_OPEN', None)
+os.environ['RESULTS_DB_PATH'] = ''
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loop_stall_check import FakeWebSocket  # noqa: E402
+from server.game_server import GameServer  # noqa: E402
+from server.word_validator import WordValidator  # noqa: E402
+
+# Составлены из букв основного слова, но в словаре их нет
+MAIN_WORD = 'программирование'
+UNKNOWN_WORDS = ['гиммор', 'прогамир', 'вамирно']
+# Недопустимые для удаленной проверки
+MALFORMED_WORDS = ['гиммор|прогамир|вамирно', 'гиммор2', 'гим мор', 'gimmor', 'а' * 100]
+
+
+async def main() -> dict:
+    server = GameServer()
+    await server.start()
+    checks = {}
+    try:
+        validator = server.word_validator
+        assert validator.remote_lookup is not None, 'нужен WORD_REMOTE_FALLBACK=1'
+        for word in UNKNOWN_WORDS:
+            assert not server.dictionary.contains(word), word
+
+        checks['validateRejected'] = not any([await validator.validate(word) for word in UNKNOWN_WORDS])
+        checks['validateManyRejected'] = not any(await validator.validate_many(UNKNOWN_WORDS))
+        checks['notCached'] = all(validator.cache.get(word) is None for word in UNKNOWN_WORDS)
+
+        # Через игру: SUBMIT_WORD в начатой комнате
+        sockets = {pid: FakeWebSocket() for pid in ('p1', 'p2')}
+        for pid, ws in sockets.items():
+            await server.connect(ws, pid, pid)
+        await server.handle_client_message('p1', {'type': 'CREATE_ROOM'})
+        room_id = next(iter(server.rooms))
+        room = server.rooms[room_id]
+        server._set_main_word(room, MAIN_WORD, await server.find_solutions(MAIN_WORD))
+        # Второй игрок - игра начинается
+        await server.handle_client_message('p2', {'type': 'JOIN_ROOM', 'roomId': room_id})
+        await server.handle_client_message('p1', {'type': 'SUBMIT_WORD', 'word': UNKNOWN_WORDS[0]})
+        _, result = await sockets['p1'].wait_for('WORD_RESULT', timeout=10)
+        checks['submitRejected'] = not result.get('valid')
+        checks['scoreUnchanged'] = room.get_player('p1').score == 0
+
+        # Явное разрешение: ошибка источника - слово принимается
+        fail_open = WordValidator(server.dictionary, remote_lookup=server.check_word_in_wiktionary_async,
+                                  fail_open=True)
+        checks['failOpenAccepted'] = await fail_open.validate(UNKNOWN_WORDS[1])
+
+        # Недопустимые слова: отказ без удаленного запроса (иначе fail_open принял бы их)
+        remote_calls = []
+
+        async def counting_lookup(word):
+            remote_calls.append(word)
+            return await server.check_word_in_wiktionary_async(word)
+
+        async def counting_batch(words):
+            remote_calls.extend(words)
+            return await server.wiktionary.lookup_many(words)
+
+        guarded = WordValidator(server.dictionary, remote_lookup=counting_lookup, fail_open=True,
+                                remote_batch_lookup=counting_batch)
+        checks['malformedRejected'] = not any([await guarded.validate(word) for word in MALFORMED_WORDS])
+        checks['malformedManyRejected'] = not any(await guarded.validate_many(MALFORMED_WORDS))
+        checks['malformedNotLookedUp'] = not remote_calls
+    finally:
+        await server.close()
+    return checks
+
+
+if __name__ == '__main__':
+    result = asyncio.run(main())
+    result['ok'] = all(result.values())
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(0 if result['ok'] else 1)
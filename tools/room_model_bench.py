@@ -0,0 +1,121 @@
+"""
+Сравнение модели комнат: вложенные словари (как было) и классы со __slots__ (server/models.py).
+
+Строит N комнат по P игроков, у каждого W найденных слов, и измеряет память (tracemalloc)
+и время одной отправки слова (поиск игрока, проверка повтора, начисление очков).
+
+    python tools/room_model_bench.py --rooms 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from types import MappingProxyType
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.models import Room  # noqa: E402
+
+# Решения основного слова (в игре общие для комнат с одним словом, см. AnagramIndex.solutions)
+SOLUTIONS = [f'слово{j}' for j in range(300)]
+SOLUTION_SET = frozenset(SOLUTIONS)
+SOLUTION_INDEX = MappingProxyType({word: i for i, word in enumerate(SOLUTIONS)})
+
+
+def make_dict_room(room_id: str, players: int, words: int) -> dict:
+    room = {
+        'id': room_id,
+        'players': [],
+        'mainWord': 'программирование',
+        'solutions': SOLUTION_SET,
+        'possibleWords': 0,
+        'possibleScore': 0,
+        'availableCells': 20,
+        'timeLimit': 300,
+        'status': 'playing',
+        'created': time.time(),
+        'startTime': time.time(),
+        'seq': 0,
+        'deltas': deque(maxlen=64)
+    }
+    for i in range(players):
+        player = {'id': f'{room_id}-{i}', 'username': f'Игрок {i}', 'score': 0, 'userWords': []}
+        for j in range(words):
+            player['userWords'].append(f'слово{j}')
+            player['score'] += 5
+        room['players'].append(player)
+    return room
+
+
+def make_slotted_room(room_id: str, players: int, words: int) -> Room:
+    room = Room(room_id, 64)
+    room.main_word = 'программирование'
+    room.solutions = SOLUTION_INDEX
+    room.status = 'playing'
+    room.start_time = time.time()
+    for i in range(players):
+        player = room.add_player(f'{room_id}-{i}', f'Игрок {i}')
+        for j in range(words):
+            room.add_word(player, f'слово{j}', 5)
+    return room
+
+
+def submit_dict(room: dict, player_id: str, word: str) -> bool:
+    player = next((p for p in room['players'] if p['id'] == player_id), None)
+    if player is None or word in [w.lower() for w in player['userWords']]:
+        return False
+    player['userWords'].append(word)
+    player['score'] += len(word)
+    return True
+
+
+def submit_slotted(room: Room, player_id: str, word: str) -> bool:
+    player = room.get_player(player_id)
+    if player is None or room.has_used(player, word):
+        return False
+    room.add_word(player, word, len(word))
+    return True
+
+
+def measure(factory, submit, rooms: int, players: int, words: int) -> dict:
+    tracemalloc.start()
+    built = [factory(f'r{i}', players, words) for i in range(rooms)]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    submissions = 0
+    for i, room in enumerate(built):
+        submit(room, f'r{i}-{players - 1}', SOLUTIONS[-1])
+        submit(room, f'r{i}-{players - 1}', 'слово0')  # повтор
+        submissions += 2
+    elapsed = time.perf_counter() - started
+
+    return {
+        'bytesPerRoom': round(memory / rooms),
+        'usPerSubmit': round(elapsed / submissions * 1e6, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Память и CPU модели комнат')
+    parser.add_argument('--rooms', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--words', type=int, default=40)
+    args = parser.parse_args()
+
+    result = {
+        'rooms': args.rooms,
+        'players': args.players,
+        'words': args.words,
+        'dict': measure(make_dict_room, submit_dict, args.rooms, args.players, args.words),
+        'slotted': measure(make_slotted_room, submit_slotted, args.rooms, args.players, args.words)
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
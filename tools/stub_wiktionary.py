@@ -0,0 +1,66 @@
+"""
+Локальный stub-сервер, имитирующий API Викисловаря (action=query).
+
+Запуск:
+    python tools/stub_wiktionary.py --port 8081 --words server/resources/russian_words.txt
+
+Сервер игры направляется на него переменной окружения:
+    WIKTIONARY_API_URL=http://127.0.0.1:8081/{lang}/w/api.php
+
+Без --words любое слово считается существующим. --delay добавляет задержку
+ответа (секунды), чтобы имитировать медленный внешний сервис.
+"""
+import argparse
+import asyncio
+
+from aiohttp import web
+
+
+def create_app(words=None, delay: float = 0.0) -> web.Application:
+    stats = {'requests': 0}
+
+    async def api(request: web.Request):
+        stats['requests'] += 1
+        if delay:
+            await asyncio.sleep(delay)
+
+        titles = [t for t in request.query.get('titles', '').split('|') if t]
+        pages = {}
+        missing_id = -1
+        for index, title in enumerate(titles):
+            if words is None or title.lower() in words:
+                pages[str(index + 1)] = {'pageid': index + 1, 'ns': 0, 'title': title}
+            else:
+                pages[str(missing_id)] = {'ns': 0, 'title': title, 'missing': ''}
+                missing_id -= 1
+
+        return web.json_response({'batchcomplete': '', 'query': {'pages': pages}})
+
+    async def get_stats(request: web.Request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get('/{lang}/w/api.php', api)
+    app.router.add_get('/stats', get_stats)
+    app['stats'] = stats
+    return app
+
+
+def load_words(path: str) -> set:
+    with open(path, 'r', encoding='utf-8') as file:
+        return {line.strip().lower() for line in file if line.strip()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub API Викисловаря')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--words', help='файл со списком существующих слов')
+    parser.add_argument('--delay', type=float, default=0.0, help='задержка ответа, секунд')
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(load_words(args.words) if args.words else None, args.delay),
+        host=args.host,
+        port=args.port
+    )